@@ -29,6 +29,9 @@ class AuditLog(models.Model):
         ordering = ['-timestamp']
         verbose_name = 'Audit Log'
         verbose_name_plural = 'Audit Logs'
+        indexes = [
+            models.Index(fields=['timestamp']),
+        ]
 
     def __str__(self):
         return f"{self.get_action_display()} by {self.user} at {self.timestamp}"
\ No newline at end of file
@@ -1,3 +1,44 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
 
-# Create your tests here.
+from .models import CrimePrediction
+from .views import CrimePredictionListView
+
+
+class CrimePredictionListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i, (crime_type, severity) in enumerate([('theft', 'Severe'), ('theft', 'Not Severe'), ('assault', 'Severe')]):
+            CrimePrediction.objects.create(
+                crime_type=crime_type, latitude=-1.95, longitude=30.06, encoded_crime_type=i,
+                predicted_severity=severity, prediction_value=int(severity == 'Severe'),
+            )
+
+    def list_predictions(self, **params):
+        request = APIRequestFactory().get('/api/predictions/stats/', params)
+        with CaptureQueriesContext(connection) as queries:
+            response = CrimePredictionListView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(queries)
+
+    def test_results_and_statistics(self):
+        data, queries = self.list_predictions()
+        self.assertEqual(set(data), {'statistics', 'next', 'previous', 'results'})
+        self.assertEqual(len(data['results']), 3)
+        self.assertIsNone(data['next'])
+        self.assertEqual(data['statistics']['total_predictions'], 3)
+        self.assertEqual(data['statistics']['severe_predictions'], 2)
+        self.assertEqual(data['statistics']['severity_percentage']['not_severe'], 33.33)
+        self.assertEqual(data['statistics']['top_crime_types'][0], {'crime_type': 'theft', 'count': 2})
+        # One page query, one aggregate, one crime type breakdown
+        self.assertEqual(queries, 3)
+
+    def test_pages_keep_flat_results(self):
+        data, _ = self.list_predictions(page_size=2, severity='Severe')
+        self.assertEqual(len(data['results']), 2)
+        self.assertIsNone(data['next'])
+        data, _ = self.list_predictions(page_size=2)
+        self.assertEqual(len(data['results']), 2)
+        self.assertIsNotNone(data['next'])
@@ -89,6 +89,7 @@ class CrimePredictionListView(ListAPIView):
     """Get predictions with filtering and statistics"""
     queryset = CrimePrediction.objects.all()
     serializer_class = CrimePredictionSerializer
+    cursor_ordering = ('-created_at',)
     
     def get_queryset(self):
         queryset = CrimePrediction.objects.all()
@@ -114,16 +115,22 @@ class CrimePredictionListView(ListAPIView):
         # Add statistics to response
         response = super().list(request, *args, **kwargs)
         
-        # Get statistics
-        total_predictions = CrimePrediction.objects.count()
-        severe_count = CrimePrediction.objects.filter(predicted_severity='Severe').count()
-        not_severe_count = CrimePrediction.objects.filter(predicted_severity='Not Severe').count()
+        # Get statistics: every count from one conditional-aggregation query
+        counts = CrimePrediction.objects.aggregate(
+            total=Count('id'),
+            severe=Count('id', filter=Q(predicted_severity='Severe')),
+            not_severe=Count('id', filter=Q(predicted_severity='Not Severe')),
+        )
+        total_predictions = counts['total']
+        severe_count = counts['severe']
+        not_severe_count = counts['not_severe']
         
         # Crime type distribution
         crime_type_stats = CrimePrediction.objects.values('crime_type').annotate(
             count=Count('id')
         ).order_by('-count')[:10]  # Top 10 crime types
         
+        # Page links sit beside the results, which stay a flat list
         response.data = {
             'statistics': {
                 'total_predictions': total_predictions,
@@ -135,7 +142,9 @@ class CrimePredictionListView(ListAPIView):
                 },
                 'top_crime_types': list(crime_type_stats)
             },
-            'results': response.data
+            'next': response.data['next'],
+            'previous': response.data['previous'],
+            'results': response.data['results'],
         }
         
         return response
\ No newline at end of file
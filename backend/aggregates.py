@@ -0,0 +1,46 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def increment_counters(model, keys, **deltas):
+    """
+    Add ``deltas`` to the counter rows identified by ``keys``.
+
+    ``keys`` is a list of dicts naming the unique lookup columns of each row.
+    Existing rows are bumped with a single ``UPDATE ... SET col = col + n`` and
+    the missing ones are inserted in one ``bulk_create``, so an incident touching
+    many cells still costs a constant number of queries. Negative deltas only
+    lower existing rows; nothing is inserted for them.
+    """
+    keys = [dict(key) for key in keys]
+    if not keys:
+        return
+
+    key_fields = list(keys[0].keys())
+    lookup = Q()
+    for key in keys:
+        lookup |= Q(**key)
+
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                existing = set(
+                    model.objects.select_for_update().filter(lookup).values_list(*key_fields)
+                )
+                if existing:
+                    model.objects.filter(lookup).update(
+                        **{field: F(field) + value for field, value in deltas.items()}
+                    )
+
+                missing = [key for key in keys if tuple(key[f] for f in key_fields) not in existing]
+                if missing and any(value > 0 for value in deltas.values()):
+                    model.objects.bulk_create([model(**key, **deltas) for key in missing])
+            return
+        except IntegrityError:
+            # A concurrent writer created one of the missing rows; retry as an update
+            if attempt:
+                raise
+            logger.debug(f"Counter insert race on {model.__name__}, retrying")
@@ -2,6 +2,8 @@
 ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Only /api/communications/stream/ is meant to be routed here; the rest of the
+API is served through WSGI, where synchronous streaming responses stay streamed.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -0,0 +1,106 @@
+"""
+Sparse fieldsets for list endpoints.
+
+Clients pick response fields with ``?fields=a,b`` or drop them with
+``?omit=a,b``. The serializer mixin trims the representation and the view
+mixin defers the model columns no remaining field reads, so they are never
+fetched from the database.
+"""
+from rest_framework.serializers import ListSerializer
+
+
+def requested_fieldset(request):
+    """Return the (fields, omit) name sets from the query string, or None for unset"""
+    if request is None or request.method != 'GET':
+        return None, None
+
+    def parse(name):
+        value = request.query_params.get(name)
+        if value is None:
+            return None
+        return {part.strip() for part in value.split(',') if part.strip()}
+
+    return parse('fields'), parse('omit')
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Serializer mixin honouring ``?fields=`` and ``?omit=`` on GET requests.
+
+    Only the top-level serializer is trimmed; nested serializers share the
+    context but keep their fields. Computed fields list the model columns they
+    read in ``sparse_field_dependencies`` so views can defer everything else.
+    """
+    sparse_field_dependencies = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_root_serializer():
+            return fields
+
+        requested, omitted = requested_fieldset(self.context.get('request'))
+        if requested:
+            fields = {name: field for name, field in fields.items() if name in requested}
+        if omitted:
+            fields = {name: field for name, field in fields.items() if name not in omitted}
+        return fields
+
+    def _is_root_serializer(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, ListSerializer) and parent.parent is None)
+
+    @classmethod
+    def deferrable_columns(cls, model, context):
+        """
+        Return the concrete columns of ``model`` that the trimmed representation
+        does not read, or an empty list if that cannot be determined safely.
+        """
+        requested, omitted = requested_fieldset(context.get('request'))
+        if not requested and not omitted:
+            return []
+
+        columns = {
+            field.name: field for field in model._meta.concrete_fields
+            if not field.primary_key
+        }
+        relations = {field.name for field in model._meta.get_fields() if field.is_relation}
+
+        needed = set()
+        for name, field in cls(context=context).fields.items():
+            if name in cls.sparse_field_dependencies:
+                needed.update(cls.sparse_field_dependencies[name])
+                continue
+            root = field.source.split('.')[0] if field.source else name
+            if root in columns:
+                needed.add(root)
+            elif root not in relations and root != model._meta.pk.name:
+                # Computed from unknown columns: deferring could cause a query per row
+                return []
+
+        return [name for name in columns if name not in needed]
+
+
+class SparseFieldsetQuerysetMixin:
+    """View mixin deferring the columns a sparse list response does not use"""
+
+    def get_queryset(self):
+        return self.defer_unrequested_fields(super().get_queryset())
+
+    def defer_unrequested_fields(self, queryset):
+        """Defer the model columns the requested fieldset does not read"""
+        lookup_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if self.request.method != 'GET' or lookup_kwarg in self.kwargs:
+            return queryset
+
+        serializer_class = self.get_serializer_class()
+        if not issubclass(serializer_class, SparseFieldsetSerializerMixin):
+            return queryset
+
+        deferred = serializer_class.deferrable_columns(queryset.model, self.get_serializer_context())
+
+        # The paginator reads the ordering key of each page's edge rows
+        if deferred and self.paginator is not None and hasattr(self.paginator, 'get_ordering'):
+            ordering = {field.lstrip('-') for field in self.paginator.get_ordering(self.request, queryset, self)}
+            deferred = [name for name in deferred if name not in ordering]
+
+        return queryset.defer(*deferred) if deferred else queryset
@@ -0,0 +1,36 @@
+"""
+Project-wide keyset pagination.
+
+DRF's ``CursorPagination`` encodes the value of the *first* ordering field in
+the cursor and fetches the next page with ``WHERE <key> < <position> ORDER BY
+<ordering> LIMIT n`` (``>`` for ascending keys); rows that tie on that key are
+skipped with an offset stored in the cursor. No ``COUNT(*)`` is issued and deep pages
+cost the same as the first one, provided the first key is indexed and close to
+unique so those offsets stay small. Views choose the key with a
+``cursor_ordering`` attribute, or a ``get_cursor_ordering()`` method when it
+depends on the request. The primary key is appended to the ordering only to
+make the order of tied rows deterministic; it is not part of the ``WHERE``.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-id',)
+
+    def get_ordering(self, request, queryset, view):
+        get_cursor_ordering = getattr(view, 'get_cursor_ordering', None)
+        if get_cursor_ordering is not None:
+            ordering = get_cursor_ordering()
+        elif hasattr(view, 'cursor_ordering'):
+            ordering = view.cursor_ordering
+        else:
+            # Defer to an OrderingFilter on the view, or the default key
+            ordering = super().get_ordering(request, queryset, view)
+
+        ordering = (ordering,) if isinstance(ordering, str) else tuple(ordering)
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering += ('-id' if ordering[0].startswith('-') else 'id',)
+        return ordering
@@ -0,0 +1,31 @@
+from rest_framework.utils import model_meta
+
+
+class UpdateFieldsSerializerMixin:
+    """
+    ModelSerializer mixin whose updates write only the columns that changed.
+
+    Attributes are compared with the incoming values and the instance is saved
+    with ``update_fields`` naming just those columns plus any ``auto_now``
+    timestamps; nothing is written when no column changed. Many-to-many
+    relations are set after the save as ``ModelSerializer.update`` does.
+    """
+
+    def update(self, instance, validated_data):
+        info = model_meta.get_field_info(instance)
+        many_to_many = {
+            attr: validated_data.pop(attr) for attr in list(validated_data)
+            if attr in info.relations and info.relations[attr].to_many
+        }
+
+        changed = [attr for attr, value in validated_data.items() if getattr(instance, attr) != value]
+        if changed:
+            for attr in changed:
+                setattr(instance, attr, validated_data[attr])
+            auto_now = [field.name for field in instance._meta.concrete_fields if getattr(field, 'auto_now', False)]
+            instance.save(update_fields={*changed, *auto_now})
+
+        for attr, value in many_to_many.items():
+            getattr(instance, attr).set(value)
+
+        return instance
@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'authapi',
@@ -49,6 +50,7 @@ INSTALLED_APPS = [
     'case',
     'communication',
     'AuditLog',
+    'exports',
     'corsheaders',
     
 ]
@@ -57,6 +59,8 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    'DEFAULT_PAGINATION_CLASS': 'backend.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
 }
 from datetime import timedelta
 SIMPLE_JWT = {
@@ -140,6 +144,15 @@ DATABASES = {
     }
 }
 
+# Cached statistics are invalidated on write, so every worker must share one
+# cache; create its table with `python manage.py createcachetable`
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+    }
+}
+
 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
@@ -192,5 +205,11 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'authapi.User'
+
+# Generated case IDs, e.g. CASE-0001; 'CASE-{year}-{number:04d}' numbers them per year
+CASE_ID_FORMAT = 'CASE-{number:04d}'
+
+# Pub/sub backend for pushed messages; the in-process one serves a single ASGI worker
+COMMUNICATION_BROKER = 'communication.realtime.InProcessBroker'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
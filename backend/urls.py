@@ -29,4 +29,5 @@ urlpatterns = [
     path('api/', include('communication.urls')),
     path('api/', include('case.urls')),
     path('api/', include('AuditLog.urls')),
+    path('api/', include('exports.urls')),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
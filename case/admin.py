@@ -1,3 +1,22 @@
 from django.contrib import admin
+from .models import CaseEvent, CaseIdSequence, OfficerWorkload
 
-# Register your models here.
+
+@admin.register(CaseIdSequence)
+class CaseIdSequenceAdmin(admin.ModelAdmin):
+    list_display = ['prefix', 'last_value']
+    search_fields = ['prefix']
+
+
+
+@admin.register(CaseEvent)
+class CaseEventAdmin(admin.ModelAdmin):
+    list_display = ['case', 'event_type', 'officer', 'old_value', 'new_value', 'actor', 'timestamp']
+    list_filter = ['event_type', 'timestamp']
+    search_fields = ['case__case_id']
+
+
+@admin.register(OfficerWorkload)
+class OfficerWorkloadAdmin(admin.ModelAdmin):
+    list_display = ['officer', 'active_cases', 'open_cases', 'investigating_cases', 'high_priority_cases', 'total_cases', 'updated_at']
+    search_fields = ['officer__username', 'officer__email']
@@ -0,0 +1,88 @@
+import heapq
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .models import Case, CaseEvent, OfficerWorkload
+from . import statistics, workload
+
+User = get_user_model()
+
+ROLES = ('Police', 'Investigator')
+
+# Most urgent cases are served first, so they get the least loaded officers
+PRIORITY_ORDER = {'high': 0, 'medium': 1, 'low': 2}
+
+
+def locked_officer_loads(roles=ROLES):
+    """
+    (active cases, officer id) for every active officer of the given roles.
+
+    The workload rows are locked until the transaction ends, so concurrent
+    auto-assignments queue up instead of planning from the same loads.
+    """
+    officer_ids = set(User.objects.filter(role__in=roles, is_active=True).values_list('id', flat=True))
+    # Officers without a workload row get a placeholder first, so every load can be locked
+    missing = officer_ids - set(
+        OfficerWorkload.objects.filter(officer_id__in=officer_ids).values_list('officer_id', flat=True)
+    )
+    OfficerWorkload.objects.bulk_create(
+        [OfficerWorkload(officer_id=officer_id) for officer_id in missing], ignore_conflicts=True
+    )
+    rows = OfficerWorkload.objects.filter(officer_id__in=officer_ids)
+    # One lock order for every caller
+    list(rows.select_for_update().order_by('officer_id').values_list('officer_id', flat=True))
+    # Placeholders are counted only once locked, so a batch committed meanwhile is included
+    workload.refresh(missing)
+    return list(rows.values_list('active_cases', 'officer_id'))
+
+
+def plan(cases, loads, officers_per_case=1, existing=frozenset()):
+    """
+    Pick officers for each case from a min-heap of officer loads.
+
+    ``cases`` are (case pk, priority) pairs, ``loads`` (load, officer id)
+    pairs and ``existing`` the (case pk, officer id) assignments already in
+    place. Each pick pops the least loaded officer and pushes it back one
+    case heavier, so a batch of n cases over m officers costs O(n log m).
+    Returns the new (case pk, officer id) assignments.
+    """
+    heap = list(loads)
+    heapq.heapify(heap)
+    officers_per_case = min(officers_per_case, len(heap))
+
+    assignments = []
+    for case_pk, _ in sorted(cases, key=lambda case: PRIORITY_ORDER.get(case[1], len(PRIORITY_ORDER))):
+        picked, skipped = [], []
+        while heap and len(picked) < officers_per_case:
+            load, officer_id = heapq.heappop(heap)
+            if (case_pk, officer_id) in existing:
+                skipped.append((load, officer_id))
+            else:
+                picked.append((load, officer_id))
+        for load, officer_id in picked:
+            assignments.append((case_pk, officer_id))
+            heapq.heappush(heap, (load + 1, officer_id))
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+    return assignments
+
+
+def auto_assign(case_pks, officers_per_case=1, roles=ROLES, actor=None):
+    """Assign officers to a batch of cases by current workload; returns the new assignments"""
+    through = Case.assigned_officers.through
+    with transaction.atomic():
+        cases = list(Case.objects.filter(id__in=case_pks).values_list('id', 'priority'))
+        existing = set(through.objects.filter(case_id__in=case_pks).values_list('case_id', 'user_id'))
+        assignments = plan(cases, locked_officer_loads(roles), officers_per_case, existing)
+
+        # Set-based writes send no m2m_changed, so keep the derived data current here
+        through.objects.bulk_create(
+            [through(case_id=case_pk, user_id=officer_id) for case_pk, officer_id in assignments],
+            ignore_conflicts=True
+        )
+        CaseEvent.objects.bulk_create(CaseEvent.assignments('officer_assigned', assignments, actor))
+        officer_ids = {officer_id for _, officer_id in assignments}
+        workload.refresh(officer_ids)
+        transaction.on_commit(lambda: statistics.invalidate(officer_ids, snapshot=False))
+    return assignments
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from case import workload
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-officer workload table from the case assignments"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = workload.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt workload for {count} officers"))
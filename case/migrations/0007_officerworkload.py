@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_workload(apps, schema_editor):
+    Case = apps.get_model('case', 'Case')
+    OfficerWorkload = apps.get_model('case', 'OfficerWorkload')
+    counts = Case.assigned_officers.through.objects.values('user_id').annotate(
+        total=Count('case_id'),
+        open=Count('case_id', filter=Q(case__status='open')),
+        investigating=Count('case_id', filter=Q(case__status='investigating')),
+        high_priority=Count('case_id', filter=Q(case__status__in=['open', 'investigating'], case__priority='high')),
+    ).order_by()
+    OfficerWorkload.objects.bulk_create([
+        OfficerWorkload(
+            officer_id=row['user_id'],
+            open_cases=row['open'],
+            investigating_cases=row['investigating'],
+            active_cases=row['open'] + row['investigating'],
+            high_priority_cases=row['high_priority'],
+            total_cases=row['total'],
+        )
+        for row in counts
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authapi', '0004_user_status'),
+        ('case', '0006_caseevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OfficerWorkload',
+            fields=[
+                ('officer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='workload', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('open_cases', models.PositiveIntegerField(default=0)),
+                ('investigating_cases', models.PositiveIntegerField(default=0)),
+                ('active_cases', models.PositiveIntegerField(default=0)),
+                ('high_priority_cases', models.PositiveIntegerField(default=0)),
+                ('total_cases', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['active_cases'], name='case_office_active__0f0592_idx')],
+            },
+        ),
+        migrations.RunPython(populate_workload, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('case', '0007_officerworkload'),
+        ('incidents', '0005_alter_incident_created_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['start_date', 'id'], name='case_case_start_d_2405b4_idx'),
+        ),
+    ]
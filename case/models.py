@@ -1,5 +1,11 @@
-from django.db import models
+import re
+
+from django.db import IntegrityError, models, transaction
 from django.conf import settings
+from django.utils import timezone
+
+# Format of generated case IDs; {year} scopes numbering to the calendar year
+DEFAULT_CASE_ID_FORMAT = 'CASE-{number:04d}'
 
 class Case(models.Model):
     STATUS_CHOICES = [
@@ -26,13 +32,149 @@ class Case(models.Model):
     priority = models.CharField(max_length=10)
     notes = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pages of the default case list: -start_date, -id
+            models.Index(fields=['start_date', 'id']),
+        ]
+
     def __str__(self):
         return self.case_id
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Values as loaded, so saves can tell what changed
+        instance._loaded_status = instance.__dict__.get('status')
+        instance._loaded_priority = instance.__dict__.get('priority')
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.case_id:
             # Auto-generate case_id if not provided (optional)
-            last_case = Case.objects.order_by('-id').first()
-            new_id = last_case.id + 1 if last_case else 1
-            self.case_id = f"CASE-{new_id:04d}"
-        super().save(*args, **kwargs)
\ No newline at end of file
+            self.case_id = CaseIdSequence.next_case_id()
+        elif self._state.adding:
+            # Keep generated IDs clear of a manually supplied one
+            CaseIdSequence.advance_past(self.case_id)
+        super().save(*args, **kwargs)
+
+
+class CaseIdSequence(models.Model):
+    """Last number handed out for one case_id prefix, e.g. 'CASE-2025-'"""
+    prefix = models.CharField(max_length=50, unique=True)
+    last_value = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.prefix}{self.last_value}"
+
+    @staticmethod
+    def case_id_format():
+        return getattr(settings, 'CASE_ID_FORMAT', DEFAULT_CASE_ID_FORMAT)
+
+    @classmethod
+    def next_case_id(cls, now=None):
+        """
+        Allocate the next case ID in ``settings.CASE_ID_FORMAT``.
+
+        The counter row of the prefix is locked while it is incremented, so
+        concurrent creates never receive the same number. Numbers taken by
+        inserts that later fail are not reused.
+        """
+        case_id_format = cls.case_id_format()
+        year = (now or timezone.now()).year
+        prefix = case_id_format.split('{number', 1)[0].format(year=year)
+
+        with transaction.atomic():
+            sequence = cls.objects.select_for_update().filter(prefix=prefix).first()
+            if sequence is None:
+                sequence = cls._start(prefix)
+            sequence.last_value += 1
+            sequence.save(update_fields=['last_value'])
+
+        return case_id_format.format(year=year, number=sequence.last_value)
+
+    @classmethod
+    def advance_past(cls, case_id):
+        """Move a started counter past a case ID supplied by hand in the configured format"""
+        head, _, tail = cls.case_id_format().partition('{number')
+        tail = tail.split('}', 1)[1]
+        prefix_pattern = re.escape(head).replace(re.escape('{year}'), r'\d{4}')
+        match = re.fullmatch(rf'({prefix_pattern})(\d+){re.escape(tail)}', case_id)
+        if match is None:
+            return
+        # A counter not started yet scans the existing IDs when it is created
+        cls.objects.filter(prefix=match.group(1), last_value__lt=int(match.group(2))).update(
+            last_value=int(match.group(2))
+        )
+
+    @classmethod
+    def _start(cls, prefix):
+        """Create the counter of a new prefix, continuing after existing case IDs"""
+        pattern = re.compile(re.escape(prefix) + r'(\d+)$')
+        existing = Case.objects.filter(case_id__startswith=prefix).values_list('case_id', flat=True)
+        highest = max((int(match.group(1)) for match in map(pattern.match, existing) if match), default=0)
+        try:
+            with transaction.atomic():
+                return cls.objects.create(prefix=prefix, last_value=highest)
+        except IntegrityError:
+            # Another process created it first
+            return cls.objects.select_for_update().get(prefix=prefix)
+
+
+class CaseEvent(models.Model):
+    """A status change or officer (un)assignment in the history of a case"""
+    EVENT_TYPE_CHOICES = [
+        ('status_change', 'Status changed'),
+        ('officer_assigned', 'Officer assigned'),
+        ('officer_removed', 'Officer removed'),
+    ]
+
+    case = models.ForeignKey(Case, on_delete=models.CASCADE, related_name='events')
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPE_CHOICES)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    officer = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    old_value = models.CharField(max_length=20, blank=True)
+    new_value = models.CharField(max_length=20, blank=True)
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['timestamp']
+        indexes = [
+            models.Index(fields=['case', 'timestamp']),
+        ]
+
+    def __str__(self):
+        return f"{self.case_id} {self.event_type} @ {self.timestamp}"
+
+    @classmethod
+    def assignments(cls, event_type, pairs, actor=None):
+        """Unsaved events for (case pk, officer pk) pairs"""
+        return [
+            cls(case_id=case_pk, officer_id=officer_pk, event_type=event_type, actor=actor)
+            for case_pk, officer_pk in pairs
+        ]
+
+
+class OfficerWorkload(models.Model):
+    """Case counts of one officer, kept current on assignment and case changes"""
+    officer = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='workload'
+    )
+    open_cases = models.PositiveIntegerField(default=0)
+    investigating_cases = models.PositiveIntegerField(default=0)
+    active_cases = models.PositiveIntegerField(default=0)
+    high_priority_cases = models.PositiveIntegerField(default=0)
+    total_cases = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['active_cases']),
+        ]
+
+    def __str__(self):
+        return f"{self.officer_id}: {self.active_cases} active"
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from backend.fieldsets import SparseFieldsetSerializerMixin
 from communication.models import CommunicationLog
 from incidents.models import Incident
 from .models import Case
@@ -8,17 +10,39 @@ import logging
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+def days_open(case):
+    """Days between start and end (or today), from the days_open annotation when present"""
+    annotated = getattr(case, 'days_open', None)
+    if annotated is not None:
+        return annotated.days
+    end_date = case.end_date or timezone.now().date()
+    return (end_date - case.start_date).days
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
 
+class OfficerWorkloadSerializer(serializers.ModelSerializer):
+    open_cases = serializers.IntegerField(read_only=True)
+    investigating_cases = serializers.IntegerField(read_only=True)
+    active_cases = serializers.IntegerField(read_only=True)
+    high_priority_cases = serializers.IntegerField(read_only=True)
+    total_cases = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = User
+        fields = [
+            'id', 'username', 'email', 'first_name', 'last_name', 'role',
+            'open_cases', 'investigating_cases', 'active_cases', 'high_priority_cases', 'total_cases'
+        ]
+
 class IncidentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Incident
         fields = ['id', 'crime_type', 'location', 'description', 'date', 'time', 'urgency']
 
-class CaseSerializer(serializers.ModelSerializer):
+class CaseSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     assigned_officers = UserSerializer(many=True, read_only=True)
     related_incidents = IncidentSerializer(many=True, read_only=True)
     
@@ -38,6 +62,11 @@ class CaseSerializer(serializers.ModelSerializer):
     communication_logs_count = serializers.SerializerMethodField()
     days_open = serializers.SerializerMethodField()
 
+    sparse_field_dependencies = {
+        'communication_logs_count': [],
+        'days_open': ['start_date', 'end_date'],
+    }
+
     class Meta:
         model = Case
         fields = [
@@ -47,7 +76,8 @@ class CaseSerializer(serializers.ModelSerializer):
             'communication_logs_count', 'days_open'
         ]
         extra_kwargs = {
-            'case_id': {'required': True}
+            # Generated from settings.CASE_ID_FORMAT when omitted
+            'case_id': {'required': False}
         }
 
     def validate_case_id(self, value):  # Changed from validate_case_number to validate_case_id
@@ -123,36 +153,23 @@ class CaseSerializer(serializers.ModelSerializer):
         return instance
 
     def get_communication_logs_count(self, obj):
-        import logging
-        from case.models import Case
-        from communication.models import CommunicationLog
-        logger = logging.getLogger(__name__)
-        try:
-            # Defensive: If obj is a string, try to get the Case instance
-            if isinstance(obj, str):
-                logger.warning(f"get_communication_logs_count called with str: {obj}")
-                try:
-                    obj = Case.objects.get(case_id=obj)
-                except Case.DoesNotExist:
-                    logger.error(f"No Case found for case_id={obj}")
-                    return 0
-            if not isinstance(obj, Case):
-                logger.error(f"get_communication_logs_count called with non-Case: type={type(obj)}, value={obj}")
-                return 0
-            return CommunicationLog.objects.filter(related_case=obj).count()
-        except Exception as e:
-            logger.error(f"Exception in get_communication_logs_count: {e}")
-            return 0
+        # Annotated by the case views; counted per case otherwise
+        count = getattr(obj, 'communication_logs_count', None)
+        if count is not None:
+            return count
+        return obj.communications.count()
 
     def get_days_open(self, obj):
-        from django.utils import timezone
-        if obj.end_date:
-            return (obj.end_date - obj.start_date).days
-        return (timezone.now().date() - obj.start_date).days
+        return days_open(obj)
 
-class CaseListSerializer(serializers.ModelSerializer):
+class CaseListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     assigned_officers_count = serializers.SerializerMethodField()
     days_open = serializers.SerializerMethodField()
+
+    sparse_field_dependencies = {
+        'assigned_officers_count': [],
+        'days_open': ['start_date', 'end_date'],
+    }
     
     assigned_officers_ids = serializers.PrimaryKeyRelatedField(
         many=True,
@@ -179,10 +196,7 @@ class CaseListSerializer(serializers.ModelSerializer):
         return obj.assigned_officers.count()
     
     def get_days_open(self, obj):
-        from django.utils import timezone
-        if obj.end_date:
-            return (obj.end_date - obj.start_date).days
-        return (timezone.now().date() - obj.start_date).days
+        return days_open(obj)
 
 class CommunicationLogSerializer(serializers.ModelSerializer):
     sender = UserSerializer(read_only=True)
@@ -0,0 +1,74 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import statistics, workload
+from .models import Case, CaseEvent
+
+
+def _assigned_officer_ids(case):
+    return list(Case.assigned_officers.through.objects.filter(case_id=case.pk).values_list('user_id', flat=True))
+
+
+@receiver(post_save, sender=Case)
+def case_saved(sender, instance, created, **kwargs):
+    officer_ids = _assigned_officer_ids(instance)
+    # After commit, so no request can re-cache the old counts in between
+    transaction.on_commit(lambda: statistics.invalidate(officer_ids))
+
+    previous_status = '' if created else getattr(instance, '_loaded_status', None)
+    previous_priority = None if created else getattr(instance, '_loaded_priority', None)
+    if previous_status is not None and previous_status != instance.status:
+        CaseEvent.objects.create(
+            case=instance, event_type='status_change', old_value=previous_status, new_value=instance.status,
+            actor=getattr(instance, '_actor', None)
+        )
+
+    # Unknown previous values (instance not loaded from the database) count as changed
+    if officer_ids and (
+        previous_status != instance.status or previous_priority != instance.priority
+    ):
+        workload.refresh(officer_ids)
+
+    instance._loaded_status = instance.status
+    instance._loaded_priority = instance.priority
+
+
+@receiver(pre_delete, sender=Case)
+def remember_officers_before_delete(sender, instance, **kwargs):
+    # The assignment rows are gone by post_delete
+    instance._statistics_officer_ids = _assigned_officer_ids(instance)
+
+
+@receiver(post_delete, sender=Case)
+def case_deleted(sender, instance, **kwargs):
+    officer_ids = getattr(instance, '_statistics_officer_ids', ())
+    transaction.on_commit(lambda: statistics.invalidate(officer_ids))
+    workload.refresh(officer_ids)
+
+
+@receiver(m2m_changed, sender=Case.assigned_officers.through)
+def track_assignment_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # pk_set is empty for clears
+        if not reverse:
+            instance._cleared_assignments = _assigned_officer_ids(instance)
+        return
+
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_cleared_assignments', [])
+    elif action not in ('post_add', 'post_remove'):
+        return
+
+    if reverse:
+        # user.case_set.add(...): instance is the officer, pk_set the cases
+        officer_ids = [instance.pk]
+        pairs = [(case_pk, instance.pk) for case_pk in pk_set or ()]
+    else:
+        officer_ids = pk_set or ()
+        pairs = [(instance.pk, officer_pk) for officer_pk in pk_set or ()]
+    transaction.on_commit(lambda: statistics.invalidate(officer_ids, snapshot=False))
+    workload.refresh(officer_ids)
+
+    event_type = 'officer_assigned' if action == 'post_add' else 'officer_removed'
+    CaseEvent.objects.bulk_create(CaseEvent.assignments(event_type, pairs, getattr(instance, '_actor', None)))
@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.db.models import Count, Exists, OuterRef, Q
+
+from .models import Case
+
+# Entries live in the shared cache (settings.CACHES), so the invalidation
+# after a case or assignment change reaches every worker. QuerySet.update()
+# and raw SQL bypass the signals; the bulk views invalidate explicitly and
+# this timeout bounds how long any other such write can go unnoticed
+CACHE_TIMEOUT = 60
+
+GLOBAL_KEY = 'case_statistics:global'
+
+PRIORITIES = ('high', 'medium', 'low')
+
+
+def officer_key(user_id):
+    return f'case_statistics:officer:{user_id}'
+
+
+def compute(user_id):
+    """Global and per-officer case counts from one conditional-aggregation query"""
+    assigned = Q(Exists(
+        Case.assigned_officers.through.objects.filter(case_id=OuterRef('pk'), user_id=user_id)
+    ))
+    expressions = {
+        'total': Count('id'),
+        'mine': Count('id', filter=assigned),
+    }
+    for value, _ in Case.STATUS_CHOICES:
+        expressions[f'status_{value}'] = Count('id', filter=Q(status=value))
+    for value in ('open', 'investigating'):
+        expressions[f'mine_{value}'] = Count('id', filter=assigned & Q(status=value))
+    for value in PRIORITIES:
+        expressions[f'priority_{value}'] = Count('id', filter=Q(priority=value))
+    row = Case.objects.aggregate(**expressions)
+
+    snapshot = {
+        'total': row['total'],
+        'status': {value: row[f'status_{value}'] for value, _ in Case.STATUS_CHOICES},
+        'priority': {value: row[f'priority_{value}'] for value in PRIORITIES},
+    }
+    officer = {
+        'total': row['mine'],
+        'open': row['mine_open'],
+        'investigating': row['mine_investigating'],
+    }
+    return snapshot, officer
+
+
+def for_officer(user_id):
+    """Return (global snapshot, officer counters), from the cache when both are fresh"""
+    cached = cache.get_many([GLOBAL_KEY, officer_key(user_id)])
+    if len(cached) == 2:
+        return cached[GLOBAL_KEY], cached[officer_key(user_id)]
+
+    snapshot, officer = compute(user_id)
+    cache.set_many({GLOBAL_KEY: snapshot, officer_key(user_id): officer}, CACHE_TIMEOUT)
+    return snapshot, officer
+
+
+def invalidate(officer_ids=(), snapshot=True):
+    """Drop the global snapshot and the counters of the given officers"""
+    keys = [officer_key(user_id) for user_id in officer_ids]
+    if snapshot:
+        keys.append(GLOBAL_KEY)
+    if keys:
+        cache.delete_many(keys)
@@ -1,3 +1,534 @@
-from django.test import TestCase
+import json
+import threading
+from datetime import date
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from authapi.models import User
+from communication.models import CommunicationLog
+from .models import Case, OfficerWorkload
+from . import assignment, workload
+from .views import CaseDetailView, CaseListCreateView, OfficerCasesView, OfficerWorkloadView, auto_assign_cases, bulk_assign_officers, bulk_update_cases, case_statistics, case_timeline
+
+
+class CaseStatisticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.officer = User.objects.create_user(
+            username='officer', email='officer@example.com', password='secret', role='Police'
+        )
+        for i, (case_status, priority) in enumerate([('open', 'high'), ('investigating', 'low'), ('closed', 'high')]):
+            case = Case.objects.create(
+                title=f'Case {i}', description='Test case', case_id=f'TEST-{i:04d}',
+                start_date='2026-01-01', status=case_status, priority=priority,
+            )
+            if case_status != 'closed':
+                case.assigned_officers.add(cls.officer)
+
+    def setUp(self):
+        cache.clear()
+
+    def statistics(self):
+        request = APIRequestFactory().get('/api/cases/statistics/')
+        force_authenticate(request, user=self.officer)
+        with CaptureQueriesContext(connection) as queries:
+            response = case_statistics(request)
+        self.assertEqual(response.status_code, 200)
+        # Only the case queries count; the database cache issues its own
+        return response.data, len([q for q in queries if '"case_case' in q['sql']])
+
+    def test_single_query_then_cached(self):
+        data, queries = self.statistics()
+        self.assertEqual(queries, 1)
+        self.assertEqual(data['total_cases'], 3)
+        self.assertEqual(data['case_distribution'], {'open': 1, 'investigating': 1, 'closed': 1})
+        self.assertEqual(data['priority_distribution'], {'high': 2, 'medium': 0, 'low': 1})
+        self.assertEqual(data['my_assigned_cases'], 2)
+        self.assertEqual(data['my_open_cases'], 1)
+
+        _, queries = self.statistics()
+        self.assertEqual(queries, 0)
+
+    def test_invalidated_on_status_and_assignment_changes(self):
+        self.statistics()
+        case = Case.objects.get(case_id='TEST-0000')
+        case.status = 'investigating'
+        with self.captureOnCommitCallbacks(execute=True):
+            case.save()
+        data, _ = self.statistics()
+        self.assertEqual(data['my_investigating_cases'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            case.assigned_officers.remove(self.officer)
+        data, _ = self.statistics()
+        self.assertEqual(data['my_assigned_cases'], 1)
+
+    def test_not_invalidated_before_commit(self):
+        self.statistics()
+        case = Case.objects.get(case_id='TEST-0000')
+        case.status = 'closed'
+        case.save()
+        _, queries = self.statistics()
+        self.assertEqual(queries, 0)
+
+
+class CaseIdAllocationTests(TestCase):
+    def create_case(self, **kwargs):
+        return Case.objects.create(
+            title='Allocated', description='Test case', start_date='2026-01-01',
+            status='open', priority='low', **kwargs
+        )
+
+    @override_settings(CASE_ID_FORMAT='CASE-{year}-{number:04d}')
+    def test_sequential_year_scoped_ids(self):
+        year = timezone.now().year
+        first, second = self.create_case(), self.create_case()
+        self.assertEqual(first.case_id, f'CASE-{year}-0001')
+        self.assertEqual(second.case_id, f'CASE-{year}-0002')
+
+    @override_settings(CASE_ID_FORMAT='CASE-{number:04d}')
+    def test_continues_after_existing_ids(self):
+        self.create_case(case_id='CASE-0041')
+        self.assertEqual(self.create_case().case_id, 'CASE-0042')
+
+    def test_default_format(self):
+        self.assertEqual(self.create_case().case_id, 'CASE-0001')
+
+    @override_settings(CASE_ID_FORMAT='CASE-{number:04d}')
+    def test_manual_ids_advance_started_sequence(self):
+        self.assertEqual(self.create_case().case_id, 'CASE-0001')
+        self.create_case(case_id='CASE-0010')
+        self.create_case(case_id='CASE-0005')
+        self.create_case(case_id='OLD-0099')
+        self.assertEqual(self.create_case().case_id, 'CASE-0011')
+
+    @override_settings(CASE_ID_FORMAT='CASE-{year}-{number:04d}')
+    def test_manual_ids_advance_their_year(self):
+        year = timezone.now().year
+        self.create_case()
+        self.create_case(case_id=f'CASE-{year}-0007')
+        self.create_case(case_id=f'CASE-{year - 1}-0050')
+        self.assertEqual(self.create_case().case_id, f'CASE-{year}-0008')
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentCaseIdAllocationTests(TransactionTestCase):
+    WORKERS = 8
+    CASES_PER_WORKER = 10
+
+    def test_concurrent_creates_get_unique_ids(self):
+        barrier = threading.Barrier(self.WORKERS)
+        errors = []
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(self.CASES_PER_WORKER):
+                    Case.objects.create(
+                        title='Concurrent', description='Test case', start_date='2026-01-01',
+                        status='open', priority='low',
+                    )
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.WORKERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        case_ids = list(Case.objects.values_list('case_id', flat=True))
+        self.assertEqual(len(case_ids), self.WORKERS * self.CASES_PER_WORKER)
+        self.assertEqual(len(set(case_ids)), len(case_ids))
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentAutoAssignmentTests(TransactionTestCase):
+    WORKERS = 4
+
+    def test_concurrent_batches_stay_balanced(self):
+        officers = [
+            User.objects.create_user(
+                username=f'concurrent{i}', email=f'concurrent{i}@example.com', password='secret', role='Police'
+            )
+            for i in range(self.WORKERS)
+        ]
+        cases = [
+            Case.objects.create(
+                title=f'Case {i}', description='Test case', case_id=f'RACE-{i:04d}',
+                start_date='2026-01-01', status='open', priority='low',
+            )
+            for i in range(self.WORKERS)
+        ]
+        barrier = threading.Barrier(self.WORKERS)
+        errors = []
+
+        def worker(case):
+            try:
+                barrier.wait()
+                assignment.auto_assign([case.pk])
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(case,)) for case in cases]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        # Without the row locks every batch would pick the same idle officer
+        loads = dict(OfficerWorkload.objects.values_list('officer_id', 'active_cases'))
+        self.assertEqual([loads[officer.id] for officer in officers], [1] * self.WORKERS)
+
+
+class CaseMetricsAnnotationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.officer = User.objects.create_user(
+            username='metrics', email='metrics@example.com', password='secret', role='Police'
+        )
+        for i in range(6):
+            case = Case.objects.create(
+                title=f'Case {i}', description='Test case', case_id=f'METRIC-{i:04d}',
+                start_date='2026-01-01', end_date='2026-01-11' if i % 2 else None,
+                status='open', priority='low',
+            )
+            case.assigned_officers.add(cls.officer)
+            for _ in range(i):
+                CommunicationLog.objects.create(
+                    sender=cls.officer, receiver=cls.officer, message_content='Case update', related_case=case
+                )
+
+    def get(self, view, **kwargs):
+        request = APIRequestFactory().get('/api/cases/', {'page_size': 3})
+        force_authenticate(request, user=self.officer)
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request, **kwargs)
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(queries)
+
+    def test_detail_reads_annotations(self):
+        data, _ = self.get(CaseDetailView.as_view(), case_id='METRIC-0003')
+        self.assertEqual(data['communication_logs_count'], 3)
+        self.assertEqual(data['days_open'], 10)
+
+        expected_open = (timezone.now().date() - date(2026, 1, 1)).days
+        data, _ = self.get(CaseDetailView.as_view(), case_id='METRIC-0004')
+        self.assertEqual(data['days_open'], expected_open)
+
+    def test_lists_skip_communication_count(self):
+        for view, kwargs in ((CaseListCreateView.as_view(), {}), (OfficerCasesView.as_view(), {'officer_id': self.officer.id})):
+            request = APIRequestFactory().get('/api/cases/')
+            force_authenticate(request, user=self.officer)
+            with CaptureQueriesContext(connection) as queries:
+                response = view(request, **kwargs)
+                response.render()
+            self.assertEqual({case['days_open'] for case in response.data['results'] if case['case_id'] == 'METRIC-0001'}, {10})
+            self.assertNotIn('communication_logs_count', response.data['results'][0])
+            self.assertFalse(any('communication_communicationlog' in q['sql'] for q in queries))
+
+    def test_officer_cases_query_count_constant(self):
+        view = OfficerCasesView.as_view()
+        data, small = self.get(view, officer_id=self.officer.id)
+        self.assertEqual(len(data['results']), 3)
+        request = APIRequestFactory().get('/api/cases/', {'page_size': 6})
+        force_authenticate(request, user=self.officer)
+        with CaptureQueriesContext(connection) as queries:
+            view(request, officer_id=self.officer.id).render()
+        self.assertEqual(small, len(queries))
+
+
+class BulkCaseUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.officers = [
+            User.objects.create_user(
+                username=f'bulk{i}', email=f'bulk{i}@example.com', password='secret', role='Police'
+            )
+            for i in range(3)
+        ]
+        for i in range(30):
+            case = Case.objects.create(
+                title=f'Case {i}', description='Test case', case_id=f'BULK-{i:04d}',
+                start_date='2026-01-01', status='open', priority='low',
+            )
+            case.assigned_officers.add(cls.officers[0])
+
+    def post(self, view, data):
+        request = APIRequestFactory().post('/api/cases/bulk-update/', data, format='json')
+        force_authenticate(request, user=self.officers[0])
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request)
+        return response, len(queries)
+
+    def test_query_count_independent_of_case_count(self):
+        update_data = {'priority': 'high', 'assigned_officers_ids': [self.officers[1].id, self.officers[2].id]}
+        _, few = self.post(bulk_update_cases, {'case_ids': ['BULK-0000', 'BULK-0001'], 'update_data': update_data})
+        case_ids = [f'BULK-{i:04d}' for i in range(2, 30)]
+        response, many = self.post(bulk_update_cases, {'case_ids': case_ids, 'update_data': update_data})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated_count'], 28)
+        self.assertEqual(few, many)
+
+        case = Case.objects.get(case_id='BULK-0029')
+        self.assertEqual(case.priority, 'high')
+        self.assertEqual(set(case.assigned_officers.values_list('id', flat=True)), {self.officers[1].id, self.officers[2].id})
+
+    def test_reports_missing_ids_and_rejects_invalid_data(self):
+        response, _ = self.post(bulk_update_cases, {'case_ids': ['BULK-0000', 'MISSING'], 'update_data': {'status': 'closed'}})
+        self.assertEqual(response.data['updated_count'], 1)
+        self.assertEqual(response.data['errors'], [{'case_id': 'MISSING', 'errors': 'Case not found or invalid ID'}])
+
+        response, _ = self.post(bulk_update_cases, {'case_ids': ['BULK-0000'], 'update_data': {'status': 'archived'}})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Case.objects.get(case_id='BULK-0000').status, 'closed')
+
+    def test_bulk_assign_keeps_existing_officers(self):
+        response, _ = self.post(bulk_assign_officers, {'case_ids': ['BULK-0000', 'BULK-0001'], 'officer_ids': [self.officers[2].id]})
+        self.assertEqual(response.data['updated_count'], 2)
+        case = Case.objects.get(case_id='BULK-0001')
+        self.assertEqual(set(case.assigned_officers.values_list('id', flat=True)), {self.officers[0].id, self.officers[2].id})
+
+
+class CaseTimelineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.officer = User.objects.create_user(
+            username='timeline', email='timeline@example.com', password='secret', role='Investigator'
+        )
+        cls.case = Case.objects.create(
+            title='Timeline', description='Test case', case_id='TIME-0001',
+            start_date='2026-01-01', status='open', priority='low',
+        )
+        cls.case.assigned_officers.add(cls.officer)
+        CommunicationLog.objects.create(
+            sender=cls.officer, receiver=cls.officer, message_content='First update', related_case=cls.case
+        )
+        cls.case.status = 'investigating'
+        cls.case.save()
+
+    def timeline(self, **params):
+        request = APIRequestFactory().get('/api/cases/TIME-0001/timeline/', params)
+        force_authenticate(request, user=self.officer)
+        response = case_timeline(request, case_id='TIME-0001')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        return [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+    def test_merges_sources_in_time_order(self):
+        entries = self.timeline()
+        kinds = [(entry['type'], entry.get('event_type')) for entry in entries]
+        self.assertEqual(kinds, [
+            ('event', 'status_change'),
+            ('event', 'officer_assigned'),
+            ('communication', None),
+            ('event', 'status_change'),
+        ])
+        self.assertEqual(entries[-1]['new_value'], 'investigating')
+        self.assertEqual(entries[1]['officer_id'], self.officer.id)
+        timestamps = [entry['timestamp'] for entry in entries]
+        self.assertEqual(timestamps, sorted(timestamps))
+
+    def test_since_filter(self):
+        self.assertEqual(self.timeline(since='2999-01-01'), [])
+        request = APIRequestFactory().get('/api/cases/TIME-0001/timeline/', {'since': 'yesterday'})
+        force_authenticate(request, user=self.officer)
+        self.assertEqual(case_timeline(request, case_id='TIME-0001').status_code, 400)
+
+
+class OfficerWorkloadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.busy = User.objects.create_user(
+            username='busy', email='busy@example.com', password='secret', role='Police'
+        )
+        cls.idle = User.objects.create_user(
+            username='idle', email='idle@example.com', password='secret', role='Investigator'
+        )
+        User.objects.create_user(username='admin', email='admin@example.com', password='secret', role='Admin')
+        for i, (case_status, priority) in enumerate([('open', 'high'), ('investigating', 'low'), ('closed', 'high')]):
+            case = Case.objects.create(
+                title=f'Case {i}', description='Test case', case_id=f'LOAD-{i:04d}',
+                start_date='2026-01-01', status=case_status, priority=priority,
+            )
+            case.assigned_officers.add(cls.busy)
+
+    def row(self, officer):
+        return OfficerWorkload.objects.get(officer=officer)
+
+    def list(self, params=None):
+        request = APIRequestFactory().get('/api/officers/workload/', params or {})
+        force_authenticate(request, user=self.busy)
+        response = OfficerWorkloadView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_maintained_on_assignment_and_status_changes(self):
+        load = self.row(self.busy)
+        self.assertEqual(
+            (load.open_cases, load.investigating_cases, load.active_cases, load.high_priority_cases, load.total_cases),
+            (1, 1, 2, 1, 3)
+        )
+
+        case = Case.objects.get(case_id='LOAD-0000')
+        case.status = 'closed'
+        case.save()
+        self.assertEqual(self.row(self.busy).active_cases, 1)
+        self.assertEqual(self.row(self.busy).high_priority_cases, 0)
+
+        case = Case.objects.get(case_id='LOAD-0001')
+        case.priority = 'high'
+        case.save()
+        self.assertEqual(self.row(self.busy).high_priority_cases, 1)
+
+        case.assigned_officers.add(self.idle)
+        self.assertEqual(self.row(self.idle).active_cases, 1)
+        case.assigned_officers.clear()
+        self.assertEqual(self.row(self.idle).active_cases, 0)
+        self.assertEqual(self.row(self.busy).active_cases, 0)
+        self.assertEqual(self.row(self.busy).total_cases, 2)
+
+        Case.objects.get(case_id='LOAD-0002').delete()
+        self.assertEqual(self.row(self.busy).total_cases, 1)
+
+    def test_bulk_update_refreshes_workload(self):
+        request = APIRequestFactory().post('/api/cases/bulk-update/', {
+            'case_ids': ['LOAD-0000', 'LOAD-0001'], 'update_data': {'status': 'closed'}
+        }, format='json')
+        force_authenticate(request, user=self.busy)
+        self.assertEqual(bulk_update_cases(request).status_code, 200)
+        self.assertEqual(self.row(self.busy).active_cases, 0)
+
+    def test_lists_officers_by_load(self):
+        results = self.list()
+        self.assertEqual([row['username'] for row in results], ['idle', 'busy'])
+        self.assertEqual(results[0]['active_cases'], 0)
+        self.assertEqual(results[1]['active_cases'], 2)
+
+        self.assertEqual([row['username'] for row in self.list({'ordering': '-active_cases'})], ['busy', 'idle'])
+        self.assertEqual([row['username'] for row in self.list({'min_active': 1})], ['busy'])
+        self.assertEqual([row['username'] for row in self.list({'role': 'Investigator'})], ['idle'])
+
+    def test_rebuild_matches_incremental_rows(self):
+        expected = list(OfficerWorkload.objects.order_by('officer').values())
+        OfficerWorkload.objects.all().delete()
+        self.assertEqual(workload.rebuild(), 1)
+        rebuilt = list(OfficerWorkload.objects.order_by('officer').values())
+        for row in expected + rebuilt:
+            row.pop('updated_at')
+        self.assertEqual(rebuilt, [row for row in expected if row['total_cases']])
+
+
+class AutoAssignmentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.officers = [
+            User.objects.create_user(
+                username=f'officer{i}', email=f'officer{i}@example.com', password='secret',
+                role='Police' if i < 2 else 'Investigator'
+            )
+            for i in range(3)
+        ]
+        User.objects.create_user(username='admin', email='admin@example.com', password='secret', role='Admin')
+        busy = Case.objects.create(
+            title='Busy', description='Test case', case_id='AUTO-BUSY', start_date='2026-01-01', status='open'
+        )
+        busy.assigned_officers.add(cls.officers[0])
+        for i, priority in enumerate(['low', 'high', 'medium', 'low']):
+            Case.objects.create(
+                title=f'Case {i}', description='Test case', case_id=f'AUTO-{i:04d}',
+                start_date='2026-01-01', status='open', priority=priority,
+            )
+
+    def auto_assign(self, data):
+        request = APIRequestFactory().post('/api/cases/auto-assign/', data, format='json')
+        force_authenticate(request, user=self.officers[0])
+        return auto_assign_cases(request)
+
+    def test_plan_balances_loads(self):
+        loads = [(5, 1), (0, 2), (1, 3)]
+        cases = [(10, 'low'), (11, 'high'), (12, 'low'), (13, 'medium')]
+        assignments = assignment.plan(cases, loads)
+        self.assertEqual(assignments[0], (11, 2))
+        counts = {officer_id: sum(1 for _, o in assignments if o == officer_id) for _, officer_id in loads}
+        self.assertEqual(counts, {1: 0, 2: 3, 3: 1})
+
+        # Officers already on a case are skipped for it
+        self.assertEqual(assignment.plan([(10, 'low')], [(0, 2), (1, 3)], existing={(10, 2)}), [(10, 3)])
+
+    def test_assigns_batch_with_one_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.auto_assign({'case_ids': ['AUTO-0000', 'AUTO-0001', 'AUTO-0002', 'AUTO-0003', 'MISSING']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['assigned_count'], 4)
+        self.assertEqual(len(response.data['errors']), 1)
+        self.assertTrue(all(len(officers) == 1 for officers in response.data['assignments'].values()))
+
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT') and '"case_case_assigned_officers"' in q['sql']]
+        self.assertEqual(len(inserts), 1)
+
+        # The already busy officer gets the fewest new cases
+        loads = dict(OfficerWorkload.objects.values_list('officer_id', 'active_cases'))
+        self.assertEqual(sorted(loads.values()), [1, 2, 2])
+        self.assertEqual(Case.objects.get(case_id='AUTO-0001').events.filter(event_type='officer_assigned').count(), 1)
+
+    def test_missing_workload_rows_are_computed(self):
+        OfficerWorkload.objects.all().delete()
+        response = self.auto_assign({'case_ids': ['AUTO-0001', 'AUTO-0002']})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(self.officers[0].id, {o for officers in response.data['assignments'].values() for o in officers})
+        loads = dict(OfficerWorkload.objects.values_list('officer_id', 'active_cases'))
+        self.assertEqual(loads, {self.officers[0].id: 1, self.officers[1].id: 1, self.officers[2].id: 1})
+
+    def test_role_and_officers_per_case(self):
+        response = self.auto_assign({'case_ids': ['AUTO-0000'], 'role': 'Police', 'officers_per_case': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.data['assignments']['AUTO-0000']), [self.officers[0].id, self.officers[1].id])
+
+        self.assertEqual(self.auto_assign({'case_ids': ['AUTO-0000'], 'role': 'Admin'}).status_code, 400)
+        self.assertEqual(self.auto_assign({'case_ids': 'AUTO-0000'}).status_code, 400)
+
+
+class CaseListOrderingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='lister', email='lister@example.com', password='secret', role='Police'
+        )
+        for i, start_date in enumerate(['2026-01-05', '2026-03-01', '2026-02-10', '2026-03-01']):
+            Case.objects.create(
+                title=f'Case {i}', description='Test case', case_id=f'LIST-{i:04d}',
+                start_date=start_date, status='open', priority='low',
+            )
+
+    def list_cases(self, **params):
+        request = APIRequestFactory().get('/api/cases/', params)
+        force_authenticate(request, user=self.user)
+        response = CaseListCreateView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_newest_start_date_first(self):
+        data = self.list_cases()
+        self.assertEqual([case['case_id'] for case in data['results']],
+                         ['LIST-0003', 'LIST-0001', 'LIST-0002', 'LIST-0000'])
+
+    def test_pages_follow_start_date(self):
+        data = self.list_cases(page_size=3)
+        seen = [case['case_id'] for case in data['results']]
+        request = APIRequestFactory().get(data['next'])
+        force_authenticate(request, user=self.user)
+        seen += [case['case_id'] for case in CaseListCreateView.as_view()(request).data['results']]
+        self.assertEqual(seen, ['LIST-0003', 'LIST-0001', 'LIST-0002', 'LIST-0000'])
@@ -0,0 +1,57 @@
+import heapq
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from communication.models import CommunicationLog
+from incidents.models import Incident
+from .models import CaseEvent
+
+# Rows fetched per round trip from each stream
+CHUNK_SIZE = 500
+
+
+def _between(queryset, field, since, until):
+    if since:
+        queryset = queryset.filter(**{f'{field}__gte': since})
+    if until:
+        queryset = queryset.filter(**{f'{field}__lt': until})
+    return queryset
+
+
+def _stream(entry_type, queryset, field, columns):
+    """Yield timeline entries of one source in time order, reading it in chunks"""
+    rows = queryset.order_by(field, 'id').values('id', field, *columns).iterator(chunk_size=CHUNK_SIZE)
+    for row in rows:
+        yield {'type': entry_type, 'timestamp': row.pop(field), **row}
+
+
+def entries(case, since=None, until=None):
+    """
+    Chronological feed of a case: linked incidents, communications and events.
+
+    Each source is an indexed stream already ordered by time; ``heapq.merge``
+    interleaves them lazily, so only one chunk per source is held in memory.
+    """
+    incidents = _stream(
+        'incident',
+        _between(Incident.objects.filter(cases=case), 'created_at', since, until),
+        'created_at', ('crime_type', 'location', 'urgency', 'description'),
+    )
+    communications = _stream(
+        'communication',
+        _between(CommunicationLog.objects.filter(related_case=case), 'timestamp', since, until),
+        'timestamp', ('sender_id', 'receiver_id', 'message_type', 'priority', 'subject'),
+    )
+    events = _stream(
+        'event',
+        _between(CaseEvent.objects.filter(case=case), 'timestamp', since, until),
+        'timestamp', ('event_type', 'actor_id', 'officer_id', 'old_value', 'new_value'),
+    )
+    return heapq.merge(incidents, communications, events, key=lambda entry: entry['timestamp'])
+
+
+def ndjson(entries):
+    """Encode timeline entries as newline-delimited JSON"""
+    for entry in entries:
+        yield json.dumps(entry, cls=DjangoJSONEncoder) + '\n'
@@ -4,10 +4,18 @@ from . import views
 urlpatterns = [
     # ✅ Case CRUD operations
     path('cases/', views.CaseListCreateView.as_view(), name='case-list-create'),
+
+    # ✅ Statistics and bulk operations (before the detail route, which would otherwise capture them)
+    path('cases/statistics/', views.case_statistics, name='case-statistics'),
+    path('cases/bulk-update/', views.bulk_update_cases, name='case-bulk-update'),
+    path('cases/bulk-assign-officers/', views.bulk_assign_officers, name='case-bulk-assign-officers'),
+    path('cases/auto-assign/', views.auto_assign_cases, name='case-auto-assign'),
+
     path('cases/<str:pk>/', views.CaseDetailView.as_view(), name='case-detail'),
 
     # ✅ Case-Officer relationships
     path('cases/<str:case_id>/officers/', views.CaseOfficersView.as_view(), name='case-officers'),
+    path('officers/workload/', views.OfficerWorkloadView.as_view(), name='officer-workload'),
     path('officers/<int:officer_id>/cases/', views.OfficerCasesView.as_view(), name='officer-cases'),
     path('cases/<str:case_id>/assign-officer/', views.assign_officer_to_case, name='assign-officer'),
     path('cases/<str:case_id>/officers/<int:officer_id>/remove/', views.remove_officer_from_case, name='remove-officer'),
@@ -15,8 +23,8 @@ urlpatterns = [
     # ✅ Case status management
     path('cases/<str:case_id>/status/', views.update_case_status, name='update-case-status'),
 
-    # ✅ Statistics
-    path('cases/statistics/', views.case_statistics, name='case-statistics'),
+    # ✅ Case history
+    path('cases/<str:case_id>/timeline/', views.case_timeline, name='case-timeline'),
 
     # ✅ Communication module routes
     path('communication/', include('communication.urls')),
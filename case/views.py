@@ -1,36 +1,54 @@
 from rest_framework import generics, permissions, filters, status
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
-from django.db.models import Q, Count, Prefetch
+from django.db.models import Q, Count, Prefetch, F, Value, DateField, DurationField, ExpressionWrapper
+from django.db.models.functions import Coalesce
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.contrib.auth import get_user_model
 from communication.models import CommunicationLog
-from .models import Case
+from backend.fieldsets import SparseFieldsetQuerysetMixin
+from .models import Case, CaseEvent
+from . import assignment, statistics, timeline, workload
 import logging
 import traceback
+from datetime import datetime, time
 
 from .serializers import (
     CaseSerializer, CaseListSerializer, 
-    CommunicationLogSerializer, UserSerializer
+    CommunicationLogSerializer, UserSerializer, OfficerWorkloadSerializer
 )
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 20
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+def annotate_days_open(queryset):
+    """Compute days open in SQL instead of once per case"""
+    today = Value(timezone.now().date(), output_field=DateField())
+    return queryset.annotate(
+        days_open=ExpressionWrapper(
+            Coalesce('end_date', today) - F('start_date'),
+            output_field=DurationField()
+        )
+    )
+
+
+def annotate_case_metrics(queryset):
+    """Days open plus the communication count that only CaseSerializer outputs"""
+    return annotate_days_open(queryset).annotate(
+        communication_logs_count=Count('communications', distinct=True)
+    )
 
 # Case Views
-class CaseListCreateView(generics.ListCreateAPIView):
+class CaseListCreateView(SparseFieldsetQuerysetMixin, generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
-    pagination_class = StandardResultsSetPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'case_id', 'description']
-    ordering_fields = ['start_date', 'case_id', 'priority', 'status']
+    ordering_fields = ['id', 'start_date', 'case_id', 'priority', 'status']
     ordering = ['-start_date']
 
     def get_serializer_class(self):
@@ -120,7 +138,8 @@ class CaseListCreateView(generics.ListCreateAPIView):
         if my_cases and my_cases.lower() == 'true':
             queryset = queryset.filter(assigned_officers=self.request.user)
             
-        return queryset.distinct()  # Ensure no duplicates from joins
+        # Ensure no duplicates from joins
+        return self.defer_unrequested_fields(annotate_days_open(queryset.distinct()))
 
 class CaseDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = CaseSerializer
@@ -128,16 +147,21 @@ class CaseDetailView(generics.RetrieveUpdateDestroyAPIView):
     lookup_field = 'case_id'  # Use string-based case_id for lookups
     
     def get_queryset(self):
-        return Case.objects.select_related().prefetch_related(
+        queryset = Case.objects.select_related().prefetch_related(
             'assigned_officers', 
             'related_incidents'
         )
+        # Updates change end_date, so only reads use the annotated values
+        if self.request.method == 'GET':
+            queryset = annotate_case_metrics(queryset)
+        return queryset
     
     def update(self, request, *args, **kwargs):
         """Override update with proper error handling"""
         try:
             partial = kwargs.pop('partial', False)
             instance = self.get_object()
+            instance._actor = request.user  # Recorded on status and assignment events
             serializer = self.get_serializer(instance, data=request.data, partial=partial)
             
             if not serializer.is_valid():
@@ -188,11 +212,10 @@ class CaseOfficersView(generics.ListAPIView):
         except (ValueError, TypeError):
             return User.objects.none()
 
-class OfficerCasesView(generics.ListAPIView):
+class OfficerCasesView(SparseFieldsetQuerysetMixin, generics.ListAPIView):
     """Get all cases assigned to a specific officer"""
     serializer_class = CaseListSerializer
     permission_classes = [permissions.IsAuthenticated]
-    pagination_class = StandardResultsSetPagination
 
     def get_queryset(self):
         officer_id = self.kwargs.get('officer_id')
@@ -200,12 +223,44 @@ class OfficerCasesView(generics.ListAPIView):
             return Case.objects.none()
         
         try:
-            return Case.objects.filter(
+            return self.defer_unrequested_fields(annotate_days_open(Case.objects.filter(
                 assigned_officers__id=int(officer_id)
-            ).prefetch_related('assigned_officers', 'related_incidents')
+            ).prefetch_related('assigned_officers', 'related_incidents')))
         except (ValueError, TypeError):
             return Case.objects.none()
 
+class OfficerWorkloadView(generics.ListAPIView):
+    """Officers with their case load, read from the workload table"""
+    serializer_class = OfficerWorkloadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['active_cases', 'open_cases', 'investigating_cases', 'high_priority_cases', 'total_cases', 'id']
+    ordering = ['active_cases']
+    
+    WORKLOAD_FIELDS = ('open_cases', 'investigating_cases', 'active_cases', 'high_priority_cases', 'total_cases')
+    
+    def get_queryset(self):
+        # One LEFT JOIN on the workload table; officers without cases count as zero
+        queryset = User.objects.filter(
+            role__in=['Police', 'Investigator'], is_active=True
+        ).annotate(**{
+            field: Coalesce(f'workload__{field}', 0) for field in self.WORKLOAD_FIELDS
+        })
+        
+        role = self.request.query_params.get('role')
+        if role:
+            queryset = queryset.filter(role=role)
+        try:
+            min_active = self.request.query_params.get('min_active')
+            max_active = self.request.query_params.get('max_active')
+            if min_active:
+                queryset = queryset.filter(active_cases__gte=int(min_active))
+            if max_active:
+                queryset = queryset.filter(active_cases__lte=int(max_active))
+        except ValueError:
+            raise ValidationError({'error': 'min_active and max_active must be integers'})
+        return queryset
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def assign_officer_to_case(request, case_id):
@@ -236,6 +291,7 @@ def assign_officer_to_case(request, case_id):
                 status=status.HTTP_200_OK
             )
         
+        case._actor = request.user
         case.assigned_officers.add(officer)
         logger.info(f"Officer {officer.username} assigned to case {case.case_id}")
         
@@ -271,6 +327,7 @@ def remove_officer_from_case(request, case_id, officer_id):
                 status=status.HTTP_200_OK
             )
         
+        case._actor = request.user
         case.assigned_officers.remove(officer)
         logger.info(f"Officer {officer.username} removed from case {case.case_id}")
         
@@ -327,6 +384,7 @@ def update_case_status(request, case_id):
         elif new_status != 'closed' and case.end_date:
             case.end_date = None
         
+        case._actor = request.user
         case.save()
         logger.info(f"Case {case.case_id} status updated from {old_status} to {new_status}")
         
@@ -340,51 +398,58 @@ def update_case_status(request, case_id):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+def _parse_moment(value):
+    """Parse an ISO date or datetime query parameter into an aware datetime"""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def case_timeline(request, case_id):
+    """Stream a case's incidents, communications and events in time order as NDJSON"""
+    case = get_object_or_404(Case, case_id=case_id)
+    
+    try:
+        since, until = (
+            _parse_moment(request.query_params[name]) if request.query_params.get(name) else None
+            for name in ('since', 'until')
+        )
+    except ValueError:
+        return Response(
+            {'error': 'since and until must be ISO dates or datetimes'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    return StreamingHttpResponse(
+        timeline.ndjson(timeline.entries(case, since, until)),
+        content_type='application/x-ndjson'
+    )
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def case_statistics(request):
     """Get case statistics"""
     try:
-        # Basic counts
-        total_cases = Case.objects.count()
-        open_cases = Case.objects.filter(status='open').count()
-        investigating_cases = Case.objects.filter(status='investigating').count()
-        closed_cases = Case.objects.filter(status='closed').count()
-        
-        # User-specific counts
-        my_cases = Case.objects.filter(assigned_officers=request.user).count()
-        my_open_cases = Case.objects.filter(
-            assigned_officers=request.user, 
-            status='open'
-        ).count()
-        my_investigating_cases = Case.objects.filter(
-            assigned_officers=request.user, 
-            status='investigating'
-        ).count()
-        
-        # Priority counts
-        high_priority = Case.objects.filter(priority='high').count()
-        medium_priority = Case.objects.filter(priority='medium').count()
-        low_priority = Case.objects.filter(priority='low').count()
+        # Global snapshot and this officer's counters, cached until cases change
+        snapshot, mine = statistics.for_officer(request.user.id)
         
         return Response({
-            'total_cases': total_cases,
-            'open_cases': open_cases,
-            'investigating_cases': investigating_cases,
-            'closed_cases': closed_cases,
-            'my_assigned_cases': my_cases,
-            'my_open_cases': my_open_cases,
-            'my_investigating_cases': my_investigating_cases,
-            'case_distribution': {
-                'open': open_cases,
-                'investigating': investigating_cases,
-                'closed': closed_cases
-            },
-            'priority_distribution': {
-                'high': high_priority,
-                'medium': medium_priority,
-                'low': low_priority
-            }
+            'total_cases': snapshot['total'],
+            'open_cases': snapshot['status']['open'],
+            'investigating_cases': snapshot['status']['investigating'],
+            'closed_cases': snapshot['status']['closed'],
+            'my_assigned_cases': mine['total'],
+            'my_open_cases': mine['open'],
+            'my_investigating_cases': mine['investigating'],
+            'case_distribution': snapshot['status'],
+            'priority_distribution': snapshot['priority']
         })
         
     except Exception as e:
@@ -410,6 +475,27 @@ def case_by_case_id(request, case_id_str):
             status=status.HTTP_404_NOT_FOUND
         )
 
+def _resolve_case_ids(case_ids):
+    """Map requested case_id strings to primary keys in one query, with per-id errors for the rest"""
+    found = dict(
+        Case.objects.filter(case_id__in=[str(case_id) for case_id in case_ids]).values_list('case_id', 'id')
+    )
+    errors = [
+        {'case_id': case_id, 'errors': 'Case not found or invalid ID'}
+        for case_id in case_ids if str(case_id) not in found
+    ]
+    return found, errors
+
+
+def _replace_assignments(through, column, case_pks, related_ids):
+    """Make ``related_ids`` the exact M2M set of every case with two set-based statements"""
+    through.objects.filter(case_id__in=case_pks).exclude(**{f'{column}__in': related_ids}).delete()
+    through.objects.bulk_create(
+        [through(case_id=case_pk, **{column: related_id}) for case_pk in case_pks for related_id in related_ids],
+        ignore_conflicts=True
+    )
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def bulk_update_cases(request):
@@ -422,33 +508,70 @@ def bulk_update_cases(request):
             {'error': 'case_ids and update_data are required'}, 
             status=status.HTTP_400_BAD_REQUEST
         )
+    if not isinstance(case_ids, list):
+        return Response(
+            {'error': 'case_ids must be a list'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if 'case_id' in update_data:
+        return Response(
+            {'error': 'case_id must be unique and cannot be bulk updated'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # The same changes apply to every case, so validate them once
+    serializer = CaseSerializer(data=update_data, partial=True)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    changes = dict(serializer.validated_data)
+    officers = changes.pop('assigned_officers', None)
+    incidents = changes.pop('related_incidents', None)
     
     try:
-        updated_count = 0
-        errors = []
-        
-        for case_id in case_ids:
-            try:
-                case = Case.objects.get(case_id=case_id)
-                serializer = CaseSerializer(case, data=update_data, partial=True)
+        with transaction.atomic():
+            found, errors = _resolve_case_ids(case_ids)
+            case_pks = list(found.values())
+            
+            if case_pks:
+                through = Case.assigned_officers.through
+                assignments = set(through.objects.filter(case_id__in=case_pks).values_list('case_id', 'user_id'))
+                affected_officers = {officer_pk for _, officer_pk in assignments}
+                events = []
                 
-                if serializer.is_valid():
-                    serializer.save()
-                    updated_count += 1
-                else:
-                    errors.append({
-                        'case_id': case_id,
-                        'errors': serializer.errors
-                    })
-                    
-            except (Case.DoesNotExist, ValueError, TypeError):
-                errors.append({
-                    'case_id': case_id,
-                    'errors': 'Case not found or invalid ID'
-                })
+                # Scalar fields: one UPDATE ... WHERE id IN (...)
+                if changes:
+                    if 'status' in changes:
+                        previous = Case.objects.filter(id__in=case_pks).exclude(status=changes['status'])
+                        events += [
+                            CaseEvent(case_id=case_pk, event_type='status_change', old_value=old_status,
+                                      new_value=changes['status'], actor=request.user)
+                            for case_pk, old_status in previous.values_list('id', 'status')
+                        ]
+                    Case.objects.filter(id__in=case_pks).update(**changes)
+                
+                # Relations: delete and bulk insert on the through tables
+                if officers is not None:
+                    officer_ids = [officer.id for officer in officers]
+                    _replace_assignments(through, 'user_id', case_pks, officer_ids)
+                    affected_officers.update(officer_ids)
+                    desired = {(case_pk, officer_pk) for case_pk in case_pks for officer_pk in officer_ids}
+                    events += CaseEvent.assignments('officer_removed', assignments - desired, request.user)
+                    events += CaseEvent.assignments('officer_assigned', desired - assignments, request.user)
+                if incidents is not None:
+                    _replace_assignments(
+                        Case.related_incidents.through, 'incident_id', case_pks,
+                        [incident.id for incident in incidents]
+                    )
+                
+                # Set-based writes send no model signals
+                CaseEvent.objects.bulk_create(events)
+                workload.refresh(affected_officers)
+                transaction.on_commit(lambda: statistics.invalidate(affected_officers))
         
+        logger.info(f"Bulk updated {len(found)} cases")
         return Response({
-            'updated_count': updated_count,
+            'updated_count': len(found),
             'errors': errors
         }, status=status.HTTP_200_OK)
         
@@ -457,4 +580,118 @@ def bulk_update_cases(request):
         return Response(
             {'error': 'Bulk update failed'}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def bulk_assign_officers(request):
+    """Assign officers to many cases, keeping their existing assignments"""
+    case_ids = request.data.get('case_ids', [])
+    officer_ids = request.data.get('officer_ids', [])
+    
+    if not case_ids or not officer_ids:
+        return Response(
+            {'error': 'case_ids and officer_ids are required'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not isinstance(case_ids, list):
+        return Response(
+            {'error': 'case_ids must be a list'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        officer_ids = {int(officer_id) for officer_id in officer_ids}
+    except (ValueError, TypeError):
+        return Response(
+            {'error': 'Invalid officer ID'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    known_officers = set(User.objects.filter(id__in=officer_ids).values_list('id', flat=True))
+    if known_officers != officer_ids:
+        return Response(
+            {'error': f'Officers not found: {sorted(officer_ids - known_officers)}'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        with transaction.atomic():
+            found, errors = _resolve_case_ids(case_ids)
+            through = Case.assigned_officers.through
+            existing = set(
+                through.objects.filter(case_id__in=found.values(), user_id__in=officer_ids).values_list('case_id', 'user_id')
+            )
+            added = {(case_pk, officer_id) for case_pk in found.values() for officer_id in officer_ids} - existing
+            through.objects.bulk_create(
+                [through(case_id=case_pk, user_id=officer_id) for case_pk, officer_id in added],
+                ignore_conflicts=True
+            )
+            CaseEvent.objects.bulk_create(CaseEvent.assignments('officer_assigned', added, request.user))
+            workload.refresh(officer_ids)
+            transaction.on_commit(lambda: statistics.invalidate(officer_ids, snapshot=False))
+        
+        logger.info(f"Assigned officers {sorted(officer_ids)} to {len(found)} cases")
+        return Response({
+            'updated_count': len(found),
+            'errors': errors
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        logger.error(f"Error in bulk officer assignment: {str(e)}")
+        return Response(
+            {'error': 'Bulk assignment failed'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def auto_assign_cases(request):
+    """Assign officers to a batch of cases, least loaded officers first"""
+    case_ids = request.data.get('case_ids', [])
+    role = request.data.get('role')
+    
+    if not case_ids or not isinstance(case_ids, list):
+        return Response(
+            {'error': 'case_ids must be a non-empty list'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if role and role not in assignment.ROLES:
+        return Response(
+            {'error': f'role must be one of {list(assignment.ROLES)}'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        officers_per_case = int(request.data.get('officers_per_case', 1))
+    except (ValueError, TypeError):
+        officers_per_case = 0
+    if officers_per_case < 1:
+        return Response(
+            {'error': 'officers_per_case must be a positive integer'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        found, errors = _resolve_case_ids(case_ids)
+        assignments = assignment.auto_assign(
+            found.values(), officers_per_case, roles=[role] if role else assignment.ROLES, actor=request.user
+        )
+        
+        case_ids_by_pk = {case_pk: case_id for case_id, case_pk in found.items()}
+        assigned = {case_id: [] for case_id in found}
+        for case_pk, officer_id in assignments:
+            assigned[case_ids_by_pk[case_pk]].append(officer_id)
+        
+        logger.info(f"Auto-assigned {len(assignments)} officer slots across {len(found)} cases")
+        return Response({
+            'assignments': assigned,
+            'assigned_count': len(assignments),
+            'errors': errors
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        logger.error(f"Error in automatic officer assignment: {str(e)}")
+        return Response(
+            {'error': 'Automatic assignment failed'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
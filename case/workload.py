@@ -0,0 +1,62 @@
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import Case, OfficerWorkload
+
+ACTIVE_STATUSES = ('open', 'investigating')
+
+
+def _counts(officer_ids=None):
+    """Per-officer case counts from one grouped query over the assignment table"""
+    assignments = Case.assigned_officers.through.objects.all()
+    if officer_ids is not None:
+        assignments = assignments.filter(user_id__in=officer_ids)
+    active = Q(case__status__in=ACTIVE_STATUSES)
+    return assignments.values('user_id').annotate(
+        total=Count('case_id'),
+        open=Count('case_id', filter=Q(case__status='open')),
+        investigating=Count('case_id', filter=Q(case__status='investigating')),
+        high_priority=Count('case_id', filter=active & Q(case__priority='high')),
+    ).order_by()
+
+
+def _rows(counts, officer_ids=()):
+    rows = {
+        officer_id: OfficerWorkload(officer_id=officer_id)
+        for officer_id in officer_ids
+    }
+    for row in counts:
+        rows[row['user_id']] = OfficerWorkload(
+            officer_id=row['user_id'],
+            open_cases=row['open'],
+            investigating_cases=row['investigating'],
+            active_cases=row['open'] + row['investigating'],
+            high_priority_cases=row['high_priority'],
+            total_cases=row['total'],
+        )
+    return list(rows.values())
+
+
+def refresh(officer_ids):
+    """Recompute the workload rows of the given officers"""
+    officer_ids = set(officer_ids)
+    if not officer_ids:
+        return
+    OfficerWorkload.objects.bulk_create(
+        _rows(_counts(officer_ids), officer_ids),
+        update_conflicts=True,
+        unique_fields=['officer'],
+        update_fields=[
+            'open_cases', 'investigating_cases', 'active_cases',
+            'high_priority_cases', 'total_cases', 'updated_at',
+        ],
+    )
+
+
+def rebuild(batch_size=1000):
+    """Replace every workload row from the assignment table; returns the number of rows"""
+    rows = _rows(_counts())
+    with transaction.atomic():
+        OfficerWorkload.objects.all().delete()
+        OfficerWorkload.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
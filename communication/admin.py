@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CommunicationLog
+from .models import CommunicationLog, ConversationUnreadCounter, UserUnreadCounter
 from case.models import Case
 
 @admin.register(Case)
@@ -47,3 +47,15 @@ class CommunicationLogAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related(
             'sender', 'receiver', 'related_case'
         )
+
+
+@admin.register(UserUnreadCounter)
+class UserUnreadCounterAdmin(admin.ModelAdmin):
+    list_display = ['user', 'count']
+    raw_id_fields = ['user']
+
+
+@admin.register(ConversationUnreadCounter)
+class ConversationUnreadCounterAdmin(admin.ModelAdmin):
+    list_display = ['user', 'partner', 'count']
+    raw_id_fields = ['user', 'partner']
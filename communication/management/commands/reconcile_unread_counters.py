@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from communication import unread_counters
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-user and per-conversation unread counters from the messages"
+
+    def handle(self, *args, **options):
+        drifted = unread_counters.reconcile()
+        self.stdout.write(self.style.SUCCESS(f"Reconciled unread counters ({drifted} had drifted)"))
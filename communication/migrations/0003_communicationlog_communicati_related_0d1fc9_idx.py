@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('case', '0006_caseevent'),
+        ('communication', '0002_alter_communicationlog_related_case_delete_case'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='communicationlog',
+            index=models.Index(fields=['related_case', 'timestamp'], name='communicati_related_0d1fc9_idx'),
+        ),
+    ]
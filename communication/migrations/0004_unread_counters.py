@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    CommunicationLog = apps.get_model('communication', 'CommunicationLog')
+    UserUnreadCounter = apps.get_model('communication', 'UserUnreadCounter')
+    ConversationUnreadCounter = apps.get_model('communication', 'ConversationUnreadCounter')
+    rows = CommunicationLog.objects.filter(is_read=False).values(
+        'receiver_id', 'sender_id'
+    ).annotate(count=Count('id')).order_by()
+
+    totals = {}
+    conversations = []
+    for row in rows:
+        totals[row['receiver_id']] = totals.get(row['receiver_id'], 0) + row['count']
+        conversations.append(ConversationUnreadCounter(
+            user_id=row['receiver_id'], partner_id=row['sender_id'], count=row['count']
+        ))
+    ConversationUnreadCounter.objects.bulk_create(conversations, batch_size=1000)
+    UserUnreadCounter.objects.bulk_create(
+        [UserUnreadCounter(user_id=user_id, count=count) for user_id, count in totals.items()],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authapi', '0004_user_status'),
+        ('case', '0007_officerworkload'),
+        ('communication', '0003_communicationlog_communicati_related_0d1fc9_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationUnreadCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserUnreadCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='unread_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='communicationlog',
+            index=models.Index(fields=['receiver', 'is_read'], name='communicati_receive_e31f58_idx'),
+        ),
+        migrations.AddField(
+            model_name='conversationunreadcounter',
+            name='partner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='conversationunreadcounter',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='conversationunreadcounter',
+            constraint=models.UniqueConstraint(fields=('user', 'partner'), name='unique_conversation_unread_counter'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -64,7 +64,9 @@ class CommunicationLog(models.Model):
             models.Index(fields=['sender', 'timestamp']),
             models.Index(fields=['receiver', 'timestamp']),
             models.Index(fields=['related_case']),
+            models.Index(fields=['related_case', 'timestamp']),
             models.Index(fields=['is_read']),
+            models.Index(fields=['receiver', 'is_read']),
             models.Index(fields=['priority']),
         ]
 
@@ -82,6 +84,33 @@ class CommunicationLog(models.Model):
     def mark_as_read(self):
         """Mark message as read and set read timestamp"""
         from django.utils import timezone
+        from . import unread_counters
         self.is_read = True
         self.read_at = timezone.now()
-        self.save(update_fields=['is_read', 'read_at'])
\ No newline at end of file
+        unread_counters.mark_read(CommunicationLog.objects.filter(pk=self.pk), self.read_at)
+
+
+class UserUnreadCounter(models.Model):
+    """Unread messages of a user, kept current on message create and read"""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='unread_counter'
+    )
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.count} unread"
+
+
+class ConversationUnreadCounter(models.Model):
+    """Unread messages a user has from one partner"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    partner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'partner'], name='unique_conversation_unread_counter'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} <- {self.partner_id}: {self.count} unread"
\ No newline at end of file
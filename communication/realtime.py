@@ -0,0 +1,117 @@
+"""
+Push delivery of new messages and unread counts.
+
+Events go through a broker chosen by ``settings.COMMUNICATION_BROKER``. A
+broker implements ``publish(user_id, event)`` and ``has_subscribers(user_id)``,
+callable from any thread, and ``subscribe(user_id)``, called on the event
+loop, which returns a subscription with ``async get(timeout)`` (the next
+event, or None when the timeout passes) and ``close()``. The in-process broker
+only reaches clients connected to the same worker; multi-worker deployments
+plug in a shared backend with the same interface.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from . import unread_counters
+
+DEFAULT_BROKER = 'communication.realtime.InProcessBroker'
+
+# Events buffered per connection; a client that falls further behind loses the oldest
+QUEUE_SIZE = 100
+
+
+class Subscription:
+    def __init__(self, broker, user_id):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def offer(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Fan events out to the subscriptions held by this process"""
+
+    def __init__(self):
+        self.subscriptions = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        subscription = Subscription(self, user_id)
+        with self.lock:
+            self.subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscriptions[subscription.user_id]
+
+    def has_subscribers(self, user_id):
+        with self.lock:
+            return bool(self.subscriptions.get(user_id))
+
+    def publish(self, user_id, event):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            # Queues belong to their event loop; hand the event over from this thread
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # The loop has closed; the connection is gone
+                self.unsubscribe(subscription)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(getattr(settings, 'COMMUNICATION_BROKER', DEFAULT_BROKER))()
+
+
+def has_subscribers(user_id):
+    return get_broker().has_subscribers(user_id)
+
+
+def publish(user_id, event_type, data):
+    get_broker().publish(user_id, {'event': event_type, 'data': data})
+
+
+def publish_unread_counts(user_ids):
+    """Push fresh unread counts once the current transaction commits"""
+    user_ids = set(user_ids)
+
+    def send():
+        for user_id, count in unread_counters.totals(user_ids).items():
+            publish(user_id, 'unread_count', {'unread_count': count})
+
+    if user_ids:
+        transaction.on_commit(send)
+
+
+def format_event(event_type, data):
+    """Encode one Server-Sent Events frame"""
+    return f"event: {event_type}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
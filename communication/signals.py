@@ -0,0 +1,62 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import realtime, unread_counters
+from .models import CommunicationLog
+from .serializers import CommunicationLogSerializer
+
+
+# Values the unread counters are keyed on
+COUNTED_FIELDS = ('is_read', 'receiver_id', 'sender_id')
+
+
+@receiver(pre_save, sender=CommunicationLog)
+def remember_counted_values(sender, instance, update_fields=None, **kwargs):
+    # Updates can move a message in or out of the unread counters, or between them
+    instance._counted_before = None
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & {'is_read', 'receiver', 'receiver_id', 'sender', 'sender_id'}:
+        return
+    instance._counted_before = sender.objects.filter(pk=instance.pk).values_list(*COUNTED_FIELDS).first()
+
+
+@receiver(post_save, sender=CommunicationLog)
+def update_unread_counters(sender, instance, created, **kwargs):
+    before = getattr(instance, '_counted_before', None)
+    after = tuple(getattr(instance, field) for field in COUNTED_FIELDS)
+    if created or before is None or before == after:
+        return
+
+    pairs = Counter()
+    for (is_read, receiver_id, sender_id), amount in ((before, -1), (after, 1)):
+        if not is_read:
+            pairs[(receiver_id, sender_id)] += amount
+    unread_counters.adjust(Counter({pair: amount for pair, amount in pairs.items() if amount}))
+    realtime.publish_unread_counts({before[1], after[1]})
+
+
+@receiver(post_save, sender=CommunicationLog)
+def push_new_message(sender, instance, created, **kwargs):
+    if not created:
+        return
+    if not instance.is_read:
+        unread_counters.adjust(Counter({(instance.receiver_id, instance.sender_id): 1}))
+
+    def send():
+        # Serialising costs queries; skip it when nobody is listening
+        if realtime.has_subscribers(instance.receiver_id):
+            realtime.publish(instance.receiver_id, 'message', CommunicationLogSerializer(instance).data)
+
+    transaction.on_commit(send)
+    realtime.publish_unread_counts([instance.receiver_id])
+
+
+@receiver(post_delete, sender=CommunicationLog)
+def forget_unread_message(sender, instance, **kwargs):
+    if not instance.is_read:
+        unread_counters.adjust(Counter({(instance.receiver_id, instance.sender_id): 1}), sign=-1)
+        realtime.publish_unread_counts([instance.receiver_id])
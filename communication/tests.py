@@ -1,3 +1,246 @@
-from django.test import TestCase
+import json
+import threading
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import connection
+from django.test import AsyncClient, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authapi.models import User
+from . import realtime, unread_counters
+from .models import CommunicationLog, ConversationUnreadCounter, UserUnreadCounter
+from .views import CommunicationLogViewSet
+
+
+class ConversationListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user', email='user@example.com', password='secret', role='Police')
+        cls.partners = [
+            User.objects.create_user(
+                username=f'partner{i}', email=f'partner{i}@example.com', password='secret', role='Police'
+            )
+            for i in range(3)
+        ]
+        for sender, receiver, is_read in [
+            (cls.partners[0], cls.user, False),
+            (cls.partners[0], cls.user, False),
+            (cls.user, cls.partners[0], False),
+            (cls.partners[1], cls.user, True),
+            (cls.partners[2], cls.user, False),
+            (cls.user, cls.partners[1], False),
+        ]:
+            CommunicationLog.objects.create(
+                sender=sender, receiver=receiver, message_content='Status update', is_read=is_read
+            )
+
+    def test_single_query(self):
+        request = APIRequestFactory().get('/api/communications/conversations/')
+        force_authenticate(request, user=self.user)
+        view = CommunicationLogViewSet.as_view({'get': 'conversations'})
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request)
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+
+        conversations = [
+            (conversation['participant']['username'], conversation['unread_count'], conversation['last_message']['id'])
+            for conversation in response.data
+        ]
+        last = {
+            partner.username: CommunicationLog.objects.filter(
+                sender__in=[self.user, partner], receiver__in=[self.user, partner]
+            ).order_by('-timestamp', '-id').values_list('id', flat=True).first()
+            for partner in self.partners
+        }
+        self.assertEqual(conversations, [
+            ('partner1', 0, last['partner1']),
+            ('partner2', 1, last['partner2']),
+            ('partner0', 2, last['partner0']),
+        ])
+
+
+class MarkReadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user', email='user@example.com', password='secret', role='Police')
+        cls.other = User.objects.create_user(username='other', email='other@example.com', password='secret', role='Police')
+        cls.third = User.objects.create_user(username='third', email='third@example.com', password='secret', role='Police')
+        for sender in [cls.other, cls.other, cls.third]:
+            CommunicationLog.objects.create(sender=sender, receiver=cls.user, message_content='Status update')
+        CommunicationLog.objects.create(sender=cls.user, receiver=cls.other, message_content='Status update')
+
+    def post(self, action, data):
+        request = APIRequestFactory().post(f'/api/communications/{action}/', data, format='json')
+        force_authenticate(request, user=self.user)
+        return CommunicationLogViewSet.as_view({'post': action})(request)
+
+    def test_mark_multiple_read_single_update(self):
+        ids = list(CommunicationLog.objects.filter(receiver=self.user).values_list('id', flat=True))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post('mark_multiple_read', {'message_ids': ids})
+        self.assertEqual(response.data['updated_count'], 3)
+        self.assertEqual(sum(
+            query['sql'].startswith('UPDATE "communication_communicationlog"') for query in queries.captured_queries
+        ), 1)
+        self.assertFalse(CommunicationLog.objects.filter(receiver=self.user, read_at__isnull=True).exists())
+
+        self.assertEqual(self.post('mark_multiple_read', {'message_ids': ids}).data['updated_count'], 0)
+
+    def test_mark_all_read(self):
+        response = self.post('mark_all_read', {'with_user': self.other.id})
+        self.assertEqual(response.data['updated_count'], 2)
+        self.assertEqual(CommunicationLog.objects.filter(is_read=False).count(), 2)
+
+        self.assertEqual(self.post('mark_all_read', {}).data['updated_count'], 1)
+        # Messages the user sent stay unread for their receiver
+        self.assertFalse(CommunicationLog.objects.get(sender=self.user).is_read)
+        self.assertEqual(self.post('mark_all_read', {'case': 'x'}).status_code, 400)
+        self.assertEqual(self.post('mark_all_read', [self.other.id]).status_code, 400)
+
+
+class MessageStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user', email='user@example.com', password='secret', role='Police')
+        cls.other = User.objects.create_user(username='other', email='other@example.com', password='secret', role='Police')
+        CommunicationLog.objects.create(sender=cls.other, receiver=cls.user, message_content='Status update')
+
+    def test_broker_delivers_across_threads(self):
+        broker = realtime.InProcessBroker()
+
+        async def receive():
+            subscription = broker.subscribe(7)
+            thread = threading.Thread(target=broker.publish, args=(7, {'event': 'ping', 'data': {}}))
+            thread.start()
+            event = await subscription.get(timeout=1)
+            thread.join()
+            subscription.close()
+            return event
+
+        self.assertEqual(async_to_sync(receive)(), {'event': 'ping', 'data': {}})
+        self.assertEqual(broker.subscriptions, {})
+
+    def test_requires_token(self):
+        response = self.client.get('/api/communications/stream/', {'token': 'invalid'})
+        self.assertEqual(response.status_code, 401)
+
+    def test_streams_unread_count_and_new_messages(self):
+        token = str(AccessToken.for_user(self.user))
+
+        def send():
+            with self.captureOnCommitCallbacks(execute=True):
+                CommunicationLog.objects.create(sender=self.other, receiver=self.user, message_content='Second update')
+
+        async def stream():
+            response = await AsyncClient().get('/api/communications/stream/', {'token': token})
+            content = response.streaming_content
+            first = await anext(content)
+            await sync_to_async(send)()
+            events = [await anext(content), await anext(content)]
+            await content.aclose()
+            return response, first, events
+
+        response, first, events = async_to_sync(stream)()
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(first, b'event: unread_count\ndata: {"unread_count": 1}\n\n')
+        message, count = events
+        self.assertTrue(message.startswith(b'event: message\n'))
+        self.assertEqual(json.loads(message.split(b'data: ', 1)[1])['message_content'], 'Second update')
+        self.assertEqual(count, b'event: unread_count\ndata: {"unread_count": 2}\n\n')
+
+    def test_message_not_serialised_without_subscriber(self):
+        self.assertFalse(realtime.has_subscribers(self.user.id))
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                CommunicationLog.objects.create(sender_id=self.other.id, receiver_id=self.user.id, message_content='Unheard')
+
+        # The serializer would have to load the sender and receiver
+        self.assertFalse([query for query in queries if '"authapi_user"' in query['sql']])
+
+
+class UnreadCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user', email='user@example.com', password='secret', role='Police')
+        cls.other = User.objects.create_user(username='other', email='other@example.com', password='secret', role='Police')
+        cls.third = User.objects.create_user(username='third', email='third@example.com', password='secret', role='Police')
+        for sender in [cls.other, cls.other, cls.third]:
+            CommunicationLog.objects.create(sender=sender, receiver=cls.user, message_content='Status update')
+
+    def get(self, action, params=None):
+        request = APIRequestFactory().get(f'/api/communications/{action}/', params or {})
+        force_authenticate(request, user=self.user)
+        return CommunicationLogViewSet.as_view({'get': action})(request)
+
+    def counters(self):
+        return unread_counters.total(self.user.id), unread_counters.from_partner(self.user.id, self.other.id)
+
+    def test_maintained_on_create_read_and_delete(self):
+        self.assertEqual(self.counters(), (3, 2))
+
+        CommunicationLog.objects.filter(sender=self.other).first().mark_as_read()
+        self.assertEqual(self.counters(), (2, 1))
+
+        CommunicationLog.objects.filter(sender=self.third).delete()
+        self.assertEqual(self.counters(), (1, 1))
+
+        # Reading an already read message changes nothing
+        CommunicationLog.objects.filter(is_read=True).first().mark_as_read()
+        self.assertEqual(self.counters(), (1, 1))
+
+    def patch(self, message, data):
+        request = APIRequestFactory().patch(f'/api/communications/{message.pk}/', data, format='json')
+        force_authenticate(request, user=self.user)
+        response = CommunicationLogViewSet.as_view({'patch': 'partial_update'})(request, pk=message.pk)
+        self.assertEqual(response.status_code, 200)
+
+    def test_maintained_on_patch(self):
+        message = CommunicationLog.objects.filter(sender=self.other).first()
+        self.patch(message, {'is_read': True})
+        self.assertEqual(self.counters(), (2, 1))
+        self.patch(message, {'is_read': True, 'subject': 'Seen'})
+        self.assertEqual(self.counters(), (2, 1))
+        self.patch(message, {'is_read': False})
+        self.assertEqual(self.counters(), (3, 2))
+
+        # Readdressing an unread message moves it to the new receiver's counters
+        self.patch(message, {'receiver': self.third.id})
+        self.assertEqual(self.counters(), (2, 1))
+        self.assertEqual(unread_counters.from_partner(self.third.id, self.other.id), 1)
+        self.assertEqual(unread_counters.reconcile(), 0)
+
+    def test_unrelated_update_skips_lookup(self):
+        message = CommunicationLog.objects.filter(sender=self.other).first()
+        message.subject = 'Updated'
+        with CaptureQueriesContext(connection) as queries:
+            message.save(update_fields=['subject'])
+        self.assertEqual(len(queries), 1)
+
+    def test_badge_counts_read_the_counters(self):
+        self.assertEqual(self.get('unread').data['count'], 3)
+        self.assertEqual(self.get('unread', {'with_user': self.other.id}).data['count'], 2)
+        self.assertEqual(self.get('statistics').data['unread_count'], 3)
+
+        unread = CommunicationLog.objects.filter(receiver=self.user, is_read=False)
+        with CaptureQueriesContext(connection) as queries:
+            self.get('statistics')
+        self.assertFalse(any(
+            'COUNT' in query['sql'] and '"is_read"' in query['sql'] for query in queries.captured_queries
+        ))
+        self.assertEqual(unread.count(), 3)
+
+        conversations = {row['participant']['username']: row['unread_count'] for row in self.get('conversations').data}
+        self.assertEqual(conversations, {'other': 2, 'third': 1})
+
+    def test_reconcile_fixes_drift(self):
+        UserUnreadCounter.objects.filter(user=self.user).update(count=40)
+        ConversationUnreadCounter.objects.filter(user=self.user, partner=self.third).delete()
+        self.assertEqual(unread_counters.reconcile(), 2)
+        self.assertEqual(unread_counters.total(self.user.id), 3)
+        self.assertEqual(unread_counters.from_partner(self.user.id, self.third.id), 1)
+        self.assertEqual(unread_counters.reconcile(), 0)
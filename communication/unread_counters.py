@@ -0,0 +1,105 @@
+"""
+Denormalized unread counters.
+
+Every unread message counts once in its receiver's UserUnreadCounter and
+once in the receiver's ConversationUnreadCounter for the sender. Creating a
+message adds to both, deleting it subtracts, and saves that change its
+is_read, receiver or sender move it (see signals.py). Marking messages read
+goes through ``mark_read``, which subtracts exactly the rows it changed.
+QuerySet.update() and raw SQL bypass all of this; ``reconcile`` rebuilds
+both tables from the messages when they drift.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from .models import CommunicationLog, ConversationUnreadCounter, UserUnreadCounter
+
+
+def _add(model, amount, **lookup):
+    if model.objects.filter(**lookup).update(count=Greatest(F('count') + amount, 0)) or amount <= 0:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(count=amount, **lookup)
+    except IntegrityError:
+        # Created concurrently since the UPDATE
+        model.objects.filter(**lookup).update(count=F('count') + amount)
+
+
+def adjust(pairs, sign=1):
+    """Apply a Counter of (receiver id, sender id) -> messages to both counter tables"""
+    totals = Counter()
+    for (receiver_id, sender_id), amount in pairs.items():
+        _add(ConversationUnreadCounter, sign * amount, user_id=receiver_id, partner_id=sender_id)
+        totals[receiver_id] += amount
+    for receiver_id, amount in totals.items():
+        _add(UserUnreadCounter, sign * amount, user_id=receiver_id)
+
+
+def mark_read(messages, read_at, limit=None):
+    """Mark the unread messages of a queryset read, lowering the counters by what changed"""
+    with transaction.atomic():
+        rows = messages.filter(is_read=False).order_by().select_for_update()
+        if limit is not None:
+            rows = rows[:limit]
+        rows = list(rows.values_list('id', 'receiver_id', 'sender_id'))
+        if rows:
+            CommunicationLog.objects.filter(id__in=[row[0] for row in rows]).update(is_read=True, read_at=read_at)
+            adjust(Counter((receiver_id, sender_id) for _, receiver_id, sender_id in rows), sign=-1)
+    return len(rows)
+
+
+def total(user_id):
+    return UserUnreadCounter.objects.filter(user_id=user_id).values_list('count', flat=True).first() or 0
+
+
+def totals(user_ids):
+    counts = dict.fromkeys(user_ids, 0)
+    counts.update(UserUnreadCounter.objects.filter(user_id__in=user_ids).values_list('user_id', 'count'))
+    return counts
+
+
+def from_partner(user_id, partner_id):
+    return ConversationUnreadCounter.objects.filter(
+        user_id=user_id, partner_id=partner_id
+    ).values_list('count', flat=True).first() or 0
+
+
+def reconcile():
+    """Rebuild both counter tables from the messages; returns the number of rows that had drifted"""
+    with transaction.atomic():
+        pairs = {
+            (row['receiver_id'], row['sender_id']): row['count']
+            for row in CommunicationLog.objects.filter(is_read=False)
+            .values('receiver_id', 'sender_id').annotate(count=Count('id')).order_by()
+        }
+        users = Counter()
+        for (receiver_id, _), count in pairs.items():
+            users[receiver_id] += count
+
+        current_pairs = {
+            (user_id, partner_id): count
+            for user_id, partner_id, count in ConversationUnreadCounter.objects.values_list('user_id', 'partner_id', 'count')
+        }
+        current_users = dict(UserUnreadCounter.objects.values_list('user_id', 'count'))
+        drifted = sum(
+            current_pairs.get(key, 0) != pairs.get(key, 0) for key in current_pairs.keys() | pairs.keys()
+        ) + sum(
+            current_users.get(key, 0) != users.get(key, 0) for key in current_users.keys() | users.keys()
+        )
+
+        ConversationUnreadCounter.objects.all().delete()
+        UserUnreadCounter.objects.all().delete()
+        ConversationUnreadCounter.objects.bulk_create(
+            [ConversationUnreadCounter(user_id=user_id, partner_id=partner_id, count=count)
+             for (user_id, partner_id), count in pairs.items()],
+            batch_size=1000
+        )
+        UserUnreadCounter.objects.bulk_create(
+            [UserUnreadCounter(user_id=user_id, count=count) for user_id, count in users.items()],
+            batch_size=1000
+        )
+    return drifted
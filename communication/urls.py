@@ -6,5 +6,7 @@ router = DefaultRouter()
 router.register(r'communications', views.CommunicationLogViewSet)
 
 urlpatterns = [
+    # Before the router, whose detail route would capture it
+    path('communications/stream/', views.message_stream, name='communication-stream'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -2,10 +2,16 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q, Count, Case as DjangoCase, When, Value, IntegerField
+from django.db.models import Q, Count, F, OuterRef, Subquery, Window, Case as DjangoCase, When, Value, IntegerField
+from django.db.models.functions import Coalesce, RowNumber
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from .models import CommunicationLog, Case
+from django.http import JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from .models import CommunicationLog, ConversationUnreadCounter, Case
+from . import realtime, unread_counters
 from .serializers import (
     CommunicationLogSerializer, 
     CommunicationLogCreateSerializer,
@@ -18,10 +24,17 @@ import logging
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+# Messages updated per statement by mark_all_read
+MARK_READ_BATCH_SIZE = 5000
+
+# Seconds between keepalive comments on idle event streams
+STREAM_KEEPALIVE = 15
+
 
 class CommunicationLogViewSet(viewsets.ModelViewSet):
     queryset = CommunicationLog.objects.select_related('sender', 'receiver', 'related_case').all()
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('-timestamp',)
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -107,6 +120,20 @@ class CommunicationLogViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(received_messages, many=True)
         return Response(serializer.data)
     
+    def _unread_count(self, request, unread_messages):
+        """Read the unread counters for the inbox or one conversation; other filters count in SQL"""
+        params = request.query_params
+        if any(params.get(name) for name in ('case', 'message_type', 'priority', 'is_read')):
+            return unread_messages.count()
+        
+        with_user = params.get('with_user')
+        if with_user:
+            try:
+                return unread_counters.from_partner(request.user.id, int(with_user))
+            except (ValueError, TypeError):
+                return 0
+        return unread_counters.total(request.user.id)
+    
     @action(detail=False, methods=['get'])
     def unread(self, request):
         """Get unread messages for current user"""
@@ -114,9 +141,20 @@ class CommunicationLogViewSet(viewsets.ModelViewSet):
             receiver=request.user, 
             is_read=False
         )
-        serializer = self.get_serializer(unread_messages, many=True)
+        unread_count = self._unread_count(request, unread_messages)
+        page = self.paginate_queryset(unread_messages)
+        if page is None:
+            serializer = self.get_serializer(unread_messages, many=True)
+            return Response({
+                'count': unread_count,
+                'messages': serializer.data
+            })
+        
+        serializer = self.get_serializer(page, many=True)
         return Response({
-            'count': unread_messages.count(),
+            'count': unread_count,
+            'next': self.paginator.get_next_link(),
+            'previous': self.paginator.get_previous_link(),
             'messages': serializer.data
         })
     
@@ -134,6 +172,7 @@ class CommunicationLogViewSet(viewsets.ModelViewSet):
         
         if not message.is_read:
             message.mark_as_read()
+            realtime.publish_unread_counts([request.user.id])
             return Response({'message': 'Message marked as read.'})
         
         return Response({'message': 'Message was already read.'})
@@ -145,17 +184,52 @@ class CommunicationLogViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         
         message_ids = serializer.validated_data['message_ids']
-        messages = self.get_queryset().filter(
-            id__in=message_ids,
-            receiver=request.user,
-            is_read=False
+        
+        # One locked read of the selection and one UPDATE, keeping the unread counters exact
+        updated_count = unread_counters.mark_read(
+            CommunicationLog.objects.filter(id__in=message_ids, receiver=request.user),
+            timezone.now()
         )
+        if updated_count:
+            realtime.publish_unread_counts([request.user.id])
         
+        return Response({
+            'message': f'{updated_count} message(s) marked as read.',
+            'updated_count': updated_count
+        })
+    
+    @action(detail=False, methods=['post'])
+    def mark_all_read(self, request):
+        """Mark every unread message as read, optionally only from one user or about one case"""
+        if not isinstance(request.data, dict):
+            return Response({'error': 'Expected a JSON object.'}, status=status.HTTP_400_BAD_REQUEST)
+        unread_messages = CommunicationLog.objects.filter(receiver=request.user, is_read=False)
+        
+        with_user = request.data.get('with_user') or request.query_params.get('with_user')
+        case_id = request.data.get('case') or request.query_params.get('case')
+        try:
+            if with_user:
+                unread_messages = unread_messages.filter(sender_id=int(with_user))
+            if case_id:
+                unread_messages = unread_messages.filter(related_case_id=int(case_id))
+        except (ValueError, TypeError):
+            return Response(
+                {'error': 'with_user and case must be integer IDs.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Batches keep each UPDATE's row locks short on very large inboxes
+        read_at = timezone.now()
         updated_count = 0
-        for message in messages:
-            message.mark_as_read()
-            updated_count += 1
+        while True:
+            batch_count = unread_counters.mark_read(unread_messages, read_at, limit=MARK_READ_BATCH_SIZE)
+            if not batch_count:
+                break
+            updated_count += batch_count
         
+        if updated_count:
+            realtime.publish_unread_counts([request.user.id])
+        logger.info(f"User {request.user.id} marked {updated_count} message(s) as read")
         return Response({
             'message': f'{updated_count} message(s) marked as read.',
             'updated_count': updated_count
@@ -166,44 +240,33 @@ class CommunicationLogViewSet(viewsets.ModelViewSet):
         """Get conversation threads with other users"""
         user = request.user
         
-        # Get all users who have communicated with current user
-        conversations = []
-        
-        # Find all unique conversation partners
-        partners_sent = User.objects.filter(
-            received_logs__sender=user
-        ).distinct()
+        # The other side of each message, so both directions fall into one thread
+        partner = DjangoCase(When(sender=user, then=F('receiver_id')), default=F('sender_id'))
+        unread_count = ConversationUnreadCounter.objects.filter(
+            user=user, partner_id=OuterRef('partner_id')
+        ).values('count')[:1]
         
-        partners_received = User.objects.filter(
-            sent_logs__receiver=user
-        ).distinct()
-        
-        all_partners = (partners_sent | partners_received).distinct()
-        
-        for partner in all_partners:
-            # Get last message in conversation
-            last_message = CommunicationLog.objects.filter(
-                (Q(sender=user) & Q(receiver=partner)) |
-                (Q(sender=partner) & Q(receiver=user))
-            ).order_by('-timestamp').first()
-            
-            # Count unread messages from this partner
-            unread_count = CommunicationLog.objects.filter(
-                sender=partner,
-                receiver=user,
-                is_read=False
-            ).count()
-            
-            if last_message:
-                conversations.append({
-                    'participant': partner,
-                    'last_message': last_message,
-                    'unread_count': unread_count,
-                    'last_activity': last_message.timestamp
-                })
+        # One query: rank messages per partner, keep the newest with its conversation's unread counter
+        latest_messages = CommunicationLog.objects.filter(
+            Q(sender=user) | Q(receiver=user)
+        ).annotate(partner_id=partner).annotate(
+            position=Window(
+                RowNumber(), partition_by=[F('partner_id')], order_by=[F('timestamp').desc(), F('id').desc()]
+            ),
+            unread_count=Coalesce(Subquery(unread_count), 0),
+        ).filter(position=1).select_related(
+            'sender', 'receiver', 'related_case'
+        ).order_by('-timestamp', '-id')
         
-        # Sort by last activity
-        conversations.sort(key=lambda x: x['last_activity'], reverse=True)
+        conversations = [
+            {
+                'participant': message.receiver if message.sender_id == user.id else message.sender,
+                'last_message': message,
+                'unread_count': message.unread_count,
+                'last_activity': message.timestamp
+            }
+            for message in latest_messages
+        ]
         
         serializer = ConversationSerializer(conversations, many=True)
         return Response(serializer.data)
@@ -215,10 +278,7 @@ class CommunicationLogViewSet(viewsets.ModelViewSet):
         
         total_sent = CommunicationLog.objects.filter(sender=user).count()
         total_received = CommunicationLog.objects.filter(receiver=user).count()
-        unread_count = CommunicationLog.objects.filter(
-            receiver=user, 
-            is_read=False
-        ).count()
+        unread_count = unread_counters.total(user.id)
         
         # Priority breakdown for received messages
         priority_stats = CommunicationLog.objects.filter(
@@ -254,4 +314,50 @@ class CommunicationLogViewSet(viewsets.ModelViewSet):
             )
         
         serializer = UserBasicSerializer(users, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+
+def _stream_user(request):
+    """Authenticate a stream by its Authorization header, or ?token= since EventSource cannot set headers"""
+    authentication = JWTAuthentication()
+    try:
+        result = authentication.authenticate(request)
+        if result is None and request.GET.get('token'):
+            token = authentication.get_validated_token(request.GET['token'])
+            result = (authentication.get_user(token), token)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return result[0] if result else None
+
+
+async def message_stream(request):
+    """
+    Server-Sent Events feed of the current user's new messages and unread count.
+
+    Sends the unread count on connect, then ``message`` and ``unread_count``
+    events as they happen, so clients no longer poll ``unread``. Needs an
+    ASGI server to hold many connections open.
+    """
+    user = await sync_to_async(_stream_user)(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication credentials were not provided or are invalid.'}, status=401)
+    
+    async def events():
+        # Subscribe before reading the count so no change falls between the two
+        subscription = realtime.get_broker().subscribe(user.id)
+        try:
+            count = await sync_to_async(unread_counters.total)(user.id)
+            yield realtime.format_event('unread_count', {'unread_count': count})
+            while True:
+                event = await subscription.get(STREAM_KEEPALIVE)
+                if event is None:
+                    yield ': keepalive\n\n'
+                else:
+                    yield realtime.format_event(event['event'], event['data'])
+        finally:
+            subscription.close()
+    
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
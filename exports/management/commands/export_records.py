@@ -0,0 +1,56 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from exports import writers
+from exports.resources import CHUNK_SIZE, RESOURCES, build_request, export_rows
+
+
+class Command(BaseCommand):
+    help = "Stream suspects, crime incidents, incident reports or cases to a CSV, NDJSON or Parquet file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('resource', choices=sorted(RESOURCES))
+        parser.add_argument('--file-format', choices=sorted(writers.WRITERS), default='csv')
+        parser.add_argument('--output', '-o', help="Output file (default: stdout)")
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument(
+            '--filter', action='append', default=[], metavar='NAME=VALUE',
+            help="List view filter, e.g. --filter risk_level=high (repeatable)"
+        )
+        parser.add_argument('--user', help="Email of the user filters such as my_cases apply to")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options['file_format'] == 'parquet' and writers.pyarrow is None:
+            raise CommandError("Parquet exports require pyarrow")
+
+        try:
+            params = dict(item.split('=', 1) for item in options['filter'])
+        except ValueError:
+            raise CommandError("Filters must be given as NAME=VALUE")
+
+        user = None
+        if options['user']:
+            user = get_user_model().objects.filter(email=options['user']).first()
+            if user is None:
+                raise CommandError(f"No user with email {options['user']}")
+
+        columns, rows = export_rows(options['resource'], build_request(params, user), options['chunk_size'])
+        content = writers.WRITERS[options['file_format']](columns, rows)
+        if options['gzip']:
+            content = writers.gzip_stream(content)
+
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            written = 0
+            for chunk in content:
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if options['output']:
+                output.close()
+
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f"Wrote {written} bytes to {options['output']}"))
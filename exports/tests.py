@@ -0,0 +1,51 @@
+import csv
+import gzip
+import io
+import json
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from authapi.models import User
+from suspect.models import Suspect
+
+
+class ExportRecordsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='analyst', email='analyst@example.com', password='secret', role='Investigator'
+        )
+        Suspect.objects.bulk_create([
+            Suspect(
+                first_name='Export', last_name=str(i), gender='M', age=30, national_id=str(500000 + i),
+                known_addresses='Kigali', criminal_record_summary='First time offense',
+                predicted_risk_level='high' if i % 2 else 'low', biometric_data={'fingerprint_hash': f'fp_{i}'},
+            )
+            for i in range(10)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_csv_honours_list_filters(self):
+        response = self.client.get('/api/exports/suspects/', {'file_format': 'csv', 'risk_level': 'high'})
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual({row['predicted_risk_level'] for row in rows}, {'high'})
+        self.assertEqual(json.loads(rows[0]['biometric_data'])['fingerprint_hash'][:3], 'fp_')
+
+    def test_gzipped_ndjson_with_selected_fields(self):
+        response = self.client.get(
+            '/api/exports/suspects/', {'file_format': 'ndjson', 'gzip': 'true', 'fields': 'id,national_id'}
+        )
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        self.assertEqual(len(lines), 10)
+        self.assertEqual(set(json.loads(lines[0])), {'id', 'national_id'})
+
+    def test_rejects_unknown_resource_and_format(self):
+        self.assertEqual(self.client.get('/api/exports/officers/').status_code, 404)
+        self.assertEqual(self.client.get('/api/exports/suspects/', {'file_format': 'xml'}).status_code, 400)
@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('exports/<str:resource>/', views.export_records, name='export-records'),
+]
@@ -0,0 +1,52 @@
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from . import writers
+from .resources import RESOURCES, export_rows
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_records(request, resource):
+    """Stream every row of a resource matching the list filters as CSV, NDJSON or Parquet"""
+    if resource not in RESOURCES:
+        return Response(
+            {'error': f'Unknown resource. Must be one of: {", ".join(RESOURCES)}'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    # ?format= is taken by DRF content negotiation
+    file_format = request.query_params.get('file_format', 'csv')
+    if file_format not in writers.WRITERS:
+        return Response(
+            {'error': f'Invalid file_format. Must be one of: {", ".join(writers.WRITERS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if file_format == 'parquet' and writers.pyarrow is None:
+        return Response(
+            {'error': 'Parquet exports are not available on this server'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    columns, rows = export_rows(resource, request)
+    content = writers.WRITERS[file_format](columns, rows)
+    content_type, extension = writers.FORMATS[file_format]
+    filename = f"{resource}-{timezone.now():%Y%m%d-%H%M%S}.{extension}"
+    
+    # Optional on-the-fly compression
+    if request.query_params.get('gzip', '').lower() == 'true':
+        content = writers.gzip_stream(content)
+        content_type = 'application/gzip'
+        filename += '.gz'
+    
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    logger.info(f"User {request.user.id} exporting {resource} as {file_format}")
+    return response
@@ -0,0 +1,157 @@
+import csv
+import datetime
+import decimal
+import io
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet exports are optional
+    pyarrow = None
+
+# Rows encoded per output chunk
+BATCH_SIZE = 2000
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def _batches(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _cell(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+    return value
+
+
+def write_csv(columns, rows):
+    """Yield CSV bytes: a header line, then one chunk per batch of rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.attname for column in columns])
+    for batch in _batches(rows):
+        writer.writerows([_cell(row[column.attname]) for column in columns] for row in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def write_ndjson(columns, rows):
+    """Yield newline-delimited JSON bytes, one object per row"""
+    encoder = DjangoJSONEncoder()
+    for batch in _batches(rows):
+        yield ''.join(encoder.encode(row) + '\n' for row in batch).encode()
+
+
+ARROW_TYPES = {
+    'AutoField': 'int64',
+    'BigAutoField': 'int64',
+    'IntegerField': 'int64',
+    'BigIntegerField': 'int64',
+    'PositiveIntegerField': 'int64',
+    'PositiveSmallIntegerField': 'int64',
+    'SmallIntegerField': 'int64',
+    'ForeignKey': 'int64',
+    'FloatField': 'float64',
+    'DecimalField': 'float64',
+    'BooleanField': 'bool_',
+    'DateField': 'date32',
+}
+
+
+def _arrow_type(column):
+    internal_type = column.get_internal_type()
+    if internal_type == 'DateTimeField':
+        return pyarrow.timestamp('us', tz='UTC')
+    if internal_type == 'DurationField':
+        return pyarrow.duration('us')
+    if internal_type in ARROW_TYPES:
+        return getattr(pyarrow, ARROW_TYPES[internal_type])()
+    return pyarrow.string()
+
+
+def _arrow_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, datetime.time):
+        return value.isoformat()
+    return value
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file collecting the bytes ParquetWriter produces between reads"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def write_parquet(columns, rows):
+    """Yield a Parquet file with one row group per batch of rows"""
+    if pyarrow is None:
+        raise RuntimeError("Parquet exports require pyarrow")
+
+    schema = pyarrow.schema([(column.attname, _arrow_type(column)) for column in columns])
+    sink = _ChunkSink()
+    with pyarrow.parquet.ParquetWriter(sink, schema, compression='snappy') as writer:
+        for batch in _batches(rows):
+            table = pyarrow.Table.from_pydict(
+                {column.attname: [_arrow_value(row[column.attname]) for row in batch] for column in columns},
+                schema=schema,
+            )
+            writer.write_table(table)
+            yield sink.drain()
+    yield sink.drain()
+
+
+WRITERS = {
+    'csv': write_csv,
+    'ndjson': write_ndjson,
+    'parquet': write_parquet,
+}
+
+
+def gzip_stream(chunks):
+    """Gzip a byte stream on the fly"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import IncidentRollup
 
-# Register your models here.
+
+@admin.register(IncidentRollup)
+class IncidentRollupAdmin(admin.ModelAdmin):
+    list_display = ['source', 'granularity', 'bucket', 'region_code', 'crime_type', 'count', 'severe_count']
+    list_filter = ['source', 'granularity', 'crime_type']
+    search_fields = ['region_code']
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from incidents import rollups
+from incidents.models import Incident
+from suspect.models import CrimeIncident
+
+
+class Command(BaseCommand):
+    help = "Rebuild the hourly and daily incident rollups used by the trends endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source', choices=['crime_incident', 'incident_report'],
+            help="Only rebuild one source (default: both)",
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        sources = [options['source']] if options['source'] else ['crime_incident', 'incident_report']
+
+        if 'crime_incident' in sources:
+            rows = CrimeIncident.objects.order_by().values_list(
+                'created_at', 'region_code', 'crime_type', 'is_severe'
+            ).iterator(chunk_size=chunk_size)
+            count = rollups.rebuild('crime_incident', rows)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} crime incident rollups"))
+
+        if 'incident_report' in sources:
+            reports = Incident.objects.order_by().only(
+                'date', 'time', 'location', 'crime_type', 'predicted_severity'
+            ).iterator(chunk_size=chunk_size)
+            rows = (
+                (rollups.report_moment(report), report.location, report.crime_type, report.predicted_severity)
+                for report in reports
+            )
+            count = rollups.rebuild('incident_report', rows)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} incident report rollups"))
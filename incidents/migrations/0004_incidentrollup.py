@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incidents', '0003_incident_latitude_incident_longitude'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncidentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('crime_incident', 'Crime Incident'), ('incident_report', 'Incident Report')], max_length=20)),
+                ('granularity', models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily')], max_length=4)),
+                ('bucket', models.DateTimeField()),
+                ('region_code', models.CharField(max_length=255)),
+                ('crime_type', models.CharField(max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('severe_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['source', 'granularity', 'region_code', 'bucket'], name='incidents_i_source_c4d4d3_idx')],
+                'unique_together': {('source', 'granularity', 'bucket', 'region_code', 'crime_type')},
+            },
+        ),
+    ]
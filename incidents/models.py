@@ -26,7 +26,7 @@ class Incident(models.Model):
     contact_email = models.EmailField()
 
     predicted_severity = models.BooleanField(null=True, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     def save(self, *args, **kwargs):
         if self.crime_type and self.location:
@@ -156,6 +156,36 @@ class Incident(models.Model):
         return f"{self.crime_type} at {self.location}"
 
 
+class IncidentRollup(models.Model):
+    """Incident counts per time bucket, region and crime type, kept for trend charts"""
+    SOURCE_CHOICES = [
+        ('crime_incident', 'Crime Incident'),
+        ('incident_report', 'Incident Report'),
+    ]
+
+    GRANULARITY_CHOICES = [
+        ('hour', 'Hourly'),
+        ('day', 'Daily'),
+    ]
+
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES)
+    bucket = models.DateTimeField()
+    region_code = models.CharField(max_length=255)
+    crime_type = models.CharField(max_length=100)
+    count = models.PositiveIntegerField(default=0)
+    severe_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('source', 'granularity', 'bucket', 'region_code', 'crime_type')
+        indexes = [
+            models.Index(fields=['source', 'granularity', 'region_code', 'bucket']),
+        ]
+
+    def __str__(self):
+        return f"{self.source} {self.granularity} {self.bucket:%Y-%m-%d %H:00} {self.region_code}/{self.crime_type}: {self.count}"
+
+
 # OPTIONAL: Add a utility method to check what locations are supported
 class IncidentManager(models.Manager):
     def get_supported_locations(self):
@@ -0,0 +1,126 @@
+from collections import Counter
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay
+from django.utils import timezone
+
+from backend.aggregates import increment_counters
+from .models import IncidentRollup
+
+GRANULARITIES = ('hour', 'day')
+
+# Fields each source's rollups depend on
+CRIME_INCIDENT_FIELDS = ('created_at', 'region_code', 'crime_type', 'is_severe')
+INCIDENT_REPORT_FIELDS = ('date', 'time', 'location', 'crime_type', 'predicted_severity')
+
+
+def truncate(moment, granularity):
+    """Return the start of the hour or day bucket containing ``moment``"""
+    moment = timezone.localtime(moment)
+    if granularity == 'day':
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def report_moment(incident):
+    """Return the aware datetime an incident report says it happened at"""
+    return _moment(incident.date, incident.time)
+
+
+def _moment(date, time):
+    return timezone.make_aware(datetime.combine(date, time))
+
+
+def rollup_keys(source, moment, region_code, crime_type):
+    """Yield the counter keys one incident contributes to, one per granularity"""
+    for granularity in GRANULARITIES:
+        yield {
+            'source': source,
+            'granularity': granularity,
+            'bucket': truncate(moment, granularity),
+            'region_code': region_code,
+            'crime_type': crime_type,
+        }
+
+
+def record_crime_incident(values, sign=1):
+    """
+    Add (or with ``sign=-1`` remove) one CrimeIncident in the rollups.
+
+    ``values`` maps the fields in ``CRIME_INCIDENT_FIELDS`` to the incident's values.
+    """
+    increment_counters(
+        IncidentRollup,
+        rollup_keys('crime_incident', values['created_at'], values['region_code'], values['crime_type']),
+        count=sign,
+        severe_count=sign * int(bool(values['is_severe'])),
+    )
+
+
+def record_incident_report(values, sign=1):
+    """Add (or remove) one incident report, from its ``INCIDENT_REPORT_FIELDS`` values"""
+    increment_counters(
+        IncidentRollup,
+        rollup_keys(
+            'incident_report', _moment(values['date'], values['time']), values['location'], values['crime_type']
+        ),
+        count=sign,
+        severe_count=sign * int(bool(values['predicted_severity'])),
+    )
+
+
+def move(record, fields, before, after):
+    """Move an updated row between buckets when a field the rollups use changed"""
+    if any(before[field] != after[field] for field in fields):
+        record(before, sign=-1)
+        record(after)
+
+
+def rebuild(source, rows, batch_size=5000):
+    """Recompute the rollups of one source from (moment, region, crime_type, severe) rows"""
+    counts = Counter()
+    severe = Counter()
+    for moment, region_code, crime_type, is_severe in rows:
+        for key in rollup_keys(source, moment, region_code, crime_type):
+            key = tuple(key.values())
+            counts[key] += 1
+            if is_severe:
+                severe[key] += 1
+
+    fields = ('source', 'granularity', 'bucket', 'region_code', 'crime_type')
+    with transaction.atomic():
+        IncidentRollup.objects.filter(source=source).delete()
+        IncidentRollup.objects.bulk_create(
+            (
+                IncidentRollup(**dict(zip(fields, key)), count=count, severe_count=severe[key])
+                for key, count in counts.items()
+            ),
+            batch_size=batch_size,
+        )
+    return len(counts)
+
+
+def series(queryset, by_crime_type=False):
+    """Sum rollup rows into a time series per bucket and region"""
+    fields = ['bucket', 'region_code'] + (['crime_type'] if by_crime_type else [])
+    return list(
+        queryset.values(*fields).annotate(
+            count=Sum('count'),
+            severe_count=Sum('severe_count'),
+        ).order_by(*fields)
+    )
+
+
+def hour_weekday_matrix(queryset):
+    """Return a 7 x 24 matrix (Monday first) of counts from hourly rollup rows"""
+    matrix = [[0] * 24 for _ in range(7)]
+    rows = queryset.filter(granularity='hour').annotate(
+        weekday=ExtractIsoWeekDay('bucket'),
+        hour=ExtractHour('bucket'),
+    ).values('weekday', 'hour').annotate(total=Sum('count')).order_by()
+
+    for row in rows:
+        matrix[row['weekday'] - 1][row['hour']] = row['total']
+    return matrix
@@ -1,10 +1,11 @@
 from rest_framework import serializers
+from backend.fieldsets import SparseFieldsetSerializerMixin
 from .models import Incident
 import joblib
 import numpy as np
 import os
 
-class IncidentSerializer(serializers.ModelSerializer):
+class IncidentSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Incident
         fields = '__all__'
@@ -0,0 +1,34 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import rollups
+from .models import Incident
+
+
+def _rollup_values(incident):
+    return {field: getattr(incident, field) for field in rollups.INCIDENT_REPORT_FIELDS}
+
+
+@receiver(pre_save, sender=Incident)
+def remember_rollup_values(sender, instance, update_fields=None, **kwargs):
+    # Updates move the report out of the buckets its previous values were counted in
+    instance._rollup_before = None
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(rollups.INCIDENT_REPORT_FIELDS):
+        return
+    instance._rollup_before = sender.objects.filter(pk=instance.pk).values(*rollups.INCIDENT_REPORT_FIELDS).first()
+
+
+@receiver(post_save, sender=Incident)
+def update_rollups(sender, instance, created, **kwargs):
+    after = _rollup_values(instance)
+    if created:
+        rollups.record_incident_report(after)
+    elif getattr(instance, '_rollup_before', None):
+        rollups.move(rollups.record_incident_report, rollups.INCIDENT_REPORT_FIELDS, instance._rollup_before, after)
+
+
+@receiver(post_delete, sender=Incident)
+def remove_from_rollups(sender, instance, **kwargs):
+    rollups.record_incident_report(_rollup_values(instance), sign=-1)
@@ -1,3 +1,123 @@
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
 from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from authapi.models import User
+from suspect.models import CrimeIncident
+from . import rollups
+from .models import Incident, IncidentRollup
+from .views import IncidentViewSet
+
+
+def rollup_rows(source):
+    return set(
+        IncidentRollup.objects.filter(source=source, count__gt=0)
+        .values_list('granularity', 'bucket', 'region_code', 'crime_type', 'count', 'severe_count')
+    )
+
+
+class RollupMaintenanceTests(TestCase):
+    def crime_incident(self, number, region_code='101', is_severe=False):
+        return CrimeIncident.objects.create(
+            incident_id=f'ROLL-{number:04d}', crime_type='theft', location_type='public',
+            latitude=-1.95, longitude=30.06, region_code=region_code, description='Test incident',
+            is_severe=is_severe,
+        )
+
+    def report(self, **fields):
+        values = {
+            'crime_type': 'theft', 'location': 'Kigali', 'date': date(2026, 3, 2), 'time': time(14, 30),
+            'urgency': 'low', 'description': 'Test report', 'contact_name': 'Reporter',
+            'contact_phone': '0780000000', 'contact_email': 'reporter@example.com',
+        }
+        values.update(fields)
+        return Incident.objects.create(**values)
+
+    def rebuilt_crime_incident_rows(self):
+        rows = CrimeIncident.objects.values_list('created_at', 'region_code', 'crime_type', 'is_severe')
+        rollups.rebuild('crime_incident', list(rows))
+        return rollup_rows('crime_incident')
+
+    def test_crime_incident_writes_follow_signals(self):
+        first = self.crime_incident(1, is_severe=True)
+        self.crime_incident(2)
+        day = IncidentRollup.objects.get(source='crime_incident', granularity='day')
+        self.assertEqual((day.count, day.severe_count), (2, 1))
+
+        # Moving an incident to another day and region, then deleting another
+        first.created_at = datetime(2026, 1, 5, 9, 15, tzinfo=dt_timezone.utc)
+        first.region_code = '202'
+        first.save()
+        CrimeIncident.objects.get(incident_id='ROLL-0002').delete()
+        self.crime_incident(3, is_severe=True)
+
+        rows = rollup_rows('crime_incident')
+        self.assertIn(('hour', datetime(2026, 1, 5, 9, tzinfo=dt_timezone.utc), '202', 'theft', 1, 1), rows)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows, self.rebuilt_crime_incident_rows())
+
+    def test_incident_report_writes_follow_signals(self):
+        report = self.report()
+        self.assertEqual(
+            rollup_rows('incident_report'),
+            {
+                ('hour', datetime(2026, 3, 2, 14, tzinfo=dt_timezone.utc), 'Kigali', 'theft', 1, 0),
+                ('day', datetime(2026, 3, 2, tzinfo=dt_timezone.utc), 'Kigali', 'theft', 1, 0),
+            }
+        )
+
+        report.time = time(16, 5)
+        report.save()
+        self.assertIn(
+            ('hour', datetime(2026, 3, 2, 16, tzinfo=dt_timezone.utc), 'Kigali', 'theft', 1, 0),
+            rollup_rows('incident_report')
+        )
+
+        report.delete()
+        self.assertEqual(rollup_rows('incident_report'), set())
+
+
+class TrendsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='officer', email='officer@example.com', password='secret', role='Police'
+        )
+        # Monday 2026-03-02 at 14:00 (x2) and Tuesday 09:00, UTC
+        moments = [datetime(2026, 3, 2, 14, tzinfo=dt_timezone.utc)] * 2 + [datetime(2026, 3, 3, 9, tzinfo=dt_timezone.utc)]
+        rollups.rebuild('crime_incident', [(moment, '101', 'theft', False) for moment in moments])
+
+    def trends(self, **params):
+        request = APIRequestFactory().get('/api/incidents/trends/', params)
+        force_authenticate(request, user=self.user)
+        return IncidentViewSet.as_view({'get': 'trends'})(request)
+
+    def test_series_and_matrix(self):
+        response = self.trends(start='2026-03-01', end='2026-03-07')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['count'] for row in response.data['series']], [2, 1])
+
+        matrix = response.data['hour_weekday_matrix']
+        self.assertEqual(matrix[0][14], 2)
+        self.assertEqual(matrix[1][9], 1)
+        self.assertEqual(sum(map(sum, matrix)), 3)
+
+        response = self.trends(start='2026-03-01', end='2026-03-07', granularity='hour')
+        self.assertEqual(len(response.data['series']), 2)
+
+    def test_default_range_ends_today(self):
+        response = self.trends()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['end'] - response.data['start'], timedelta(days=29))
 
-# Create your tests here.
+    def test_invalid_parameters(self):
+        for params in [
+            {'start': 'yesterday'},
+            {'end': '2026-13-01'},
+            {'start': '2026-02-30'},
+            {'start': '2026-03-07', 'end': '2026-03-01'},
+            {'granularity': 'week'},
+            {'source': 'other'},
+        ]:
+            self.assertEqual(self.trends(**params).status_code, 400, params)
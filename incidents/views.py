@@ -1,7 +1,78 @@
-from rest_framework import viewsets
-from .models import Incident
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import datetime, time, timedelta
+from backend.fieldsets import SparseFieldsetQuerysetMixin
+from .models import Incident, IncidentRollup
 from .serializers import IncidentSerializer
+from . import rollups
+import logging
 
-class IncidentViewSet(viewsets.ModelViewSet):
+logger = logging.getLogger(__name__)
+
+class IncidentViewSet(SparseFieldsetQuerysetMixin, viewsets.ModelViewSet):
     queryset = Incident.objects.all().order_by('-created_at')
     serializer_class = IncidentSerializer
+    cursor_ordering = ('-created_at',)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def trends(self, request):
+        """Get incident counts over time per region from the rollup tables"""
+        source = request.query_params.get('source', 'crime_incident')
+        if source not in dict(IncidentRollup.SOURCE_CHOICES):
+            return Response(
+                {'error': f'Invalid source. Must be one of: {", ".join(dict(IncidentRollup.SOURCE_CHOICES))}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        granularity = request.query_params.get('granularity', 'day')
+        if granularity not in rollups.GRANULARITIES:
+            return Response(
+                {'error': f'Invalid granularity. Must be one of: {", ".join(rollups.GRANULARITIES)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Date range, inclusive on both ends; defaults to the last 30 days
+        start_param = request.query_params.get('start')
+        end_param = request.query_params.get('end')
+        try:
+            end_date = parse_date(end_param) if end_param else timezone.localdate()
+            start_date = parse_date(start_param) if start_param else end_date and end_date - timedelta(days=29)
+        except ValueError:
+            start_date = end_date = None
+        if start_date is None or end_date is None:
+            return Response(
+                {'error': 'start and end must be dates in YYYY-MM-DD format'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if start_date > end_date:
+            return Response(
+                {'error': 'start must not be after end'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        start = timezone.make_aware(datetime.combine(start_date, time.min))
+        end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+        queryset = IncidentRollup.objects.filter(source=source, bucket__gte=start, bucket__lt=end)
+        
+        region_code = request.query_params.get('region_code')
+        if region_code:
+            queryset = queryset.filter(region_code__in=region_code.split(','))
+        
+        crime_type = request.query_params.get('crime_type')
+        if crime_type:
+            queryset = queryset.filter(crime_type=crime_type)
+        
+        by_crime_type = request.query_params.get('by_crime_type', '').lower() == 'true'
+        
+        return Response({
+            'source': source,
+            'granularity': granularity,
+            'start': start_date,
+            'end': end_date,
+            'series': rollups.series(queryset.filter(granularity=granularity), by_crime_type),
+            'hour_weekday_matrix': rollups.hour_weekday_matrix(queryset),
+        })
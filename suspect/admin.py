@@ -1,19 +1,19 @@
 from django.contrib import admin
-from .models import Suspect, CrimeIncident, RegionRiskSummary
+from .models import Suspect, CrimeIncident, RegionRiskSummary, HeatmapCell, SuspectDuplicateCandidate
 
 @admin.register(Suspect)
 class SuspectAdmin(admin.ModelAdmin):
     list_display = ['full_name', 'age', 'gender', 'predicted_risk_level', 'risk_score', 'last_prediction_date']
     list_filter = ['predicted_risk_level', 'gender', 'created_at']
-    search_fields = ['first_name', 'last_name', 'national_id', 'alias']
-    readonly_fields = ['predicted_risk_level', 'risk_score', 'prediction_confidence', 'last_prediction_date']
+    search_fields = ['first_name', 'last_name', 'national_id', 'alias', 'fingerprint_hash']
+    readonly_fields = ['fingerprint_hash', 'predicted_risk_level', 'risk_score', 'prediction_confidence', 'last_prediction_date']
     
     fieldsets = (
         ('Personal Information', {
             'fields': ('first_name', 'last_name', 'alias', 'gender', 'age', 'national_id')
         }),
         ('Details', {
-            'fields': ('known_addresses', 'criminal_record_summary', 'biometric_data', 'behavior_patterns')
+            'fields': ('known_addresses', 'criminal_record_summary', 'biometric_data', 'fingerprint_hash', 'behavior_patterns')
         }),
         ('ML Predictions', {
             'fields': ('predicted_risk_level', 'risk_score', 'prediction_confidence', 'last_prediction_date'),
@@ -36,4 +36,18 @@ class RegionRiskSummaryAdmin(admin.ModelAdmin):
     list_display = ['region_code', 'total_cases', 'severe_cases', 'risk_score', 'most_common_crime', 'last_updated']
     list_filter = ['last_updated', 'most_common_crime']
     search_fields = ['region_code']
-    readonly_fields = ['last_updated']
\ No newline at end of file
+    readonly_fields = ['last_updated']
+
+@admin.register(HeatmapCell)
+class HeatmapCellAdmin(admin.ModelAdmin):
+    list_display = ['zoom', 'cell_x', 'cell_y', 'crime_type', 'total', 'severe']
+    list_filter = ['zoom', 'crime_type']
+
+
+@admin.register(SuspectDuplicateCandidate)
+class SuspectDuplicateCandidateAdmin(admin.ModelAdmin):
+    list_display = ['suspect_a', 'suspect_b', 'score', 'blocking_key', 'status', 'created_at']
+    list_filter = ['status']
+    search_fields = ['suspect_a__first_name', 'suspect_a__last_name', 'suspect_b__first_name', 'suspect_b__last_name']
+    raw_id_fields = ['suspect_a', 'suspect_b']
+    readonly_fields = ['score', 'blocking_key', 'created_at']
@@ -0,0 +1,115 @@
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from incidents.models import IncidentRollup
+from .models import RegionRiskSummary
+
+SEASON_DAYS = 7
+
+
+def load_daily_counts(end_date, days):
+    """
+    Read the per-region daily incident counts ending at ``end_date`` into a
+    (regions x days) array. Returns the region codes and the array.
+    """
+    start_date = end_date - timedelta(days=days - 1)
+    start = timezone.make_aware(datetime.combine(start_date, time.min))
+    end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+
+    rows = list(
+        IncidentRollup.objects.filter(
+            source='crime_incident', granularity='day', bucket__gte=start, bucket__lt=end,
+        ).values_list('region_code', 'bucket', 'count')
+    )
+    regions = sorted({region_code for region_code, _, _ in rows})
+    counts = np.zeros((len(regions), days), dtype=np.float64)
+    if not rows:
+        return regions, counts
+
+    index = {region_code: i for i, region_code in enumerate(regions)}
+    region_idx = np.fromiter((index[r] for r, _, _ in rows), dtype=np.intp, count=len(rows))
+    day_idx = np.fromiter(
+        ((timezone.localtime(bucket).date() - start_date).days for _, bucket, _ in rows),
+        dtype=np.intp, count=len(rows),
+    )
+    np.add.at(counts, (region_idx, day_idx), np.fromiter((c for _, _, c in rows), dtype=np.float64))
+    return regions, counts
+
+
+def detect(counts, recent_days=7, z_threshold=2.0, min_recent_total=3):
+    """
+    Flag regions whose last ``recent_days`` of counts exceed their baseline.
+
+    ``counts`` is a (regions x days) array; everything before the recent window
+    is history. The baseline is a weekday-seasonal profile of that history and
+    the deviation is the larger of the seasonal spread and the spread of the
+    rolling ``recent_days`` means, so all regions are scored in one pass.
+    """
+    if recent_days < 1:
+        raise ValueError(f"recent_days must be at least 1, got {recent_days}")
+    counts = np.asarray(counts, dtype=np.float64)
+    history, recent = counts[:, :-recent_days], counts[:, -recent_days:]
+    weeks = history.shape[1] // SEASON_DAYS
+    if weeks < 2:
+        raise ValueError(f"Need at least {2 * SEASON_DAYS} days of history, got {history.shape[1]}")
+    if recent_days > history.shape[1]:
+        raise ValueError(f"recent_days ({recent_days}) cannot exceed the {history.shape[1]} days of history")
+
+    # Rolling means of the history and their spread
+    cumulative = np.cumsum(np.pad(history, ((0, 0), (1, 0))), axis=1)
+    rolling_means = (cumulative[:, recent_days:] - cumulative[:, :-recent_days]) / recent_days
+    rolling_std = rolling_means.std(axis=1)
+
+    # Weekday-seasonal baseline: history folded into (regions, weeks, weekday)
+    folded = history[:, -weeks * SEASON_DAYS:].reshape(len(counts), weeks, SEASON_DAYS)
+    phases = np.arange(recent_days) % SEASON_DAYS
+    seasonal_mean = folded.mean(axis=1)[:, phases]
+    seasonal_var = folded.var(axis=1)[:, phases]
+
+    recent_mean = recent.mean(axis=1)
+    baseline = seasonal_mean.mean(axis=1)
+    deviation = np.maximum(np.sqrt(seasonal_var.sum(axis=1)) / recent_days, rolling_std)
+    # Poisson floor so quiet regions with a flat history are not flagged on noise
+    deviation = np.maximum(deviation, np.sqrt(np.maximum(baseline, 1.0) / recent_days))
+
+    z_scores = (recent_mean - baseline) / deviation
+    is_anomaly = (z_scores >= z_threshold) & (recent.sum(axis=1) >= min_recent_total)
+    return {
+        'recent_mean': recent_mean,
+        'baseline': baseline,
+        'z_score': z_scores,
+        'is_anomaly': is_anomaly,
+    }
+
+
+def store(regions, results):
+    """Write detection results onto the RegionRiskSummary rows"""
+    now = timezone.now()
+    fields = ['trend_recent_mean', 'trend_baseline', 'trend_z_score', 'is_trend_anomaly', 'trend_checked_at']
+
+    with transaction.atomic():
+        summaries = RegionRiskSummary.objects.select_for_update().in_bulk(regions, field_name='region_code')
+        to_update, to_create = [], []
+        for i, region_code in enumerate(regions):
+            summary = summaries.get(region_code)
+            if summary is None:
+                summary = RegionRiskSummary(region_code=region_code)
+                to_create.append(summary)
+            else:
+                to_update.append(summary)
+            summary.trend_recent_mean = float(results['recent_mean'][i])
+            summary.trend_baseline = float(results['baseline'][i])
+            summary.trend_z_score = float(results['z_score'][i])
+            summary.is_trend_anomaly = bool(results['is_anomaly'][i])
+            summary.trend_checked_at = now
+
+        # Regions with no activity in the window are no longer anomalous
+        RegionRiskSummary.objects.exclude(region_code__in=regions).filter(is_trend_anomaly=True).update(
+            is_trend_anomaly=False, trend_checked_at=now,
+        )
+        RegionRiskSummary.objects.bulk_update(to_update, fields, batch_size=500)
+        RegionRiskSummary.objects.bulk_create(to_create, batch_size=500)
+    return len(to_update) + len(to_create)
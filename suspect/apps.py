@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SuspectConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'suspect'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,144 @@
+import numbers
+import threading
+import time
+
+import numpy as np
+
+# Numeric keys of biometric_data['facial_features'], in vector order
+FACIAL_FEATURES = ('eye_distance', 'nose_width')
+
+# The index only sees writes committed by this process; other workers'
+# writes reach it when it is reloaded after this many seconds
+MAX_AGE = 300
+
+
+def facial_vector(biometric_data):
+    """Return the float32 facial feature vector of a suspect, or None if incomplete"""
+    if not isinstance(biometric_data, dict):
+        return None
+    features = biometric_data.get('facial_features')
+    if not isinstance(features, dict):
+        return None
+
+    values = [features.get(name) for name in FACIAL_FEATURES]
+    if not all(isinstance(value, numbers.Real) and not isinstance(value, bool) for value in values):
+        return None
+    return np.asarray(values, dtype=np.float32)
+
+
+class FacialFeatureIndex:
+    """
+    Contiguous float32 matrix of suspect facial feature vectors.
+
+    Rows are packed: removing a suspect moves the last row into its slot, so
+    the live rows are always ``vectors[:size]`` and a k-nearest-neighbour query
+    is a single vectorized distance computation over them. Like the name
+    search index it is per process and reloaded once older than ``MAX_AGE``.
+    """
+
+    def __init__(self, dimensions=len(FACIAL_FEATURES), capacity=1024):
+        self._lock = threading.RLock()
+        self.dimensions = dimensions
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.vectors = np.empty((capacity, dimensions), dtype=np.float32)
+        self.size = 0
+        self._rows = {}
+        self._built = False
+        self._built_at = 0.0
+
+    def __len__(self):
+        return self.size
+
+    def build(self, queryset):
+        """Load every suspect with complete facial features"""
+        with self._lock:
+            self.load(
+                (suspect_id, facial_vector(data))
+                for suspect_id, data in queryset.values_list('id', 'biometric_data').iterator(chunk_size=2000)
+            )
+
+    def ensure_built(self, queryset):
+        if not self._built or time.monotonic() - self._built_at > MAX_AGE:
+            self.build(queryset)
+
+    def load(self, items):
+        """Replace the index contents with (suspect id, vector) pairs"""
+        with self._lock:
+            self.size = 0
+            self._rows.clear()
+            for suspect_id, vector in items:
+                if vector is not None:
+                    self._append(suspect_id, vector)
+            self._built = True
+            self._built_at = time.monotonic()
+
+    def upsert(self, suspect_id, vector):
+        with self._lock:
+            if not self._built:
+                return
+            if vector is None:
+                self._remove(suspect_id)
+            elif suspect_id in self._rows:
+                self.vectors[self._rows[suspect_id]] = vector
+            else:
+                self._append(suspect_id, vector)
+
+    def remove(self, suspect_id):
+        with self._lock:
+            if self._built:
+                self._remove(suspect_id)
+
+    def vector_for(self, suspect_id):
+        with self._lock:
+            row = self._rows.get(suspect_id)
+            return None if row is None else self.vectors[row].copy()
+
+    def nearest(self, vector, k=10, exclude=None):
+        """Return up to ``k`` (suspect id, euclidean distance) pairs closest to ``vector``"""
+        query = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            if not self.size:
+                return []
+            diff = self.vectors[:self.size] - query
+            distances = np.einsum('ij,ij->i', diff, diff)
+            if exclude is not None and exclude in self._rows:
+                distances[self._rows[exclude]] = np.inf
+
+            k = min(k, self.size)
+            nearest = np.argpartition(distances, k - 1)[:k]
+            nearest = nearest[np.argsort(distances[nearest], kind='stable')]
+            ids = self.ids[nearest]
+            distances = distances[nearest]
+
+        return [
+            (int(suspect_id), float(np.sqrt(distance)))
+            for suspect_id, distance in zip(ids, distances)
+            if np.isfinite(distance)
+        ]
+
+    def _append(self, suspect_id, vector):
+        if self.size == len(self.ids):
+            capacity = max(2 * len(self.ids), 1)
+            self.ids = np.resize(self.ids, capacity)
+            vectors = np.empty((capacity, self.dimensions), dtype=np.float32)
+            vectors[:self.size] = self.vectors[:self.size]
+            self.vectors = vectors
+        self.ids[self.size] = suspect_id
+        self.vectors[self.size] = vector
+        self._rows[suspect_id] = self.size
+        self.size += 1
+
+    def _remove(self, suspect_id):
+        row = self._rows.pop(suspect_id, None)
+        if row is None:
+            return
+        last = self.size - 1
+        if row != last:
+            moved_id = int(self.ids[last])
+            self.ids[row] = moved_id
+            self.vectors[row] = self.vectors[last]
+            self._rows[moved_id] = row
+        self.size = last
+
+
+index = FacialFeatureIndex()
@@ -0,0 +1,215 @@
+import re
+from collections import defaultdict
+
+import numpy as np
+
+from .models import SuspectDuplicateCandidate
+
+# Score at or above which a pair is written for review
+DEFAULT_THRESHOLD = 0.8
+
+# Blocks larger than this are split further so no block scores more than
+# max_block * (max_block - 1) / 2 pairs
+DEFAULT_MAX_BLOCK = 1000
+
+# Record attributes used, in order, to split an oversized block
+SUB_BLOCK_KEYS = (
+    ('initial', lambda record: record['first'][:1]),
+    ('age', lambda record: record['age']),
+)
+
+AGE_BAND = 10
+
+WEIGHTS = {
+    'name': 0.35,
+    'age': 0.25,
+    'address': 0.3,
+    'gender': 0.1,
+}
+
+SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'),
+    **dict.fromkeys('cgjkqsxz', '2'),
+    **dict.fromkeys('dt', '3'),
+    'l': '4',
+    **dict.fromkeys('mn', '5'),
+    'r': '6',
+}
+
+WORD_RE = re.compile(r'[^\W\d_]+')
+
+
+def normalize(text):
+    """Lowercase a name and drop everything but letters"""
+    return ''.join(WORD_RE.findall((text or '').lower()))
+
+
+def soundex(text):
+    """American Soundex code of a name, e.g. 'Robert' -> 'R163'"""
+    name = normalize(text)
+    if not name:
+        return ''
+    code = name[0].upper()
+    previous = SOUNDEX_CODES.get(name[0], '')
+    for char in name[1:]:
+        digit = SOUNDEX_CODES.get(char, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if char not in 'hw':
+            previous = digit
+    return code.ljust(4, '0')
+
+
+def address_tokens(text):
+    """Set of words of three or more letters in an address"""
+    return {word for word in WORD_RE.findall((text or '').lower()) if len(word) >= 3}
+
+
+def blocking_keys(first_name, last_name, age, addresses):
+    """Keys under which a suspect is compared with others"""
+    name_key = soundex(first_name) + soundex(last_name)
+    keys = [f"name:{name_key}:age{age // AGE_BAND}"]
+    for token in sorted(addresses):
+        keys.append(f"addr:{soundex(last_name)}:{token}")
+    return keys
+
+
+def score_block(records):
+    """
+    Score every pair within one block in a single vectorized pass.
+
+    ``records`` is a list of dicts as produced by ``prepare``. Returns the row
+    indices of each pair and their scores.
+    """
+    n = len(records)
+    left, right = np.triu_indices(n, k=1)
+
+    first = np.array([r['first'] for r in records], dtype=object)
+    last = np.array([r['last'] for r in records], dtype=object)
+    first_sx = np.array([r['first_sx'] for r in records], dtype=object)
+    last_sx = np.array([r['last_sx'] for r in records], dtype=object)
+    gender = np.array([r['gender'] for r in records], dtype=object)
+    ages = np.array([r['age'] for r in records], dtype=np.float64)
+
+    exact_name = (first[left] == first[right]) & (last[left] == last[right])
+    phonetic_name = (first_sx[left] == first_sx[right]) & (last_sx[left] == last_sx[right])
+    name_score = np.where(exact_name, 1.0, np.where(phonetic_name, 0.7, 0.0))
+
+    age_score = np.clip(1.0 - np.abs(ages[left] - ages[right]) / AGE_BAND, 0.0, 1.0)
+    gender_score = (gender[left] == gender[right]).astype(np.float64)
+
+    # Address Jaccard similarity from a block-local token incidence matrix
+    vocabulary = {}
+    for r in records:
+        for token in r['addresses']:
+            vocabulary.setdefault(token, len(vocabulary))
+    incidence = np.zeros((n, max(len(vocabulary), 1)), dtype=np.float32)
+    for i, r in enumerate(records):
+        incidence[i, [vocabulary[token] for token in r['addresses']]] = 1.0
+    shared = (incidence @ incidence.T)[left, right]
+    sizes = incidence.sum(axis=1)
+    union = sizes[left] + sizes[right] - shared
+    address_score = np.divide(shared, union, out=np.zeros_like(shared), where=union > 0)
+
+    scores = (
+        WEIGHTS['name'] * name_score
+        + WEIGHTS['age'] * age_score
+        + WEIGHTS['address'] * address_score
+        + WEIGHTS['gender'] * gender_score
+    )
+    return left, right, scores
+
+
+def prepare(rows):
+    """Turn (id, first, last, gender, age, known_addresses) rows into scoring records"""
+    for suspect_id, first_name, last_name, gender, age, known_addresses in rows:
+        yield {
+            'id': suspect_id,
+            'first': normalize(first_name),
+            'last': normalize(last_name),
+            'first_sx': soundex(first_name),
+            'last_sx': soundex(last_name),
+            'gender': gender,
+            'age': age or 0,
+            'addresses': address_tokens(known_addresses),
+            'keys': blocking_keys(first_name, last_name, age or 0, address_tokens(known_addresses)),
+        }
+
+
+def split_block(key, members, records, max_block, level=0):
+    """
+    Yield (key, members) blocks of at most ``max_block`` records.
+
+    Oversized blocks are split on first-name initial, then exact age. Blocks
+    still too large after that fall back to a sorted neighbourhood: overlapping
+    windows over the records sorted by name and age, so records adjacent in
+    that order are still compared.
+    """
+    if len(members) <= max_block:
+        yield key, members
+        return
+
+    if level < len(SUB_BLOCK_KEYS):
+        name, value = SUB_BLOCK_KEYS[level]
+        groups = defaultdict(list)
+        for i in members:
+            groups[value(records[i])].append(i)
+        for group_value, group in groups.items():
+            if len(group) > 1:
+                yield from split_block(f"{key}:{name}{group_value}", group, records, max_block, level + 1)
+        return
+
+    ordered = sorted(members, key=lambda i: (records[i]['last'], records[i]['first'], records[i]['age'], i))
+    step = max(max_block // 2, 1)
+    for start in range(0, len(ordered) - step, step):
+        yield f"{key}:window{start // step}", ordered[start:start + max_block]
+
+
+def find_candidates(rows, threshold=DEFAULT_THRESHOLD, max_block=DEFAULT_MAX_BLOCK):
+    """
+    Return ``{(id_a, id_b): (score, blocking_key)}`` for likely duplicate pairs
+    and the number of blocks that were split for being larger than ``max_block``.
+    """
+    if max_block < 2:
+        raise ValueError(f"max_block must be at least 2, got {max_block}")
+
+    records = list(prepare(rows))
+    blocks = defaultdict(list)
+    for index, record in enumerate(records):
+        for key in record['keys']:
+            blocks[key].append(index)
+
+    candidates = {}
+    split = 0
+    for block_key, block_members in blocks.items():
+        if len(block_members) < 2:
+            continue
+        if len(block_members) > max_block:
+            split += 1
+
+        for key, members in split_block(block_key, block_members, records, max_block):
+            block = [records[i] for i in members]
+            left, right, scores = score_block(block)
+            for i in np.flatnonzero(scores >= threshold):
+                a, b = sorted((block[left[i]]['id'], block[right[i]]['id']))
+                score = float(scores[i])
+                if score > candidates.get((a, b), (0.0, ''))[0]:
+                    candidates[(a, b)] = (score, key)
+
+    return candidates, split
+
+
+def store(candidates, batch_size=1000):
+    """Upsert candidate pairs: re-runs refresh scores and keep each pair's review status"""
+    SuspectDuplicateCandidate.objects.bulk_create(
+        (
+            SuspectDuplicateCandidate(suspect_a_id=a, suspect_b_id=b, score=score, blocking_key=key[:100])
+            for (a, b), (score, key) in candidates.items()
+        ),
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['suspect_a', 'suspect_b'],
+        update_fields=['score', 'blocking_key'],
+    )
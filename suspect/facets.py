@@ -0,0 +1,95 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, Q
+
+from .models import Suspect
+
+# Seconds a cached facet result may be served. Suspect saves and deletes
+# invalidate it at once; QuerySet.update() and raw SQL send no signals, so
+# this bounds how long such writes can go unnoticed
+CACHE_TIMEOUT = 60
+
+VERSION_KEY = 'suspect_facets:version'
+
+# (label, lowest age, highest age) - None leaves a band open-ended
+AGE_BANDS = (
+    ('under_18', None, 17),
+    ('18_25', 18, 25),
+    ('26_35', 26, 35),
+    ('36_50', 36, 50),
+    ('over_50', 51, None),
+)
+
+
+def _age_filter(low, high):
+    condition = Q()
+    if low is not None:
+        condition &= Q(age__gte=low)
+    if high is not None:
+        condition &= Q(age__lte=high)
+    return condition
+
+
+def aggregates():
+    """Conditional aggregates computing every facet in one pass over the table"""
+    expressions = {
+        'total': Count('id'),
+        'average_risk_score': Avg('risk_score'),
+        'average_age': Avg('age'),
+        'risk_unassessed': Count('id', filter=Q(predicted_risk_level__isnull=True)),
+    }
+    for value, _ in Suspect.GENDER_CHOICES:
+        expressions[f'gender_{value}'] = Count('id', filter=Q(gender=value))
+    for value, _ in Suspect.RISK_LEVEL_CHOICES:
+        expressions[f'risk_{value}'] = Count('id', filter=Q(predicted_risk_level=value))
+        expressions[f'risk_score_{value}'] = Avg('risk_score', filter=Q(predicted_risk_level=value))
+    for label, low, high in AGE_BANDS:
+        expressions[f'age_{label}'] = Count('id', filter=_age_filter(low, high))
+    return expressions
+
+
+def compute(queryset):
+    """Return the facet counts and averages of ``queryset``"""
+    row = queryset.order_by().aggregate(**aggregates())
+    return {
+        'total_suspects': row['total'],
+        'average_risk_score': row['average_risk_score'] or 0,
+        'average_age': row['average_age'] or 0,
+        'gender': {value: row[f'gender_{value}'] for value, _ in Suspect.GENDER_CHOICES},
+        'age_bands': {label: row[f'age_{label}'] for label, _, _ in AGE_BANDS},
+        'risk_levels': {
+            **{
+                value: {'count': row[f'risk_{value}'], 'average_risk_score': row[f'risk_score_{value}'] or 0}
+                for value, _ in Suspect.RISK_LEVEL_CHOICES
+            },
+            'unassessed': {'count': row['risk_unassessed'], 'average_risk_score': 0},
+        },
+    }
+
+
+def cache_key(filters):
+    """Cache key for a filter set, scoped to the current data version"""
+    version = cache.get_or_set(VERSION_KEY, time.time_ns, timeout=None)
+    digest = hashlib.sha1(repr(sorted(filters.items())).encode()).hexdigest()
+    return f'suspect_facets:{version}:{digest}'
+
+
+def cached(queryset, filters):
+    """Return the facets of ``queryset``, computed once per filter set and data version"""
+    key = cache_key(filters)
+    result = cache.get(key)
+    if result is None:
+        result = compute(queryset)
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
+
+
+def invalidate():
+    """Make every cached facet result stale after a suspect write"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # Evicted: start from a value never used before, so no older entry becomes valid again
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
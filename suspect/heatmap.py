@@ -0,0 +1,124 @@
+import math
+from collections import Counter
+
+from django.db import transaction
+
+from backend.aggregates import increment_counters
+from .models import HeatmapCell
+
+# Zoom levels kept in the aggregation table (slippy-map tile zooms)
+MIN_ZOOM = 0
+MAX_ZOOM = 14
+
+# Each tile is split into a 2**CELL_BITS x 2**CELL_BITS grid of cells
+CELL_BITS = 4
+
+MAX_LATITUDE = 85.05112878
+
+# Seconds clients may reuse a tile before asking again
+TILE_MAX_AGE = 60
+
+# CrimeIncident fields the aggregation depends on
+AGGREGATED_FIELDS = ('latitude', 'longitude', 'crime_type', 'is_severe')
+
+
+def cell_for(latitude, longitude, zoom):
+    """Return the (cell_x, cell_y) grid cell containing a point at the given zoom"""
+    latitude = max(-MAX_LATITUDE, min(MAX_LATITUDE, latitude))
+    n = 2 ** (zoom + CELL_BITS)
+    lat_rad = math.radians(latitude)
+    x = int((longitude + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def cell_center(cell_x, cell_y, zoom):
+    """Return the (latitude, longitude) of the centre of a grid cell"""
+    n = 2 ** (zoom + CELL_BITS)
+    longitude = (cell_x + 0.5) / n * 360.0 - 180.0
+    latitude = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (cell_y + 0.5) / n))))
+    return latitude, longitude
+
+
+def cell_keys(latitude, longitude, crime_type):
+    """Yield the counter keys an incident contributes to, one per zoom level"""
+    for zoom in range(MIN_ZOOM, MAX_ZOOM + 1):
+        cell_x, cell_y = cell_for(latitude, longitude, zoom)
+        yield {'zoom': zoom, 'cell_x': cell_x, 'cell_y': cell_y, 'crime_type': crime_type}
+
+
+def record_incident(values, sign=1):
+    """
+    Add (or with ``sign=-1`` remove) one incident in the heatmap aggregation.
+
+    ``values`` maps the fields in ``AGGREGATED_FIELDS`` to the incident's values.
+    """
+    increment_counters(
+        HeatmapCell,
+        cell_keys(values['latitude'], values['longitude'], values['crime_type']),
+        total=sign,
+        severe=sign * int(bool(values['is_severe'])),
+    )
+
+
+def move_incident(before, after):
+    """Move an updated incident between cells when its position, type or severity changed"""
+    if any(before[field] != after[field] for field in AGGREGATED_FIELDS):
+        record_incident(before, sign=-1)
+        record_incident(after)
+
+
+def rebuild(incidents, batch_size=5000):
+    """Recompute the whole aggregation table from an iterable of incidents"""
+    totals = Counter()
+    severe = Counter()
+    for latitude, longitude, crime_type, is_severe in incidents:
+        for key in cell_keys(latitude, longitude, crime_type):
+            key = tuple(key.values())
+            totals[key] += 1
+            if is_severe:
+                severe[key] += 1
+
+    with transaction.atomic():
+        HeatmapCell.objects.all().delete()
+        HeatmapCell.objects.bulk_create(
+            (
+                HeatmapCell(
+                    zoom=zoom, cell_x=cell_x, cell_y=cell_y, crime_type=crime_type,
+                    total=total, severe=severe[(zoom, cell_x, cell_y, crime_type)],
+                )
+                for (zoom, cell_x, cell_y, crime_type), total in totals.items()
+            ),
+            batch_size=batch_size,
+        )
+    return len(totals)
+
+
+def tile(zoom, x, y):
+    """Return the aggregated cells covering tile (x, y) at the given zoom"""
+    size = 2 ** CELL_BITS
+    rows = HeatmapCell.objects.filter(
+        zoom=zoom, total__gt=0,
+        cell_x__gte=x * size, cell_x__lt=(x + 1) * size,
+        cell_y__gte=y * size, cell_y__lt=(y + 1) * size,
+    ).values_list('cell_x', 'cell_y', 'crime_type', 'total', 'severe')
+
+    cells = {}
+    for cell_x, cell_y, crime_type, total, severe in rows:
+        cell = cells.get((cell_x, cell_y))
+        if cell is None:
+            latitude, longitude = cell_center(cell_x, cell_y, zoom)
+            cell = cells[(cell_x, cell_y)] = {
+                'cell_x': cell_x,
+                'cell_y': cell_y,
+                'latitude': latitude,
+                'longitude': longitude,
+                'total': 0,
+                'severe': 0,
+                'crime_types': {},
+            }
+        cell['total'] += total
+        cell['severe'] += severe
+        cell['crime_types'][crime_type] = total
+
+    return list(cells.values())
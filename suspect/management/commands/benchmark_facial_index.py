@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from suspect.biometrics import FACIAL_FEATURES, FacialFeatureIndex
+
+
+class Command(BaseCommand):
+    help = "Benchmark facial feature k-nearest-neighbour queries on synthetic suspects"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=100_000, help="Number of synthetic suspects")
+        parser.add_argument('--queries', type=int, default=1000)
+        parser.add_argument('-k', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        size, queries, k = options['size'], options['queries'], options['k']
+        rng = np.random.default_rng(options['seed'])
+
+        # Spread roughly like the sample data (eye_distance ~ 60-75, nose_width ~ 30-45)
+        vectors = rng.normal(loc=[67.5, 37.5], scale=[4.0, 4.0], size=(size, len(FACIAL_FEATURES)))
+        vectors = vectors.astype(np.float32)
+
+        index = FacialFeatureIndex()
+        started = time.perf_counter()
+        index.load(zip(range(1, size + 1), vectors))
+        build_seconds = time.perf_counter() - started
+
+        probes = vectors[rng.integers(0, size, queries)]
+        latencies = np.empty(queries)
+        for i, probe in enumerate(probes):
+            started = time.perf_counter()
+            index.nearest(probe, k=k)
+            latencies[i] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for suspect_id in range(1, queries + 1):
+            index.upsert(suspect_id, vectors[suspect_id - 1] + 0.5)
+        update_seconds = (time.perf_counter() - started) / queries
+
+        self.stdout.write(f"suspects:        {size:,}")
+        self.stdout.write(f"matrix:          {index.vectors[:index.size].nbytes / 1e6:.1f} MB float32")
+        self.stdout.write(f"build:           {build_seconds * 1000:.1f} ms")
+        self.stdout.write(
+            f"k={k} query:     p50 {np.percentile(latencies, 50) * 1000:.2f} ms, "
+            f"p99 {np.percentile(latencies, 99) * 1000:.2f} ms"
+        )
+        self.stdout.write(f"update:          {update_seconds * 1e6:.1f} us")
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from suspect import anomalies
+
+
+class Command(BaseCommand):
+    help = (
+        "Flag regions whose recent daily incident counts exceed their seasonal baseline. "
+        "Intended to run on a schedule (e.g. nightly cron) after the rollups are current."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--history-days', type=int, default=56, help="Days of history used for the baseline")
+        parser.add_argument('--recent-days', type=int, default=7, help="Days compared against the baseline")
+        parser.add_argument('--threshold', type=float, default=2.0, help="z-score at which a region is flagged")
+        parser.add_argument('--min-count', type=int, default=3, help="Minimum incidents in the recent window")
+
+    def handle(self, *args, **options):
+        recent_days = options['recent_days']
+        if recent_days < 1:
+            raise CommandError("--recent-days must be at least 1")
+        if options['history_days'] < 2 * anomalies.SEASON_DAYS:
+            raise CommandError(f"--history-days must be at least {2 * anomalies.SEASON_DAYS}")
+        if recent_days > options['history_days']:
+            raise CommandError("--recent-days cannot exceed --history-days")
+        regions, counts = anomalies.load_daily_counts(
+            timezone.localdate(), options['history_days'] + recent_days
+        )
+        if not regions:
+            self.stdout.write("No daily rollups in range; nothing to score")
+            return
+
+        try:
+            results = anomalies.detect(
+                counts,
+                recent_days=recent_days,
+                z_threshold=options['threshold'],
+                min_recent_total=options['min_count'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        stored = anomalies.store(regions, results)
+        flagged = [region for region, flag in zip(regions, results['is_anomaly']) if flag]
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {stored} regions, {len(flagged)} anomalous: {', '.join(flagged) or 'none'}"
+        ))
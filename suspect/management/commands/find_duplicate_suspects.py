@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from suspect import deduplication
+from suspect.models import Suspect
+
+
+class Command(BaseCommand):
+    help = "Find likely duplicate suspect records and queue them for review"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float, default=deduplication.DEFAULT_THRESHOLD)
+        parser.add_argument('--max-block', type=int, default=deduplication.DEFAULT_MAX_BLOCK)
+        parser.add_argument('--dry-run', action='store_true', help="Report candidates without storing them")
+
+    def handle(self, *args, **options):
+        if options['max_block'] < 2:
+            raise CommandError("--max-block must be at least 2")
+
+        started = time.perf_counter()
+        rows = Suspect.objects.order_by().values_list(
+            'id', 'first_name', 'last_name', 'gender', 'age', 'known_addresses'
+        ).iterator(chunk_size=2000)
+
+        candidates, split = deduplication.find_candidates(
+            rows, threshold=options['threshold'], max_block=options['max_block']
+        )
+        if split:
+            self.stdout.write(
+                f"Split {split} blocks larger than {options['max_block']} suspects into sub-blocks"
+            )
+
+        if not options['dry_run']:
+            deduplication.store(candidates)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Found {len(candidates)} candidate pairs in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from suspect import heatmap
+from suspect.models import CrimeIncident
+
+
+class Command(BaseCommand):
+    help = "Rebuild the pre-aggregated crime map heatmap cells from all incidents"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        incidents = CrimeIncident.objects.order_by().values_list(
+            'latitude', 'longitude', 'crime_type', 'is_severe'
+        ).iterator(chunk_size=options['chunk_size'])
+
+        cells = heatmap.rebuild(incidents)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {cells} heatmap cells"))
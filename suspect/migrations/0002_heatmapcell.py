@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suspect', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeatmapCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zoom', models.PositiveSmallIntegerField()),
+                ('cell_x', models.PositiveIntegerField()),
+                ('cell_y', models.PositiveIntegerField()),
+                ('crime_type', models.CharField(max_length=50)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('severe', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('zoom', 'cell_x', 'cell_y', 'crime_type')},
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suspect', '0002_heatmapcell'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='regionrisksummary',
+            name='is_trend_anomaly',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='regionrisksummary',
+            name='trend_baseline',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='regionrisksummary',
+            name='trend_checked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='regionrisksummary',
+            name='trend_recent_mean',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='regionrisksummary',
+            name='trend_z_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+# pg_trgm only exists on PostgreSQL; other backends fall back to the
+# in-process n-gram index in suspect.search.
+INDEXES = [
+    ('suspect_sus_first_name_trgm', 'USING gin (first_name gin_trgm_ops)'),
+    ('suspect_sus_last_name_trgm', 'USING gin (last_name gin_trgm_ops)'),
+    ('suspect_sus_alias_trgm', 'USING gin (alias gin_trgm_ops)'),
+    ('suspect_sus_national_id_prefix', '(national_id varchar_pattern_ops)'),
+]
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, definition in INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON suspect_suspect {definition}')
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suspect', '0003_regionrisksummary_trend_anomaly'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:54
+
+from django.db import migrations, models
+
+
+def backfill_fingerprint_hash(apps, schema_editor):
+    Suspect = apps.get_model('suspect', 'Suspect')
+    batch = []
+    suspects = Suspect.objects.exclude(biometric_data=None).only('id', 'biometric_data')
+    for suspect in suspects.iterator(chunk_size=2000):
+        data = suspect.biometric_data
+        value = data.get('fingerprint_hash') if isinstance(data, dict) else None
+        if value:
+            suspect.fingerprint_hash = str(value)[:128]
+            batch.append(suspect)
+        if len(batch) >= 2000:
+            Suspect.objects.bulk_update(batch, ['fingerprint_hash'])
+            batch = []
+    if batch:
+        Suspect.objects.bulk_update(batch, ['fingerprint_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suspect', '0004_suspect_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='suspect',
+            name='fingerprint_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=128, null=True),
+        ),
+        migrations.RunPython(backfill_fingerprint_hash, migrations.RunPython.noop),
+    ]
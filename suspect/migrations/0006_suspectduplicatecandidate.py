@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:55
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suspect', '0005_suspect_fingerprint_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SuspectDuplicateCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(validators=[django.core.validators.MinValueValidator(0.0), django.core.validators.MaxValueValidator(1.0)])),
+                ('blocking_key', models.CharField(max_length=100)),
+                ('status', models.CharField(choices=[('pending', 'Pending Review'), ('confirmed', 'Confirmed Duplicate'), ('dismissed', 'Dismissed')], default='pending', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('suspect_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='suspect.suspect')),
+                ('suspect_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='suspect.suspect')),
+            ],
+            options={
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['status', '-score'], name='suspect_sus_status_a7b20b_idx')],
+                'unique_together': {('suspect_a', 'suspect_b')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suspect', '0006_suspectduplicatecandidate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='suspect',
+            index=models.Index(fields=['created_at'], name='suspect_sus_created_9a1705_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+import hashlib
+
+from django.db import migrations
+
+
+def normalize_fingerprint_hash(value):
+    # Frozen copy of suspect.models.normalize_fingerprint_hash as of this migration
+    value = str(value).strip()
+    if len(value) > 128:
+        value = 'sha256:' + hashlib.sha256(value.encode()).hexdigest()
+    return value or None
+
+
+def normalize_fingerprint_hashes(apps, schema_editor):
+    # 0005 truncated long hashes to the column size; store their digest instead
+    Suspect = apps.get_model('suspect', 'Suspect')
+    batch = []
+    suspects = Suspect.objects.exclude(fingerprint_hash=None).only('id', 'biometric_data', 'fingerprint_hash')
+    for suspect in suspects.iterator(chunk_size=2000):
+        data = suspect.biometric_data
+        value = data.get('fingerprint_hash') if isinstance(data, dict) else None
+        normalized = normalize_fingerprint_hash(value) if value else None
+        if normalized != suspect.fingerprint_hash:
+            suspect.fingerprint_hash = normalized
+            batch.append(suspect)
+        if len(batch) >= 2000:
+            Suspect.objects.bulk_update(batch, ['fingerprint_hash'])
+            batch = []
+    if batch:
+        Suspect.objects.bulk_update(batch, ['fingerprint_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suspect', '0007_suspect_suspect_sus_created_9a1705_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_fingerprint_hashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+# icontains compiles to UPPER(col::text) LIKE UPPER(%s) on PostgreSQL, which
+# the plain-column indexes of 0004 cannot serve; these let the substring
+# branch of the suspect search use a bitmap index scan too.
+INDEXES = [
+    ('suspect_sus_first_name_upper_trgm', 'USING gin ((UPPER(first_name::text)) gin_trgm_ops)'),
+    ('suspect_sus_last_name_upper_trgm', 'USING gin ((UPPER(last_name::text)) gin_trgm_ops)'),
+    ('suspect_sus_alias_upper_trgm', 'USING gin ((UPPER(alias::text)) gin_trgm_ops)'),
+    ('suspect_sus_national_id_upper_trgm', 'USING gin ((UPPER(national_id::text)) gin_trgm_ops)'),
+]
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, definition in INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON suspect_suspect {definition}')
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suspect', '0008_normalize_fingerprint_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
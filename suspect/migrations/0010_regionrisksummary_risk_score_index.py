@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suspect', '0009_suspect_upper_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='regionrisksummary',
+            index=models.Index(fields=['risk_score', 'id'], name='suspect_reg_risk_sc_58c15c_idx'),
+        ),
+    ]
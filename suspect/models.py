@@ -1,7 +1,23 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+import hashlib
 import json
 
+FINGERPRINT_HASH_LENGTH = 128
+
+
+def normalize_fingerprint_hash(value):
+    """
+    Canonical form of a fingerprint hash, used both when storing and when
+    matching. Hashes too long for the column are replaced by their SHA-256
+    digest instead of being truncated, so distinct values never collide.
+    """
+    value = str(value).strip()
+    if len(value) > FINGERPRINT_HASH_LENGTH:
+        value = 'sha256:' + hashlib.sha256(value.encode()).hexdigest()
+    return value or None
+
+
 class Suspect(models.Model):
     GENDER_CHOICES = [
         ('M', 'Male'),
@@ -26,6 +42,9 @@ class Suspect(models.Model):
     biometric_data = models.JSONField(blank=True, null=True)
     behavior_patterns = models.JSONField(blank=True, null=True)
     
+    # Copied from biometric_data on save so scene matches are an index probe
+    fingerprint_hash = models.CharField(max_length=FINGERPRINT_HASH_LENGTH, blank=True, null=True, editable=False, db_index=True)
+    
     # ML Prediction fields
     predicted_risk_level = models.CharField(max_length=10, choices=RISK_LEVEL_CHOICES, blank=True, null=True)
     risk_score = models.FloatField(blank=True, null=True, validators=[MinValueValidator(0.0), MaxValueValidator(1.0)])
@@ -41,11 +60,28 @@ class Suspect(models.Model):
             models.Index(fields=['predicted_risk_level']),
             models.Index(fields=['national_id']),
             models.Index(fields=['last_prediction_date']),
+            models.Index(fields=['created_at']),
         ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.get_predicted_risk_level_display() or 'Unassessed'})"
 
+    def save(self, *args, **kwargs):
+        self.fingerprint_hash = self.extract_fingerprint_hash(self.biometric_data)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'biometric_data' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'fingerprint_hash'}
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def extract_fingerprint_hash(biometric_data):
+        """Return the fingerprint hash stored in biometric data, if any"""
+        if isinstance(biometric_data, dict):
+            value = biometric_data.get('fingerprint_hash')
+            if value:
+                return normalize_fingerprint_hash(value)
+        return None
+
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
@@ -123,9 +159,62 @@ class RegionRiskSummary(models.Model):
     most_common_crime = models.CharField(max_length=50, blank=True)
     last_updated = models.DateTimeField(auto_now=True)
     
+    # Trend anomaly detection (see detect_region_anomalies)
+    trend_recent_mean = models.FloatField(default=0.0)
+    trend_baseline = models.FloatField(default=0.0)
+    trend_z_score = models.FloatField(blank=True, null=True)
+    is_trend_anomaly = models.BooleanField(default=False, db_index=True)
+    trend_checked_at = models.DateTimeField(blank=True, null=True)
+    
     class Meta:
         ordering = ['-risk_score']
         verbose_name_plural = "Region Risk Summaries"
+        indexes = [
+            # Keyset pages of RegionRiskSummaryViewSet order by (-risk_score, -id)
+            models.Index(fields=['risk_score', 'id']),
+        ]
         
     def __str__(self):
-        return f"Region {self.region_code} - Risk: {self.risk_score:.1f}%"
\ No newline at end of file
+        return f"Region {self.region_code} - Risk: {self.risk_score:.1f}%"
+
+class HeatmapCell(models.Model):
+    """Pre-aggregated incident counts for one grid cell of the crime map at one zoom level"""
+    zoom = models.PositiveSmallIntegerField()
+    cell_x = models.PositiveIntegerField()
+    cell_y = models.PositiveIntegerField()
+    crime_type = models.CharField(max_length=50)
+    total = models.PositiveIntegerField(default=0)
+    severe = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('zoom', 'cell_x', 'cell_y', 'crime_type')
+
+    def __str__(self):
+        return f"z{self.zoom} ({self.cell_x}, {self.cell_y}) {self.crime_type}: {self.total}"
+
+
+class SuspectDuplicateCandidate(models.Model):
+    """A pair of suspect records that may describe the same person, awaiting review"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending Review'),
+        ('confirmed', 'Confirmed Duplicate'),
+        ('dismissed', 'Dismissed'),
+    ]
+
+    suspect_a = models.ForeignKey(Suspect, on_delete=models.CASCADE, related_name='+')
+    suspect_b = models.ForeignKey(Suspect, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField(validators=[MinValueValidator(0.0), MaxValueValidator(1.0)])
+    blocking_key = models.CharField(max_length=100)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    created_at = models.DateTimeField(auto_now_add=True)
+    reviewed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-score']
+        unique_together = ('suspect_a', 'suspect_b')
+        indexes = [
+            models.Index(fields=['status', '-score']),
+        ]
+
+    def __str__(self):
+        return f"{self.suspect_a_id} ~ {self.suspect_b_id} ({self.score:.2f}, {self.status})"
@@ -0,0 +1,188 @@
+import threading
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from .models import CrimeIncident
+
+# Deepest neighbourhood the API will expand
+MAX_HOPS = 4
+
+# The graph only sees link changes committed by this process; other
+# workers' changes reach it when it is reloaded after this many seconds
+MAX_AGE = 300
+
+
+class CoOffenderGraph:
+    """
+    Suspect-suspect co-offending network built from the CrimeIncident.suspects M2M.
+
+    Incident memberships and edge weights (number of shared incidents) are
+    updated incrementally as links change; the CSR adjacency used by the graph
+    queries is rematerialized lazily the first time it is needed after a change.
+    The graph is per process and reloaded once older than ``MAX_AGE``.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._members = defaultdict(set)
+        self._weights = defaultdict(Counter)
+        self._built = False
+        self._built_at = 0.0
+        self._csr = None
+        self._components = None
+
+    def build(self):
+        """Load every incident-suspect link from the M2M table"""
+        through = CrimeIncident.suspects.through
+        links = np.array(
+            list(through.objects.values_list('crimeincident_id', 'suspect_id').iterator(chunk_size=5000)),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+
+        with self._lock:
+            self._members.clear()
+            self._weights.clear()
+            if len(links):
+                incidents, incident_rows = np.unique(links[:, 0], return_inverse=True)
+                suspects, suspect_cols = np.unique(links[:, 1], return_inverse=True)
+                incidence = sparse.csr_matrix(
+                    (np.ones(len(links), dtype=np.int32), (incident_rows, suspect_cols)),
+                    shape=(len(incidents), len(suspects)),
+                )
+                adjacency = (incidence.T @ incidence).tocoo()
+                for row, col, weight in zip(adjacency.row, adjacency.col, adjacency.data):
+                    if row != col:
+                        self._weights[int(suspects[row])][int(suspects[col])] = int(weight)
+                for incident_id, suspect_id in links:
+                    self._members[int(incident_id)].add(int(suspect_id))
+            self._invalidate()
+            self._built = True
+            self._built_at = time.monotonic()
+
+    def ensure_built(self):
+        if not self._built or time.monotonic() - self._built_at > MAX_AGE:
+            self.build()
+
+    def link(self, incident_id, suspect_ids):
+        """Record suspects being added to an incident"""
+        with self._lock:
+            if not self._built:
+                return
+            members = self._members[incident_id]
+            for suspect_id in set(suspect_ids) - members:
+                for other in members:
+                    self._weights[suspect_id][other] += 1
+                    self._weights[other][suspect_id] += 1
+                members.add(suspect_id)
+            self._invalidate()
+
+    def unlink(self, incident_id, suspect_ids=None):
+        """Record suspects (default: all of them) being removed from an incident"""
+        with self._lock:
+            if not self._built or incident_id not in self._members:
+                return
+            members = self._members[incident_id]
+            for suspect_id in set(members if suspect_ids is None else suspect_ids) & members:
+                members.discard(suspect_id)
+                for other in members:
+                    for a, b in ((suspect_id, other), (other, suspect_id)):
+                        self._weights[a][b] -= 1
+                        if self._weights[a][b] <= 0:
+                            del self._weights[a][b]
+                            if not self._weights[a]:
+                                del self._weights[a]
+            if not members:
+                del self._members[incident_id]
+            self._invalidate()
+
+    def remove_suspect(self, suspect_id):
+        with self._lock:
+            if not self._built:
+                return
+            for incident_id in [i for i, members in self._members.items() if suspect_id in members]:
+                self.unlink(incident_id, [suspect_id])
+
+    def neighbourhood(self, suspect_id, hops=1):
+        """Return ({suspect id: hop distance}, [(a, b, shared incidents)]) within ``hops``"""
+        with self._lock:
+            ids, index, adjacency = self._adjacency()
+        if suspect_id not in index:
+            return {}, []
+
+        start = index[suspect_id]
+        distance = np.full(len(ids), -1, dtype=np.int64)
+        distance[start] = 0
+        frontier = np.array([start])
+        for hop in range(1, hops + 1):
+            if not len(frontier):
+                break
+            neighbours = np.concatenate([
+                adjacency.indices[adjacency.indptr[node]:adjacency.indptr[node + 1]] for node in frontier
+            ])
+            neighbours = np.unique(neighbours)
+            frontier = neighbours[distance[neighbours] < 0]
+            distance[frontier] = hop
+
+        reached = np.flatnonzero(distance > 0)
+        nodes = np.concatenate([[start], reached])
+        edges = sparse.triu(adjacency[nodes][:, nodes], k=1).tocoo()
+        return (
+            {int(ids[node]): int(distance[node]) for node in reached},
+            [(int(ids[nodes[a]]), int(ids[nodes[b]]), int(w)) for a, b, w in zip(edges.row, edges.col, edges.data)],
+        )
+
+    def shortest_path(self, source_id, target_id):
+        """Return the list of suspect ids on a shortest path, or None if unconnected"""
+        if source_id == target_id:
+            return [source_id]
+        with self._lock:
+            ids, index, adjacency = self._adjacency()
+        if source_id not in index or target_id not in index:
+            return None
+
+        _, predecessors = csgraph.shortest_path(
+            adjacency, directed=False, unweighted=True, indices=index[source_id], return_predecessors=True
+        )
+        node = index[target_id]
+        if predecessors[node] < 0:
+            return None
+        path = [node]
+        while path[-1] != index[source_id]:
+            path.append(predecessors[path[-1]])
+        return [int(ids[node]) for node in reversed(path)]
+
+    def component(self, suspect_id):
+        """Return the ids of every suspect connected to ``suspect_id``"""
+        with self._lock:
+            ids, index, adjacency = self._adjacency()
+            if self._components is None:
+                self._components = csgraph.connected_components(adjacency, directed=False)[1]
+            labels = self._components
+        if suspect_id not in index:
+            return [suspect_id]
+        return [int(i) for i in ids[labels == labels[index[suspect_id]]]]
+
+    def _adjacency(self):
+        if self._csr is None:
+            ids = np.array(sorted(self._weights), dtype=np.int64)
+            index = {int(suspect_id): i for i, suspect_id in enumerate(ids)}
+            rows, cols, data = [], [], []
+            for suspect_id, neighbours in self._weights.items():
+                for other, weight in neighbours.items():
+                    rows.append(index[suspect_id])
+                    cols.append(index[other])
+                    data.append(weight)
+            adjacency = sparse.csr_matrix((data, (rows, cols)), shape=(len(ids), len(ids)), dtype=np.int32)
+            self._csr = ids, index, adjacency
+        return self._csr
+
+    def _invalidate(self):
+        self._csr = None
+        self._components = None
+
+
+graph = CoOffenderGraph()
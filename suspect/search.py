@@ -0,0 +1,167 @@
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.functions import Greatest
+
+# Same default as pg_trgm's word_similarity_threshold
+SIMILARITY_THRESHOLD = 0.6
+
+# Most ranked matches returned by the in-process index
+MAX_RESULTS = 200
+
+# The in-process index only sees writes committed by this process; other
+# workers' writes reach it when it is reloaded after this many seconds
+MAX_AGE = 300
+
+SEARCH_FIELDS = ('first_name', 'last_name', 'alias')
+
+# Fields matched by substring, as the search always has
+SUBSTRING_FIELDS = SEARCH_FIELDS + ('national_id',)
+
+WORD_RE = re.compile(r'[^\W_]+')
+
+
+def trigrams(text):
+    """Return the pg_trgm style trigram set of a string"""
+    grams = set()
+    for word in WORD_RE.findall((text or '').lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class NgramIndex:
+    """
+    In-process trigram index over suspect names for databases without pg_trgm.
+
+    Postings map each trigram to the (suspect id, field) pairs containing it, so
+    a search only scores suspects sharing at least one trigram with the query.
+    Scores follow pg_trgm's word_similarity: the share of the query's trigrams
+    found in the name, so short queries still rank longer names.
+
+    The index is per process. Signal handlers apply committed writes, and
+    ``ensure_built`` reloads it once it is older than ``MAX_AGE`` so writes
+    made by other workers show up within that window.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = defaultdict(set)
+        self._grams = {}
+        self._built = False
+        self._built_at = 0.0
+
+    def build(self, queryset):
+        with self._lock:
+            self._postings.clear()
+            self._grams.clear()
+            for row in queryset.values_list('id', *SEARCH_FIELDS).iterator(chunk_size=2000):
+                self._add(row[0], row[1:])
+            self._built = True
+            self._built_at = time.monotonic()
+
+    def ensure_built(self, queryset):
+        if not self._built or time.monotonic() - self._built_at > MAX_AGE:
+            self.build(queryset)
+
+    def add(self, suspect):
+        with self._lock:
+            if not self._built:
+                return
+            self._remove(suspect.id)
+            self._add(suspect.id, [getattr(suspect, field) for field in SEARCH_FIELDS])
+
+    def remove(self, suspect_id):
+        with self._lock:
+            if self._built:
+                self._remove(suspect_id)
+
+    def search(self, term, threshold=SIMILARITY_THRESHOLD, limit=MAX_RESULTS):
+        """Return (suspect id, similarity) pairs ranked by descending similarity"""
+        query = trigrams(term)
+        if not query:
+            return []
+
+        with self._lock:
+            shared = Counter()
+            for gram in query:
+                shared.update(self._postings.get(gram, ()))
+
+            best = {}
+            for (suspect_id, field), count in shared.items():
+                score = count / len(query)
+                if score >= threshold and score > best.get(suspect_id, 0):
+                    best[suspect_id] = score
+
+        return sorted(best.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+    def _add(self, suspect_id, values):
+        for field, value in enumerate(values):
+            grams = trigrams(value)
+            if not grams:
+                continue
+            self._grams[(suspect_id, field)] = grams
+            for gram in grams:
+                self._postings[gram].add((suspect_id, field))
+
+    def _remove(self, suspect_id):
+        for field in range(len(SEARCH_FIELDS)):
+            for gram in self._grams.pop((suspect_id, field), ()):
+                entries = self._postings.get(gram)
+                if entries is not None:
+                    entries.discard((suspect_id, field))
+                    if not entries:
+                        del self._postings[gram]
+
+
+index = NgramIndex()
+
+
+def search_condition(term):
+    """
+    Q matching a name search on PostgreSQL. Every branch has a trigram index:
+    word similarity uses the plain-column indexes (migration 0004), substring
+    matches the UPPER(col) ones (migration 0009), so the OR stays a bitmap
+    index scan instead of falling back to a sequential scan.
+    """
+    condition = Q()
+    for field in SUBSTRING_FIELDS:
+        condition |= Q(**{f'{field}__icontains': term})
+    for field in SEARCH_FIELDS:
+        condition |= Q(**{f'{field}__trigram_word_similar': term})
+    return condition
+
+
+def search_suspects(queryset, term):
+    """Filter a suspect queryset by a search term and rank it by similarity"""
+    term = term.strip()
+    if not term:
+        return queryset
+
+    # National IDs are digits only: prefix match on the indexed column
+    if term.isdigit():
+        return queryset.filter(national_id__startswith=term).order_by('national_id')
+
+    if connection.vendor == 'postgresql':
+        return queryset.filter(search_condition(term)).annotate(
+            similarity=Greatest(*(TrigramWordSimilarity(term, field) for field in SEARCH_FIELDS))
+        ).order_by('-similarity', '-created_at')
+
+    # No trigram indexes here: substring matches plus the in-process index
+    substring = Q()
+    for field in SUBSTRING_FIELDS:
+        substring |= Q(**{f'{field}__icontains': term})
+    index.ensure_built(queryset.model.objects.all())
+    ranked = index.search(term)
+    return queryset.filter(substring | Q(id__in=[suspect_id for suspect_id, _ in ranked])).annotate(
+        similarity=Case(
+            *(When(id=suspect_id, then=Value(score)) for suspect_id, score in ranked),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    ).order_by('-similarity', '-created_at')
@@ -1,21 +1,28 @@
 from rest_framework import serializers
+from backend.fieldsets import SparseFieldsetSerializerMixin
+from backend.serializers import UpdateFieldsSerializerMixin
 from .models import Suspect, CrimeIncident, RegionRiskSummary
 
-class SuspectSerializer(serializers.ModelSerializer):
+class SuspectSerializer(SparseFieldsetSerializerMixin, UpdateFieldsSerializerMixin, serializers.ModelSerializer):
     full_name = serializers.ReadOnlyField()
     risk_color = serializers.ReadOnlyField(source='get_risk_color')
     
+    sparse_field_dependencies = {
+        'full_name': ['first_name', 'last_name'],
+        'risk_color': ['predicted_risk_level'],
+    }
+    
     class Meta:
         model = Suspect
         fields = [
             'id', 'first_name', 'last_name', 'full_name', 'alias', 
             'gender', 'age', 'national_id', 'known_addresses', 
-            'criminal_record_summary', 'biometric_data', 'behavior_patterns',
+            'criminal_record_summary', 'biometric_data', 'behavior_patterns', 'fingerprint_hash',
             'predicted_risk_level', 'risk_score', 'prediction_confidence',
             'last_prediction_date', 'risk_color', 'created_at', 'updated_at'
         ]
         read_only_fields = [
-            'predicted_risk_level', 'risk_score', 'prediction_confidence',
+            'fingerprint_hash', 'predicted_risk_level', 'risk_score', 'prediction_confidence',
             'last_prediction_date', 'created_at', 'updated_at'
         ]
 
@@ -30,8 +37,25 @@ class SuspectSerializer(serializers.ModelSerializer):
         return value
 
 
-class CrimeIncidentSerializer(serializers.ModelSerializer):
-    suspects_details = SuspectSerializer(source='suspects', many=True, read_only=True)
+class SuspectSummarySerializer(serializers.ModelSerializer):
+    """Compact suspect representation nested in incident responses"""
+    full_name = serializers.ReadOnlyField()
+    risk_color = serializers.ReadOnlyField(source='get_risk_color')
+    
+    # Columns the representation reads; incident views prefetch only these
+    PREFETCH_FIELDS = ['id', 'first_name', 'last_name', 'alias', 'predicted_risk_level', 'risk_score']
+    
+    class Meta:
+        model = Suspect
+        fields = [
+            'id', 'first_name', 'last_name', 'full_name', 'alias',
+            'predicted_risk_level', 'risk_score', 'risk_color'
+        ]
+        read_only_fields = fields
+
+
+class CrimeIncidentSerializer(SparseFieldsetSerializerMixin, UpdateFieldsSerializerMixin, serializers.ModelSerializer):
+    suspects_details = SuspectSummarySerializer(source='suspects', many=True, read_only=True)
     suspects = serializers.PrimaryKeyRelatedField(queryset=Suspect.objects.all(), many=True, required=False)
     
     class Meta:
@@ -47,6 +71,13 @@ class CrimeIncidentSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
 
+    def get_fields(self):
+        fields = super().get_fields()
+        # Suspect details are opt-in with ?expand=suspects
+        if 'suspects' not in self.context.get('expand', ()):
+            fields.pop('suspects_details', None)
+        return fields
+
     def validate_latitude(self, value):
         if not -90 <= value <= 90:
             raise serializers.ValidationError("Latitude must be between -90 and 90 degrees.")
@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from incidents import rollups
+from . import biometrics, facets, heatmap, search
+from .models import CrimeIncident, Suspect
+from .network import graph
+
+
+@receiver(post_save, sender=Suspect)
+def update_suspect_indexes(sender, instance, **kwargs):
+    # The in-process indexes only take writes that commit; see search.MAX_AGE
+    transaction.on_commit(lambda: search.index.add(instance))
+    vector = biometrics.facial_vector(instance.biometric_data)
+    transaction.on_commit(lambda: biometrics.index.upsert(instance.id, vector))
+    # After commit, so a concurrent request cannot cache the old rows under the new version
+    transaction.on_commit(facets.invalidate)
+
+
+@receiver(post_delete, sender=Suspect)
+def remove_from_suspect_indexes(sender, instance, **kwargs):
+    suspect_id = instance.id
+    transaction.on_commit(lambda: search.index.remove(suspect_id))
+    transaction.on_commit(lambda: biometrics.index.remove(suspect_id))
+    transaction.on_commit(lambda: graph.remove_suspect(suspect_id))
+    transaction.on_commit(facets.invalidate)
+
+
+@receiver(m2m_changed, sender=CrimeIncident.suspects.through)
+def update_co_offender_graph(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # Remember the links that are about to go; pk_set is empty for clears
+        instance._cleared_links = list(
+            CrimeIncident.objects.filter(suspects=instance).values_list('id', flat=True)
+            if reverse else instance.suspects.values_list('id', flat=True)
+        )
+        return
+
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_cleared_links', [])
+    elif action not in ('post_add', 'post_remove'):
+        return
+
+    update = graph.link if action == 'post_add' else graph.unlink
+    if reverse:
+        # suspect.incidents.add(...): instance is the suspect, pk_set the incidents
+        links = [(incident_id, [instance.id]) for incident_id in pk_set]
+    else:
+        links = [(instance.id, list(pk_set))]
+
+    def apply():
+        for incident_id, suspect_ids in links:
+            update(incident_id, suspect_ids)
+
+    transaction.on_commit(apply)
+
+
+@receiver(post_delete, sender=CrimeIncident)
+def remove_incident_from_graph(sender, instance, **kwargs):
+    incident_id = instance.id
+    transaction.on_commit(lambda: graph.unlink(incident_id))
+
+
+# CrimeIncident fields the crime map and trend rollups are keyed on
+AGGREGATED_FIELDS = tuple(dict.fromkeys(heatmap.AGGREGATED_FIELDS + rollups.CRIME_INCIDENT_FIELDS))
+
+
+def _aggregated_values(incident):
+    return {field: getattr(incident, field) for field in AGGREGATED_FIELDS}
+
+
+@receiver(pre_save, sender=CrimeIncident)
+def remember_aggregated_values(sender, instance, update_fields=None, **kwargs):
+    # Updates move the incident out of the cells and buckets its previous values were counted in
+    instance._aggregated_before = None
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(AGGREGATED_FIELDS):
+        return
+    instance._aggregated_before = sender.objects.filter(pk=instance.pk).values(*AGGREGATED_FIELDS).first()
+
+
+@receiver(post_save, sender=CrimeIncident)
+def update_incident_aggregations(sender, instance, created, **kwargs):
+    after = _aggregated_values(instance)
+    before = getattr(instance, '_aggregated_before', None)
+    if created:
+        heatmap.record_incident(after)
+        rollups.record_crime_incident(after)
+    elif before:
+        heatmap.move_incident(before, after)
+        rollups.move(rollups.record_crime_incident, rollups.CRIME_INCIDENT_FIELDS, before, after)
+
+
+@receiver(post_delete, sender=CrimeIncident)
+def remove_incident_from_aggregations(sender, instance, **kwargs):
+    values = _aggregated_values(instance)
+    heatmap.record_incident(values, sign=-1)
+    rollups.record_crime_incident(values, sign=-1)
@@ -1,3 +1,724 @@
+from importlib import import_module
+
+import numpy as np
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from authapi.models import User
+from . import anomalies, biometrics, deduplication, facets, heatmap, network, search
+from .models import Suspect, CrimeIncident, HeatmapCell, SuspectDuplicateCandidate
+from .views import CrimeIncidentViewSet, SuspectViewSet, heatmap_tile
+
+
+class CrimeIncidentListQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='officer', email='officer@example.com', password='secret', role='Police'
+        )
+        suspects = [
+            Suspect.objects.create(
+                first_name='Suspect', last_name=str(i), gender='M', age=30,
+                national_id=str(100000 + i), known_addresses='Kigali',
+                criminal_record_summary='First time offense',
+                biometric_data={'fingerprint_hash': f'fp_{i}'},
+            )
+            for i in range(6)
+        ]
+        for i in range(30):
+            incident = CrimeIncident.objects.create(
+                incident_id=f'INC-{i:04d}', crime_type='theft', location_type='public',
+                latitude=-1.95, longitude=30.06, region_code='101', description='Test incident',
+                is_severe=i % 2 == 0,
+            )
+            incident.suspects.set(suspects[i % 4:i % 4 + 3])
+
+    def list_queries(self, action='list', **params):
+        request = APIRequestFactory().get('/api/incidents/', params)
+        force_authenticate(request, user=self.user)
+        view = CrimeIncidentViewSet.as_view({'get': action})
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request)
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_query_count_constant_in_page_size(self):
+        _, small = self.list_queries(page_size=5)
+        _, large = self.list_queries(page_size=25)
+        self.assertEqual(small, large)
+
+    def test_expanded_query_count_constant_in_page_size(self):
+        _, small = self.list_queries(page_size=5, expand='suspects')
+        response, large = self.list_queries(page_size=25, expand='suspects')
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.data['results'][0]['suspects_details']), 3)
+
+    def test_severe_incidents_paginated(self):
+        response, _ = self.list_queries(action='severe_incidents', page_size=5)
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertNotIn('count', response.data)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_suspect_details_opt_in(self):
+        response, _ = self.list_queries(page_size=5)
+        incident = response.data['results'][0]
+        self.assertNotIn('suspects_details', incident)
+        self.assertEqual(len(incident['suspects']), 3)
+
+        response, _ = self.list_queries(page_size=5, expand='suspects')
+        details = response.data['results'][0]['suspects_details'][0]
+        self.assertNotIn('biometric_data', details)
+        self.assertIn('full_name', details)
+
+
+class SuspectSparseFieldsetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='analyst', email='analyst@example.com', password='secret', role='Admin'
+        )
+        Suspect.objects.create(
+            first_name='Jean', last_name='Doe', gender='M', age=30, national_id='200000',
+            known_addresses='Kigali', criminal_record_summary='First time offense',
+            biometric_data={'fingerprint_hash': 'fp_sparse'},
+        )
+
+    def list_suspects(self, **params):
+        request = APIRequestFactory().get('/api/suspects/', params)
+        force_authenticate(request, user=self.user)
+        view = SuspectViewSet.as_view({'get': 'list'})
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request)
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        return response.data['results'], [q['sql'] for q in queries if 'suspect_suspect' in q['sql']]
+
+    def test_fields_limits_response_and_columns(self):
+        data, queries = self.list_suspects(fields='id,full_name')
+        self.assertEqual(data[0], {'id': data[0]['id'], 'full_name': 'Jean Doe'})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('biometric_data', queries[0])
+        self.assertNotIn('criminal_record_summary', queries[0])
+
+    def test_omit_drops_fields(self):
+        data, queries = self.list_suspects(omit='biometric_data,behavior_patterns')
+        self.assertNotIn('biometric_data', data[0])
+        self.assertIn('risk_color', data[0])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('biometric_data', queries[0])
+
+
+class SuspectFacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='facets', email='facets@example.com', password='secret', role='Admin'
+        )
+        for i, (gender, age, risk) in enumerate([('M', 16, 'high'), ('F', 30, 'low'), ('M', 45, None)]):
+            Suspect.objects.create(
+                first_name='Facet', last_name=str(i), gender=gender, age=age, national_id=str(300000 + i),
+                known_addresses='Kigali', criminal_record_summary='First time offense',
+                predicted_risk_level=risk, risk_score=0.9 if risk == 'high' else None,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def facets(self, **params):
+        request = APIRequestFactory().get('/api/suspects/facets/', params)
+        force_authenticate(request, user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = SuspectViewSet.as_view({'get': 'facets'})(request)
+        self.assertEqual(response.status_code, 200)
+        return response.data, [q['sql'] for q in queries if 'suspect_suspect' in q['sql']]
+
+    def test_single_query_then_cached(self):
+        data, queries = self.facets()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(data['total_suspects'], 3)
+        self.assertEqual(data['gender'], {'M': 2, 'F': 1, 'O': 0})
+        self.assertEqual(data['age_bands']['under_18'], 1)
+        self.assertEqual(data['risk_levels']['high']['count'], 1)
+        self.assertEqual(data['risk_levels']['unassessed']['count'], 1)
+
+        _, queries = self.facets()
+        self.assertEqual(queries, [])
+
+    def test_filters_cached_separately(self):
+        data, _ = self.facets(gender='M')
+        self.assertEqual(data['total_suspects'], 2)
+        data, _ = self.facets(gender='F')
+        self.assertEqual(data['total_suspects'], 1)
+
+    def test_suspect_write_invalidates(self):
+        self.facets()
+        suspect = Suspect.objects.get(national_id='300002')
+        suspect.predicted_risk_level = 'medium'
+        suspect.save()
+        # Still cached until the write commits
+        _, queries = self.facets()
+        self.assertEqual(queries, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            suspect.save()
+        data, queries = self.facets()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(data['risk_levels']['medium']['count'], 1)
+
+    def test_evicted_version_never_repeats(self):
+        self.facets()
+        old_key = facets.cache_key({})
+        cache.delete(facets.VERSION_KEY)
+        facets.invalidate()
+        self.assertNotEqual(facets.cache_key({}), old_key)
+        _, queries = self.facets()
+        self.assertEqual(len(queries), 1)
+
+    def test_risk_statistics_order(self):
+        request = APIRequestFactory().get('/api/suspects/risk_statistics/')
+        force_authenticate(request, user=self.user)
+        response = SuspectViewSet.as_view({'get': 'risk_statistics'})(request)
+        self.assertEqual(response.data['total_suspects'], 3)
+        self.assertEqual(response.data['risk_breakdown'], [
+            {'predicted_risk_level': 'high', 'count': 1},
+            {'predicted_risk_level': 'low', 'count': 1},
+            {'predicted_risk_level': None, 'count': 1},
+        ])
+
+
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='pager', email='pager@example.com', password='secret', role='Police'
+        )
+        for i in range(45):
+            CrimeIncident.objects.create(
+                incident_id=f'PAGE-{i:04d}', crime_type='theft', location_type='public',
+                latitude=-1.95, longitude=30.06, region_code='102', description='Test incident',
+            )
+
+    def get(self, url, **params):
+        request = APIRequestFactory().get(url, params)
+        force_authenticate(request, user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = CrimeIncidentViewSet.as_view({'get': 'list'})(request)
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        return response.data, [q['sql'] for q in queries]
+
+    def test_walks_every_row_once_without_count(self):
+        seen = []
+        data, queries = self.get('/api/incidents/', page_size=10)
+        while True:
+            seen.extend(incident['incident_id'] for incident in data['results'])
+            self.assertFalse(any('COUNT(' in sql.upper() for sql in queries))
+            if not data['next']:
+                break
+            data, queries = self.get(data['next'])
+        self.assertEqual(len(seen), 45)
+        self.assertEqual(len(set(seen)), 45)
+        self.assertEqual(seen[0], 'PAGE-0044')
+
+
+class SuspectWriteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='writer', email='writer@example.com', password='secret', role='Police'
+        )
+
+    def send(self, method, action, data, **kwargs):
+        request = getattr(APIRequestFactory(), method)('/api/suspects/', data, format='json')
+        force_authenticate(request, user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = SuspectViewSet.as_view({method: action})(request, **kwargs)
+        writes = [q['sql'] for q in queries if q['sql'].startswith(('INSERT', 'UPDATE')) and 'suspect_suspect' in q['sql']]
+        return response, writes
+
+    def test_create_is_single_insert(self):
+        response, writes = self.send('post', 'create', {
+            'first_name': 'Eric', 'last_name': 'Mugisha', 'gender': 'M', 'age': 28,
+            'national_id': '400000', 'known_addresses': 'Kigali',
+            'criminal_record_summary': 'Two prior theft convictions',
+            'biometric_data': {'fingerprint_hash': 'fp_write'},
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith('INSERT'))
+        self.assertEqual(response.data['fingerprint_hash'], 'fp_write')
+
+    def test_partial_update_writes_changed_columns(self):
+        suspect = Suspect.objects.create(
+            first_name='Eric', last_name='Mugisha', gender='M', age=28, national_id='400001',
+            known_addresses='Kigali', criminal_record_summary='Two prior theft convictions',
+        )
+        response, writes = self.send('patch', 'partial_update', {'alias': 'Rick', 'age': 28}, pk=suspect.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(writes), 1)
+        self.assertIn('"alias"', writes[0])
+        self.assertNotIn('"age"', writes[0])
+        self.assertNotIn('"criminal_record_summary"', writes[0])
+        self.assertEqual(Suspect.objects.get(pk=suspect.pk).alias, 'Rick')
+
+
+class HeatmapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='officer', email='officer@example.com', password='secret', role='Police'
+        )
+
+    def incident(self, number, latitude=-1.95, longitude=30.06, crime_type='theft', is_severe=False):
+        return CrimeIncident.objects.create(
+            incident_id=f'MAP-{number:04d}', crime_type=crime_type, location_type='public',
+            latitude=latitude, longitude=longitude, region_code='101', description='Test incident',
+            is_severe=is_severe,
+        )
+
+    def cells(self, zoom=heatmap.MAX_ZOOM):
+        return set(
+            HeatmapCell.objects.filter(zoom=zoom, total__gt=0)
+            .values_list('cell_x', 'cell_y', 'crime_type', 'total', 'severe')
+        )
+
+    def rebuilt_cells(self):
+        incidents = CrimeIncident.objects.values_list('latitude', 'longitude', 'crime_type', 'is_severe')
+        heatmap.rebuild(incidents)
+        return self.cells()
+
+    def test_cell_grid(self):
+        self.assertEqual(heatmap.cell_for(0.0, 0.0, 0), (8, 8))
+        self.assertEqual(heatmap.cell_for(90.0, -180.0, 0), (0, 0))
+        self.assertEqual(heatmap.cell_for(-90.0, 180.0, 0), (15, 15))
+
+        cell_x, cell_y = heatmap.cell_for(-1.95, 30.06, 10)
+        latitude, longitude = heatmap.cell_center(cell_x, cell_y, 10)
+        self.assertEqual(heatmap.cell_for(latitude, longitude, 10), (cell_x, cell_y))
+        self.assertAlmostEqual(latitude, -1.95, places=1)
+        self.assertAlmostEqual(longitude, 30.06, places=1)
+
+    def test_signals_keep_cells_current(self):
+        first = self.incident(1, is_severe=True)
+        self.incident(2)
+        self.assertEqual(HeatmapCell.objects.filter(zoom=0).get().total, 2)
+        self.assertEqual(HeatmapCell.objects.filter(zoom=0).get().severe, 1)
+
+        # Moving, retyping and deleting incidents follow the edit
+        first.latitude, first.longitude, first.is_severe = 48.85, 2.35, False
+        first.save()
+        first.crime_type = 'fraud'
+        first.save(update_fields=['crime_type'])
+        CrimeIncident.objects.get(incident_id='MAP-0002').delete()
+        self.incident(3, crime_type='assault')
+
+        cells = self.cells()
+        self.assertEqual({(crime_type, total, severe) for _, _, crime_type, total, severe in cells},
+                         {('fraud', 1, 0), ('assault', 1, 0)})
+        self.assertEqual(cells, self.rebuilt_cells())
+
+    def test_unrelated_update_skips_lookup(self):
+        incident = self.incident(1)
+        incident.description = 'Updated description'
+        with CaptureQueriesContext(connection) as queries:
+            incident.save(update_fields=['description'])
+        self.assertEqual(len(queries), 1)
+
+    def test_tile(self):
+        self.incident(1, is_severe=True)
+        self.incident(2, crime_type='fraud')
+        self.incident(3, latitude=48.85, longitude=2.35)
+
+        cell_x, cell_y = heatmap.cell_for(-1.95, 30.06, 4)
+        size = 2 ** heatmap.CELL_BITS
+        request = APIRequestFactory().get('/api/heatmap/')
+        force_authenticate(request, user=self.user)
+        response = heatmap_tile(request, 4, cell_x // size, cell_y // size)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age=60', response['Cache-Control'])
+        [cell] = response.data['cells']
+        self.assertEqual((cell['total'], cell['severe']), (2, 1))
+        self.assertEqual(cell['crime_types'], {'theft': 1, 'fraud': 1})
+
+        for z, x, y in [(heatmap.MAX_ZOOM + 1, 0, 0), (2, 4, 0), (2, 0, -1)]:
+            request = APIRequestFactory().get('/api/heatmap/')
+            force_authenticate(request, user=self.user)
+            self.assertEqual(heatmap_tile(request, z, x, y).status_code, 400)
+
+
+class AnomalyDetectionTests(TestCase):
+    def counts(self, recent):
+        """Three regions over 8 weeks of history followed by the given recent week"""
+        weekly = np.array([2, 3, 2, 3, 2, 5, 4], dtype=float)
+        history = np.tile(weekly, 8)
+        return np.array([
+            np.concatenate([history, recent]),
+            np.concatenate([history, weekly]),
+            np.zeros(len(history) + len(recent)),
+        ])
+
+    def test_flags_spike_only(self):
+        results = anomalies.detect(self.counts(np.full(7, 12.0)))
+        self.assertEqual(results['is_anomaly'].tolist(), [True, False, False])
+        self.assertAlmostEqual(results['baseline'][1], 3.0)
+        self.assertAlmostEqual(results['recent_mean'][0], 12.0)
+
+    def test_min_recent_total(self):
+        counts = np.zeros((1, 21))
+        counts[0, -1] = 2
+        results = anomalies.detect(counts, recent_days=1, min_recent_total=3)
+        self.assertFalse(results['is_anomaly'][0])
+
+    def test_invalid_windows(self):
+        counts = self.counts(np.full(7, 12.0))
+        for recent_days in (0, -3):
+            with self.assertRaises(ValueError):
+                anomalies.detect(counts, recent_days=recent_days)
+        with self.assertRaises(ValueError):
+            anomalies.detect(counts[:, -20:], recent_days=7)
+        # A window longer than the history would leave no rolling means to compare against
+        with self.assertRaises(ValueError):
+            anomalies.detect(counts[:, -45:], recent_days=25)
+
+    def test_command_validates_options(self):
+        with self.assertRaises(CommandError):
+            call_command('detect_region_anomalies', recent_days=0)
+        with self.assertRaises(CommandError):
+            call_command('detect_region_anomalies', history_days=7)
+        with self.assertRaises(CommandError):
+            call_command('detect_region_anomalies', history_days=14, recent_days=30)
+
+
+class SuspectSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='searcher', email='searcher@example.com', password='secret', role='Police'
+        )
+        for national_id, first_name, last_name, alias in [
+            ('1199880012345678', 'Johnathan', 'Mugisha', ''),
+            ('1199970087654321', 'Alice', 'Uwase', 'Ally'),
+            ('1200080055554444', 'Eric', 'Habimana', 'Joker'),
+        ]:
+            Suspect.objects.create(
+                first_name=first_name, last_name=last_name, alias=alias, gender='M', age=30,
+                national_id=national_id, known_addresses='Kigali', criminal_record_summary='None',
+            )
+
+    def setUp(self):
+        # A fresh index per test, loaded from this test's data
+        original = search.index
+        search.index = search.NgramIndex()
+        self.addCleanup(setattr, search, 'index', original)
+
+    def search(self, term):
+        request = APIRequestFactory().get('/api/suspects/', {'search': term})
+        force_authenticate(request, user=self.user)
+        response = SuspectViewSet.as_view({'get': 'list'})(request)
+        self.assertEqual(response.status_code, 200)
+        return [f"{row['first_name']} {row['last_name']}" for row in response.data['results']]
+
+    def test_short_prefix_matches_long_name(self):
+        # 'Jo' is far below plain trigram similarity to 'Johnathan'
+        self.assertCountEqual(self.search('Jo'), ['Johnathan Mugisha', 'Eric Habimana'])
+        self.assertEqual(self.search('Johnat'), ['Johnathan Mugisha'])
+
+    def test_misspelt_name(self):
+        self.assertEqual(self.search('Mugsha'), ['Johnathan Mugisha'])
+        self.assertEqual(self.search('Uwasse'), ['Alice Uwase'])
+
+    def test_national_id_prefix(self):
+        self.assertEqual(self.search('1199880012345678'), ['Johnathan Mugisha'])
+        self.assertEqual(self.search('11999'), ['Alice Uwase'])
+        self.assertEqual(self.search('8765'), [])
+
+        # A single prefix lookup, which the national_id pattern index can serve
+        [lookup] = search.search_suspects(Suspect.objects.all(), '11999').query.where.children
+        self.assertEqual((lookup.lhs.target.name, lookup.lookup_name, lookup.rhs), ('national_id', 'startswith', '11999'))
+
+    def test_postgresql_branches_are_indexed(self):
+        trigram = import_module('suspect.migrations.0004_suspect_trigram_indexes').INDEXES
+        upper = import_module('suspect.migrations.0009_suspect_upper_trigram_indexes').INDEXES
+        indexed = {
+            'trigram_word_similar': {definition.split('(')[1].split()[0] for _, definition in trigram},
+            'icontains': {definition.split('UPPER(')[1].split('::')[0] for _, definition in upper},
+        }
+        lookups = [child[0].split('__') for child in search.search_condition('Jo').children]
+        self.assertEqual(len(lookups), len(search.SUBSTRING_FIELDS) + len(search.SEARCH_FIELDS))
+        for field, lookup in lookups:
+            self.assertIn(field, indexed[lookup])
+
+    def test_index_follows_committed_writes_only(self):
+        search.index.build(Suspect.objects.all())
+        suspect = Suspect.objects.get(first_name='Alice')
+        suspect.last_name = 'Ingabire'
+        suspect.save()
+        # Not applied until the transaction commits
+        self.assertEqual([i for i, _ in search.index.search('Ingabire')], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            suspect.save()
+        self.assertEqual([i for i, _ in search.index.search('Ingabire')], [suspect.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            suspect.delete()
+        self.assertEqual(search.index.search('Ingabire'), [])
+
+    def test_stale_index_is_reloaded(self):
+        search.index.build(Suspect.objects.none())
+        self.assertEqual(self.search('Habimna'), [])
+        search.index._built_at -= search.MAX_AGE + 1
+        self.assertEqual(self.search('Habimna'), ['Eric Habimana'])
+
+
+class FacialSimilarityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='biometrics', email='biometrics@example.com', password='secret', role='Police'
+        )
+        cls.suspects = [
+            Suspect.objects.create(
+                first_name=f'Face{i}', last_name='Test', gender='M', age=30, national_id=f'5000{i}',
+                known_addresses='Kigali', criminal_record_summary='None',
+                biometric_data={'facial_features': features} if features else {},
+            )
+            for i, features in enumerate([
+                {'eye_distance': 60.0, 'nose_width': 30.0},
+                {'eye_distance': 61.0, 'nose_width': 30.0},
+                {'eye_distance': 70.0, 'nose_width': 35.0},
+                {'eye_distance': 'wide', 'nose_width': 30.0},
+                None,
+            ])
+        ]
+
+    def setUp(self):
+        original = biometrics.index
+        biometrics.index = biometrics.FacialFeatureIndex(capacity=2)
+        self.addCleanup(setattr, biometrics, 'index', original)
+
+    def similar(self, **params):
+        request = APIRequestFactory().get('/api/suspects/similar/', params)
+        force_authenticate(request, user=self.user)
+        return SuspectViewSet.as_view({'get': 'similar'})(request)
+
+    def test_nearest_to_suspect(self):
+        response = self.similar(suspect_id=self.suspects[0].id, k=5)
+        self.assertEqual(response.status_code, 200)
+        # Incomplete or non-numeric features are not indexed, and the suspect itself is excluded
+        self.assertEqual([r['suspect']['id'] for r in response.data['results']],
+                         [self.suspects[1].id, self.suspects[2].id])
+        self.assertAlmostEqual(response.data['results'][0]['distance'], 1.0)
+
+    def test_nearest_to_measurements(self):
+        response = self.similar(eye_distance=69, nose_width=35, k=1)
+        self.assertEqual([r['suspect']['id'] for r in response.data['results']], [self.suspects[2].id])
+
+    def test_invalid_parameters(self):
+        for k in ('0', '-1', '101', 'many'):
+            self.assertEqual(self.similar(suspect_id=self.suspects[0].id, k=k).status_code, 400)
+        self.assertEqual(self.similar(eye_distance=60).status_code, 400)
+        self.assertEqual(self.similar(suspect_id=self.suspects[4].id).status_code, 404)
+
+    def test_index_upkeep(self):
+        index = biometrics.index
+        index.build(Suspect.objects.all())
+        first, second, third = self.suspects[:3]
+        index.remove(first.id)
+        # The last row moves into the freed slot
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.nearest([60, 30], k=1), [(second.id, 1.0)])
+
+        third.biometric_data = {'facial_features': {'eye_distance': 60.0, 'nose_width': 30.0}}
+        third.save()
+        self.assertEqual(index.nearest([60, 30], k=1), [(second.id, 1.0)])
+        with self.captureOnCommitCallbacks(execute=True):
+            third.save()
+        self.assertEqual(index.nearest([60, 30], k=1), [(third.id, 0.0)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            third.delete()
+        self.assertEqual([i for i, _ in index.nearest([60, 30], k=5)], [second.id])
+
+
+class FingerprintLookupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='prints', email='prints@example.com', password='secret', role='Police'
+        )
+        cls.long_hash = 'f' * 200
+        cls.suspects = [
+            Suspect.objects.create(
+                first_name=f'Print{i}', last_name='Test', gender='M', age=30, national_id=f'6000{i}',
+                known_addresses='Kigali', criminal_record_summary='None',
+                biometric_data={'fingerprint_hash': fingerprint},
+            )
+            for i, fingerprint in enumerate([' fp_scene ', cls.long_hash, cls.long_hash[:128]])
+        ]
+
+    def lookup(self, method, data=None, **params):
+        factory = APIRequestFactory()
+        if method == 'post':
+            request = factory.post('/api/suspects/by_fingerprint/', data, format='json')
+        else:
+            request = factory.get('/api/suspects/by_fingerprint/', params)
+        force_authenticate(request, user=self.user)
+        return SuspectViewSet.as_view({method: 'by_fingerprint'})(request)
+
+    def test_stored_hash_is_normalized(self):
+        self.assertEqual(self.suspects[0].fingerprint_hash, 'fp_scene')
+        self.assertTrue(self.suspects[1].fingerprint_hash.startswith('sha256:'))
+        self.assertEqual(self.suspects[2].fingerprint_hash, self.long_hash[:128])
+
+    def test_batch_lookup(self):
+        response = self.lookup('post', {'hashes': ['fp_scene', self.long_hash, 'fp_unknown']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['matches']), {'fp_scene', self.long_hash})
+        # A long hash only matches itself, not a suspect whose hash is its prefix
+        self.assertEqual([s['id'] for s in response.data['matches'][self.long_hash]], [self.suspects[1].id])
+        self.assertEqual(response.data['unmatched'], ['fp_unknown'])
+
+        response = self.lookup('get', hash=f' fp_scene ,{self.long_hash[:128]}')
+        self.assertEqual(set(response.data['matches']), {'fp_scene', self.long_hash[:128]})
+
+    def test_invalid_bodies(self):
+        for data in (['fp_scene'], {'hashes': 'fp_scene'}, {'hashes': [1]}, {'hashes': [' ']}):
+            self.assertEqual(self.lookup('post', data).status_code, 400)
+        self.assertEqual(self.lookup('get').status_code, 400)
+
+
+class DeduplicationTests(TestCase):
+    def test_soundex(self):
+        for name, code in [('Robert', 'R163'), ('Rupert', 'R163'), ('Ashcraft', 'A261'),
+                           ('Tymczak', 'T522'), ('Pfister', 'P236'), ('Lee', 'L000'), ('', '')]:
+            self.assertEqual(deduplication.soundex(name), code)
+
+    def test_finds_phonetic_duplicates(self):
+        rows = [
+            (1, 'Jean', 'Mugisha', 'M', 30, 'Kimironko, Kigali'),
+            (2, 'Jeane', 'Mugisha', 'M', 31, 'Kimironko Kigali'),
+            (3, 'Alice', 'Uwase', 'F', 30, 'Kimironko, Kigali'),
+        ]
+        candidates, split = deduplication.find_candidates(rows)
+        self.assertEqual(list(candidates), [(1, 2)])
+        self.assertEqual(split, 0)
+        self.assertGreaterEqual(candidates[(1, 2)][0], deduplication.DEFAULT_THRESHOLD)
+
+    def test_oversized_blocks_are_split_not_skipped(self):
+        # Everyone shares the address block; first initials and ages split it
+        rows = [(i, f'{chr(65 + i % 20)}name', 'Habimana', 'M', 20 + i % 3, 'Kigali') for i in range(60)]
+        rows += [(100, 'Eric', 'Habimana', 'M', 40, 'Kigali'), (101, 'Eric', 'Habimana', 'M', 40, 'Kigali')]
+        candidates, split = deduplication.find_candidates(rows, max_block=4)
+        self.assertGreater(split, 0)
+        self.assertIn((100, 101), candidates)
+
+    def test_sorted_neighbourhood_fallback(self):
+        # Identical initial and age: only the window fallback can bound the blocks
+        rows = [(i, 'Eric', f'Habimana{"x" * (i // 2)}', 'M', 40, 'Kigali') for i in range(12)]
+        blocks = list(deduplication.split_block('addr', list(range(12)), list(deduplication.prepare(rows)), 4))
+        self.assertTrue(all(len(members) <= 4 for _, members in blocks))
+        candidates, _ = deduplication.find_candidates(rows, max_block=4)
+        self.assertTrue({(i, i + 1) for i in range(0, 12, 2)} <= set(candidates))
+        with self.assertRaises(ValueError):
+            deduplication.find_candidates(rows, max_block=1)
+
+    def test_store_refreshes_scores_and_keeps_review(self):
+        a, b = (
+            Suspect.objects.create(
+                first_name='Eric', last_name='Habimana', gender='M', age=40, national_id=f'7000{i}',
+                known_addresses='Kigali', criminal_record_summary='None',
+            )
+            for i in range(2)
+        )
+        deduplication.store({(a.id, b.id): (0.8, 'name:E165H155:age4')})
+        SuspectDuplicateCandidate.objects.update(status='confirmed')
+        deduplication.store({(a.id, b.id): (0.95, 'addr:H155:kigali')})
+
+        candidate = SuspectDuplicateCandidate.objects.get()
+        self.assertEqual((candidate.score, candidate.blocking_key, candidate.status),
+                         (0.95, 'addr:H155:kigali', 'confirmed'))
+
+
+class CoOffenderNetworkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='network', email='network@example.com', password='secret', role='Police'
+        )
+        cls.suspects = [
+            Suspect.objects.create(
+                first_name=f'Link{i}', last_name='Test', gender='M', age=30, national_id=f'8000{i}',
+                known_addresses='Kigali', criminal_record_summary='None',
+            )
+            for i in range(5)
+        ]
+        cls.ids = [suspect.id for suspect in cls.suspects]
+        cls.incidents = [
+            CrimeIncident.objects.create(
+                incident_id=f'NET-{i:04d}', crime_type='theft', location_type='public',
+                latitude=-1.95, longitude=30.06, region_code='101', description='Test incident',
+            )
+            for i in range(3)
+        ]
+        # 0-1 twice, 1-2 once; 3 and 4 are unlinked
+        cls.incidents[0].suspects.add(*cls.ids[:2])
+        cls.incidents[1].suspects.add(*cls.ids[:3])
+
+    def setUp(self):
+        network.graph.build()
+
+    def test_queries(self):
+        a, b, c, d, _ = self.ids
+        distances, edges = network.graph.neighbourhood(a, hops=1)
+        self.assertEqual(distances, {b: 1, c: 1})
+        self.assertEqual(sorted(edges), [(a, b, 2), (a, c, 1), (b, c, 1)])
+        self.assertEqual(network.graph.shortest_path(a, c), [a, c])
+        self.assertIsNone(network.graph.shortest_path(a, d))
+        self.assertEqual(sorted(network.graph.component(b)), [a, b, c])
+        self.assertEqual(network.graph.component(d), [d])
+
+    def test_incremental_updates_match_rebuild(self):
+        a, b, c, d, e = self.ids
+        with self.captureOnCommitCallbacks(execute=True):
+            self.incidents[2].suspects.add(c, d)
+            self.suspects[4].incidents.add(self.incidents[2])
+            self.suspects[1].incidents.remove(self.incidents[1])
+        self.assertEqual(network.graph.shortest_path(a, e), [a, c, e])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.incidents[0].suspects.clear()
+            self.suspects[2].delete()
+        incremental = {i: network.graph.neighbourhood(i, hops=2) for i in self.ids}
+        network.graph.build()
+        self.assertEqual(incremental, {i: network.graph.neighbourhood(i, hops=2) for i in self.ids})
+        self.assertEqual(sorted(network.graph.component(d)), [d, e])
+
+    def test_uncommitted_links_are_not_applied(self):
+        a, _, _, d, _ = self.ids
+        self.incidents[2].suspects.add(a, d)
+        self.assertIsNone(network.graph.shortest_path(a, d))
+
+    def test_stale_graph_is_reloaded(self):
+        a, _, _, d, _ = self.ids
+        CrimeIncident.suspects.through.objects.create(crimeincident=self.incidents[2], suspect_id=a)
+        CrimeIncident.suspects.through.objects.create(crimeincident=self.incidents[2], suspect_id=d)
+        network.graph.ensure_built()
+        self.assertIsNone(network.graph.shortest_path(a, d))
+        network.graph._built_at -= network.MAX_AGE + 1
+        network.graph.ensure_built()
+        self.assertEqual(network.graph.shortest_path(a, d), [a, d])
 
-# Create your tests here.
+    def test_network_endpoint(self):
+        a, b, c, _, _ = self.ids
+        request = APIRequestFactory().get(f'/api/suspects/{a}/network/', {'hops': 9})
+        force_authenticate(request, user=self.user)
+        response = SuspectViewSet.as_view({'get': 'network'})(request, pk=a)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['hops'], network.MAX_HOPS)
+        self.assertEqual([row['id'] for row in response.data['co_offenders']], [b, c])
@@ -8,5 +8,6 @@ router.register(r'incidents', views.CrimeIncidentViewSet)
 router.register(r'region-risks', views.RegionRiskSummaryViewSet)
 
 urlpatterns = [
+    path('map/tiles/<int:z>/<int:x>/<int:y>/', views.heatmap_tile, name='heatmap-tile'),
     path('', include(router.urls)),
-]
\ No newline at end of file
+]
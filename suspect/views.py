@@ -1,76 +1,277 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q, Count, Avg
+from django.db.models import Q, Count, Prefetch
 from django.utils import timezone
-from .models import Suspect, CrimeIncident, RegionRiskSummary
-from .serializers import SuspectSerializer, CrimeIncidentSerializer, RegionRiskSummarySerializer
+from django.utils.cache import patch_cache_control
+from backend.fieldsets import SparseFieldsetQuerysetMixin
+from .models import Suspect, CrimeIncident, RegionRiskSummary, normalize_fingerprint_hash
+from .serializers import (
+    SuspectSerializer, SuspectSummarySerializer,
+    CrimeIncidentSerializer, RegionRiskSummarySerializer
+)
 from .ml_predictor import predictor
+from .search import search_suspects
+from . import biometrics, facets, heatmap, network
 import logging
 
 logger = logging.getLogger(__name__)
 
-class SuspectViewSet(viewsets.ModelViewSet):
+class SuspectViewSet(SparseFieldsetQuerysetMixin, viewsets.ModelViewSet):
     queryset = Suspect.objects.all()
     serializer_class = SuspectSerializer
     permission_classes = [IsAuthenticated]
     
+    MAX_FINGERPRINT_BATCH = 1000
+    MAX_SIMILAR = 100
+    
+    def get_cursor_ordering(self):
+        """Page search results in rank order, everything else newest first"""
+        search = self.request.query_params.get('search', '').strip()
+        if not search:
+            return ('-created_at',)
+        if search.isdigit():
+            return ('national_id',)
+        return ('-similarity', '-created_at')
+    
     def perform_create(self, serializer):
-        # Save the suspect first
-        suspect = serializer.save()
-        
-        # Generate ML prediction
-        risk_level, risk_score = predictor.predict_suspect_risk(suspect.criminal_record_summary)
-        
-        if risk_level and risk_score:
-            suspect.predicted_risk_level = risk_level
-            suspect.risk_score = risk_score
-            suspect.prediction_confidence = 0.85  # Default confidence
-            suspect.save()
-            logger.info(f"Suspect {suspect.id} created with risk level: {risk_level}")
+        # Predict from the validated data so the suspect is inserted once
+        prediction = self._predict_risk(serializer.validated_data.get('criminal_record_summary'))
+        suspect = serializer.save(**prediction)
+        
+        if prediction:
+            logger.info(f"Suspect {suspect.id} created with risk level: {suspect.predicted_risk_level}")
         else:
             logger.warning(f"Could not generate prediction for suspect {suspect.id}")
     
     def perform_update(self, serializer):
-        # Save the updated suspect
-        suspect = serializer.save()
-        
         # Regenerate ML prediction if criminal record changed
+        prediction = {}
         if 'criminal_record_summary' in serializer.validated_data:
-            risk_level, risk_score = predictor.predict_suspect_risk(suspect.criminal_record_summary)
-            
-            if risk_level and risk_score:
-                suspect.predicted_risk_level = risk_level
-                suspect.risk_score = risk_score
-                suspect.prediction_confidence = 0.85
-                suspect.save()
-                logger.info(f"Suspect {suspect.id} updated with new risk level: {risk_level}")
+            prediction = self._predict_risk(serializer.validated_data['criminal_record_summary'])
+        
+        suspect = serializer.save(**prediction)
+        if prediction:
+            logger.info(f"Suspect {suspect.id} updated with new risk level: {suspect.predicted_risk_level}")
+    
+    def _predict_risk(self, criminal_record_summary):
+        """Return the ML prediction fields for a criminal record, or {} if unavailable"""
+        risk_level, risk_score = predictor.predict_suspect_risk(criminal_record_summary)
+        if not (risk_level and risk_score):
+            return {}
+        return {
+            'predicted_risk_level': risk_level,
+            'risk_score': risk_score,
+            'prediction_confidence': 0.85,  # Default confidence
+        }
     
     @action(detail=False, methods=['get'])
     def high_risk(self, request):
         """Get all high-risk suspects"""
-        high_risk_suspects = self.queryset.filter(predicted_risk_level='high')
+        high_risk_suspects = self.get_queryset().filter(predicted_risk_level='high')
+        page = self.paginate_queryset(high_risk_suspects)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
         serializer = self.get_serializer(high_risk_suspects, many=True)
         return Response(serializer.data)
     
+    FACET_FILTERS = ('risk_level', 'search', 'gender', 'age_min', 'age_max')
+    
     @action(detail=False, methods=['get'])
     def risk_statistics(self, request):
         """Get risk level statistics"""
-        stats = self.queryset.values('predicted_risk_level').annotate(
-            count=Count('id')
-        ).order_by('predicted_risk_level')
-        
-        total = self.queryset.count()
-        result = {
-            'total_suspects': total,
-            'risk_breakdown': list(stats),
-            'average_risk_score': self.queryset.aggregate(
-                avg_risk=Avg('risk_score')
-            )['avg_risk'] or 0
+        result = facets.cached(self.queryset, {})
+        # Same order as grouping by predicted_risk_level on PostgreSQL: levels ascending, NULL last
+        risk_breakdown = [
+            {'predicted_risk_level': value, 'count': result['risk_levels'][value]['count']}
+            for value, _ in sorted(Suspect.RISK_LEVEL_CHOICES)
+            if result['risk_levels'][value]['count']
+        ]
+        if result['risk_levels']['unassessed']['count']:
+            risk_breakdown.append(
+                {'predicted_risk_level': None, 'count': result['risk_levels']['unassessed']['count']}
+            )
+        
+        return Response({
+            'total_suspects': result['total_suspects'],
+            'risk_breakdown': risk_breakdown,
+            'average_risk_score': result['average_risk_score'],
+        })
+    
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Get gender, age band and risk level counts and averages for the filtered suspects"""
+        queryset = self.get_queryset()
+        
+        # Facet-only filters on top of the list filters
+        gender = request.query_params.get('gender')
+        if gender:
+            queryset = queryset.filter(gender=gender)
+        try:
+            age_min = request.query_params.get('age_min')
+            age_max = request.query_params.get('age_max')
+            if age_min:
+                queryset = queryset.filter(age__gte=int(age_min))
+            if age_max:
+                queryset = queryset.filter(age__lte=int(age_max))
+        except ValueError:
+            return Response({'error': 'age_min and age_max must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        filters = {
+            name: request.query_params[name]
+            for name in self.FACET_FILTERS if request.query_params.get(name)
         }
+        return Response(facets.cached(queryset, filters))
+    
+    @action(detail=False, methods=['get'])
+    def similar(self, request):
+        """Get suspects with the closest facial features to a suspect or to given measurements"""
+        try:
+            k = int(request.query_params.get('k', 10))
+        except ValueError:
+            k = None
+        if k is None or not 1 <= k <= self.MAX_SIMILAR:
+            return Response(
+                {'error': f'k must be an integer between 1 and {self.MAX_SIMILAR}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        biometrics.index.ensure_built(Suspect.objects.all())
+        
+        suspect_id = request.query_params.get('suspect_id')
+        if suspect_id:
+            try:
+                suspect_id = int(suspect_id)
+            except ValueError:
+                return Response({'error': 'Invalid suspect_id'}, status=status.HTTP_400_BAD_REQUEST)
+            vector = biometrics.index.vector_for(suspect_id)
+            if vector is None:
+                return Response(
+                    {'error': f'Suspect {suspect_id} has no facial features on record'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+        else:
+            try:
+                vector = [float(request.query_params[name]) for name in biometrics.FACIAL_FEATURES]
+            except (KeyError, ValueError):
+                return Response(
+                    {'error': f'Provide suspect_id or numeric {", ".join(biometrics.FACIAL_FEATURES)}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        matches = biometrics.index.nearest(vector, k=k, exclude=suspect_id or None)
+        suspects = Suspect.objects.in_bulk([match_id for match_id, _ in matches])
+        results = [
+            {'distance': distance, 'suspect': self.get_serializer(suspects[match_id]).data}
+            for match_id, distance in matches
+            if match_id in suspects
+        ]
+        return Response({'count': len(results), 'results': results})
+    
+    @action(detail=False, methods=['get', 'post'])
+    def by_fingerprint(self, request):
+        """Get suspects matching one or many scene fingerprint hashes"""
+        if request.method == 'POST':
+            if not isinstance(request.data, dict):
+                return Response({'error': 'Expected a JSON object'}, status=status.HTTP_400_BAD_REQUEST)
+            hashes = request.data.get('hashes')
+            if not isinstance(hashes, list) or not all(isinstance(h, str) for h in hashes):
+                return Response({'error': 'hashes must be a list of strings'}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            hashes = request.query_params.get('hash', '').split(',')
+        
+        hashes = list(dict.fromkeys(h.strip() for h in hashes if h and h.strip()))
+        if not hashes:
+            return Response({'error': 'At least one fingerprint hash is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(hashes) > self.MAX_FINGERPRINT_BATCH:
+            return Response(
+                {'error': f'At most {self.MAX_FINGERPRINT_BATCH} hashes per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        return Response(result)
+        # Look up the stored form of each hash, answer with the hashes as sent
+        requested = {normalize_fingerprint_hash(h): h for h in hashes}
+        matches = {h: [] for h in hashes}
+        for suspect in Suspect.objects.filter(fingerprint_hash__in=requested):
+            matches[requested[suspect.fingerprint_hash]].append(self.get_serializer(suspect).data)
+        
+        return Response({
+            'matches': {h: suspects for h, suspects in matches.items() if suspects},
+            'unmatched': [h for h, suspects in matches.items() if not suspects],
+        })
+    
+    @action(detail=True, methods=['get'])
+    def network(self, request, pk=None):
+        """Get co-offenders of a suspect within a number of hops"""
+        suspect = self.get_object()
+        try:
+            hops = max(1, min(int(request.query_params.get('hops', 1)), network.MAX_HOPS))
+        except ValueError:
+            return Response({'error': 'hops must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        network.graph.ensure_built()
+        distances, edges = network.graph.neighbourhood(suspect.id, hops)
+        suspects = self._network_summaries(distances)
+        
+        return Response({
+            'suspect_id': suspect.id,
+            'hops': hops,
+            'co_offenders': [
+                {**suspects[suspect_id], 'hops': distance}
+                for suspect_id, distance in sorted(distances.items(), key=lambda item: (item[1], item[0]))
+                if suspect_id in suspects
+            ],
+            'edges': [
+                {'source': a, 'target': b, 'shared_incidents': weight}
+                for a, b, weight in edges
+            ],
+        })
+    
+    @action(detail=True, methods=['get'])
+    def path(self, request, pk=None):
+        """Get the shortest co-offending chain between two suspects"""
+        suspect = self.get_object()
+        try:
+            target = int(request.query_params['target'])
+        except (KeyError, ValueError):
+            return Response({'error': 'target suspect id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        network.graph.ensure_built()
+        path = network.graph.shortest_path(suspect.id, target)
+        if path is None:
+            return Response(
+                {'error': f'Suspects {suspect.id} and {target} are not connected'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        suspects = self._network_summaries(path)
+        return Response({
+            'length': len(path) - 1,
+            'path': [suspects[suspect_id] for suspect_id in path if suspect_id in suspects],
+        })
+    
+    @action(detail=True, methods=['get'])
+    def component(self, request, pk=None):
+        """Get every suspect connected to a suspect through shared incidents"""
+        suspect = self.get_object()
+        network.graph.ensure_built()
+        members = network.graph.component(suspect.id)
+        return Response({
+            'suspect_id': suspect.id,
+            'size': len(members),
+            'members': sorted(members),
+        })
+    
+    def _network_summaries(self, suspect_ids):
+        return {
+            row['id']: row
+            for row in Suspect.objects.filter(id__in=list(suspect_ids)).values(
+                'id', 'first_name', 'last_name', 'alias', 'predicted_risk_level'
+            )
+        }
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -80,46 +281,52 @@ class SuspectViewSet(viewsets.ModelViewSet):
         if risk_level:
             queryset = queryset.filter(predicted_risk_level=risk_level)
         
-        # Search functionality
+        # Search functionality, ranked by name similarity
         search = self.request.query_params.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(first_name__icontains=search) |
-                Q(last_name__icontains=search) |
-                Q(alias__icontains=search) |
-                Q(national_id__icontains=search)
-            )
+            queryset = search_suspects(queryset, search)
         
         return queryset
 
 
-class CrimeIncidentViewSet(viewsets.ModelViewSet):
+class CrimeIncidentViewSet(SparseFieldsetQuerysetMixin, viewsets.ModelViewSet):
     queryset = CrimeIncident.objects.all()
     serializer_class = CrimeIncidentSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('-created_at',)
+    
+    def get_expand(self):
+        """Relations the client asked to embed, e.g. ?expand=suspects"""
+        expand = self.request.query_params.get('expand', '') if self.request else ''
+        return {name.strip() for name in expand.split(',') if name.strip()}
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self.get_expand()
+        return context
     
     def perform_create(self, serializer):
-        # Save the incident first
-        incident = serializer.save()
-        
-        # Generate ML prediction
+        # Predict from the validated data so the incident is inserted once
+        data = serializer.validated_data
         is_severe, confidence = predictor.predict_crime_severity(
-            incident.crime_type,
-            incident.latitude,
-            incident.longitude,
-            incident.location_type
+            data['crime_type'],
+            data['latitude'],
+            data['longitude'],
+            data['location_type']
         )
         
         if is_severe is not None and confidence is not None:
-            incident.is_severe = is_severe
-            incident.severity_score = 0.8 if is_severe else 0.3  # Simplified scoring
-            incident.prediction_confidence = confidence
-            incident.save()
+            incident = serializer.save(
+                is_severe=is_severe,
+                severity_score=0.8 if is_severe else 0.3,  # Simplified scoring
+                prediction_confidence=confidence,
+            )
             logger.info(f"Incident {incident.id} created with severity: {is_severe}")
             
             # Update region risk summary
             self._update_region_risk(incident.region_code)
         else:
+            incident = serializer.save()
             logger.warning(f"Could not generate prediction for incident {incident.id}")
     
     def _update_region_risk(self, region_code):
@@ -150,7 +357,12 @@ class CrimeIncidentViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def severe_incidents(self, request):
         """Get all severe incidents"""
-        severe_incidents = self.queryset.filter(is_severe=True)
+        severe_incidents = self.get_queryset().filter(is_severe=True)
+        page = self.paginate_queryset(severe_incidents)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
         serializer = self.get_serializer(severe_incidents, many=True)
         return Response(serializer.data)
     
@@ -159,7 +371,12 @@ class CrimeIncidentViewSet(viewsets.ModelViewSet):
         """Get incidents grouped by region"""
         region = request.query_params.get('region_code')
         if region:
-            incidents = self.queryset.filter(region_code=region)
+            incidents = self.get_queryset().filter(region_code=region)
+            page = self.paginate_queryset(incidents)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+            
             serializer = self.get_serializer(incidents, many=True)
             return Response(serializer.data)
         
@@ -174,6 +391,13 @@ class CrimeIncidentViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = super().get_queryset()
         
+        # Load suspect links in one query, with only the columns the response uses
+        if 'suspects' in self.get_expand():
+            suspects = Suspect.objects.only(*SuspectSummarySerializer.PREFETCH_FIELDS)
+        else:
+            suspects = Suspect.objects.only('id')
+        queryset = queryset.prefetch_related(Prefetch('suspects', queryset=suspects))
+        
         # Filter by severity
         is_severe = self.request.query_params.get('is_severe')
         if is_severe is not None:
@@ -196,11 +420,44 @@ class RegionRiskSummaryViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = RegionRiskSummary.objects.all()
     serializer_class = RegionRiskSummarySerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('-risk_score',)
     
     @action(detail=False, methods=['get'])
     def high_risk_regions(self, request):
-        """Get regions with risk score above threshold"""
+        """Get regions with risk score above threshold, optionally including trend anomalies"""
         threshold = float(request.query_params.get('threshold', 50.0))
-        high_risk = self.queryset.filter(risk_score__gte=threshold)
+        condition = Q(risk_score__gte=threshold)
+        
+        # Regions flagged by detect_region_anomalies
+        include_anomalies = request.query_params.get('include_anomalies', '')
+        if include_anomalies.lower() == 'true':
+            condition |= Q(is_trend_anomaly=True)
+        
+        high_risk = self.queryset.filter(condition)
         serializer = self.get_serializer(high_risk, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def heatmap_tile(request, z, x, y):
+    """Get pre-aggregated incident density for one crime map tile"""
+    if not heatmap.MIN_ZOOM <= z <= heatmap.MAX_ZOOM:
+        return Response(
+            {'error': f'Zoom must be between {heatmap.MIN_ZOOM} and {heatmap.MAX_ZOOM}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return Response(
+            {'error': f'Tile ({x}, {y}) is outside zoom level {z}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    response = Response({
+        'z': z,
+        'x': x,
+        'y': y,
+        'cells': heatmap.tile(z, x, y),
+    })
+    patch_cache_control(response, private=True, max_age=heatmap.TILE_MAX_AGE)
+    return response